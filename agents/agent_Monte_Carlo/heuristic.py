@@ -0,0 +1,78 @@
+import numpy as np
+from agents.common import BoardPiece, PLAYER1, PLAYER2, winning_lines
+
+# Score of a line holding only pieces of one player, by number of pieces.
+# Lines with pieces of both players can no longer be won and are worth nothing.
+DEFAULT_WEIGHTS = {2: 0.2, 3: 1.0}
+
+
+def _line_counts(boards, players, connect=4):
+    """Pieces of each player and of their opponent in every line, shape (N, n_lines)."""
+    n, rows, cols = boards.shape
+    lines = winning_lines(rows, cols, connect)
+    cells = boards.reshape(n, rows * cols)[:, lines]  # (N, n_lines, connect)
+    players = players.reshape(n, 1, 1)
+    opponents = np.where(players == PLAYER1, PLAYER2, PLAYER1)
+
+    return np.sum(cells == players, axis=2), np.sum(cells == opponents, axis=2)
+
+
+def evaluate_boards(boards: np.ndarray, players: np.ndarray, weights: dict = None, connect: int = 4) -> np.ndarray:
+    """ Static evaluation of many positions at once.
+
+    Every line of `connect` cells that holds pieces of only one player is worth the weight of its
+    number of pieces (e.g. an open three), positively for `player` and negatively for its opponent.
+
+    Parameters
+    ----------
+    boards: np.array
+        boards of shape (N, rows, columns)
+    players: np.array
+        player for whom each board is evaluated, shape (N,)
+    weights: dict or None
+        score of an open line by number of pieces, DEFAULT_WEIGHTS if None
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    scores: np.array
+        score of every board, shape (N,)
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    boards = np.asarray(boards, dtype=BoardPiece)
+    own, other = _line_counts(boards, np.asarray(players, dtype=BoardPiece), connect)
+
+    scores = np.zeros(len(boards))
+    for pieces, weight in weights.items():
+        scores += weight * (np.sum((own == pieces) & (other == 0), axis=1) -
+                            np.sum((other == pieces) & (own == 0), axis=1))
+
+    return scores
+
+
+def evaluate_board(board: np.ndarray, player: BoardPiece, weights: dict = None, connect: int = 4) -> float:
+    """ Static evaluation of one position, see evaluate_boards.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player for whom the board is evaluated
+    weights: dict or None
+        score of an open line by number of pieces, DEFAULT_WEIGHTS if None
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    score: float
+        positive if the position is better for `player` than for its opponent
+    """
+    return float(evaluate_boards(board[np.newaxis], np.array([player]), weights, connect)[0])
+
+
+def win_probability(scores, scale: float = 1.0):
+    """Converts evaluation scores into probabilities of winning with a logistic function."""
+    return 1 / (1 + np.exp(-np.asarray(scores) / scale))
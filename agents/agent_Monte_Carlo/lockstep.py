@@ -0,0 +1,96 @@
+import time
+from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+from agents.agent_Monte_Carlo.montecarlo_exec import blank_board, establish_root, forced_child, best_move
+from agents.agent_Monte_Carlo.montecarlo_exec import select_leaves, evaluate_leaves, search_stats
+from agents.agent_Monte_Carlo.tactics import forced_move
+
+
+def montecarlo_lockstep(boards, players, saved_states, last_actions, train_time=5, iterations=None,
+                        settings=None):
+    """ Performance of the MonteCarlo algorithm for many independent games at once.
+
+    The searches of all the games advance together: every step selects settings.batch_size leaves
+    (one by default) of every tree, simulates from the leaves of all the trees with one call to the
+    evaluator per player to move (see montecarlo_exec.evaluate_leaves) and back-propagates their
+    results into their trees. Every tree is searched as by montecarlo with batched leaves, the Python
+    overhead of the simulations being shared by all the games. First and forced moves are answered
+    without search, as by montecarlo.
+
+    Parameters
+    ----------
+    boards: list
+        state of the board of every game
+    players: list
+        player that performs the MonteCarlo algorithm in every game
+    saved_states: list
+        previously chosen node of every game, or None
+    last_actions: list
+        action performed by the other player in previous turn of every game, None if the game starts
+    train_time: float
+        seconds of search, if `iterations` is not given
+    iterations: int or None
+        if given, number of iterations performed on every tree instead of searching for `train_time`
+    settings: SearchSettings or None
+        options of the searches
+
+    Returns
+    -------
+    moves: list
+        (action, saved_state) of every game, as returned by montecarlo
+    """
+    settings = SearchSettings() if settings is None else settings
+    telemetry = settings.telemetry
+    connect = settings.config.connect
+    t0 = time.perf_counter()
+
+    moves = [None] * len(boards)
+    searches = []
+    for i, (board, player, saved_state, last_action) in enumerate(zip(boards, players, saved_states, last_actions)):
+        if last_action is None:
+            moves[i] = blank_board(board, player, settings)
+            if telemetry is not None:
+                telemetry.record_search(moves[i][1], **search_stats(moves[i][1], moves[i][1], 'opening', train_time,
+                                                                    0, time.perf_counter() - t0, 0))
+            continue
+
+        root = establish_root(board, player, saved_state, last_action)
+        reused = 0
+        if telemetry is not None and root.child is not None:
+            from agents.agent_Monte_Carlo.memory import count_nodes  # Only needed by the telemetry
+            reused = count_nodes(root)
+
+        forced = forced_move(board, player, connect) if settings.tactics else None
+        if forced is not None:
+            moves[i] = forced_child(root, forced, player, connect)
+            if telemetry is not None:
+                telemetry.record_search(moves[i][1], **search_stats(root, moves[i][1], 'forced', train_time, 0,
+                                                                    time.perf_counter() - t0, reused))
+        else:
+            searches.append((i, root, player, reused))
+
+    step = 1 if settings.batch_size is None else settings.batch_size
+    deadline = time.monotonic() + train_time
+    done = 0
+    # At least one step, so that every root has children to choose from
+    while searches and (done == 0 or (done < iterations if iterations is not None else time.monotonic() < deadline)):
+        size = step if iterations is None else min(step, iterations - done)
+        pending = {}
+        for _, root, player, _ in searches:  # SELECTION and EXPANSION in every tree
+            pending.setdefault(player, []).extend(select_leaves(root, player, size, settings))
+        for player, leaves in pending.items():  # SIMULATION and BACKPROPAGATION of all the trees
+            evaluate_leaves(leaves, player, settings)
+        done += size
+
+    for i, root, player, reused in searches:
+        moves[i] = best_move(root, settings)
+
+        # What was learnt about the root and its children is kept for later games
+        if settings.stats_store is not None:
+            settings.stats_store.record(root, player)
+
+        if telemetry is not None:
+            telemetry.record_search(moves[i][1], **search_stats(root, moves[i][1], 'search',
+                                                                train_time if iterations is None else None,
+                                                                done, time.perf_counter() - t0, reused))
+
+    return moves
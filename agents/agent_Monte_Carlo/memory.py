@@ -0,0 +1,88 @@
+import sys
+from agents.agent_Monte_Carlo.tree_io import NODE_BYTES
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def node_bytes(node) -> int:
+    """ Memory used by one TreeNode: the object, its attributes, its board and its list of children.
+
+    Parameters
+    ----------
+    node: TreeNode
+        node of a tree
+
+    Returns
+    -------
+    size: int
+        bytes of the node, not counting its children
+    """
+    size = sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+    size += sys.getsizeof(node.board)  # Includes the cells, as every node owns its board
+    if getattr(node, 'unloaded_nodes', 0) == 0 and node.child is not None:  # Children of a LazyTreeNode not built yet
+        size += sys.getsizeof(node.child)
+    if getattr(node, 'untried', None) is not None:
+        size += sys.getsizeof(node.untried)
+
+    return size
+
+
+def count_nodes(root) -> int:
+    """Number of nodes of a tree.
+
+    The nodes of a LazyTreeNode tree that have not been built yet are counted from its saved
+    columns, without building them.
+    """
+    nodes = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        unloaded = getattr(node, 'unloaded_nodes', 0)
+        if unloaded > 0:
+            nodes += unloaded
+        elif node.child is not None:
+            stack.extend(node.child)
+
+    return nodes
+
+
+def tree_memory(root) -> dict:
+    """ Memory used by a tree.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the tree
+
+    Returns
+    -------
+    memory: dict
+        number of nodes, total bytes and bytes per node of the tree. The nodes of a LazyTreeNode
+        tree that have not been built yet are counted with the bytes they take in the saved columns.
+    """
+    nodes = 0
+    size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        size += node_bytes(node)
+        unloaded = getattr(node, 'unloaded_nodes', 0)
+        if unloaded > 0:
+            nodes += unloaded
+            size += unloaded * NODE_BYTES
+        elif node.child is not None:
+            stack.extend(node.child)
+
+    return {'nodes': nodes, 'bytes': size, 'bytes_per_node': size / nodes}
+
+
+def peak_rss() -> int:
+    """Peak resident set size of the process in bytes, 0 if it cannot be measured."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Kilobytes on Linux
@@ -1,6 +1,86 @@
 import numpy as np
-from agents.common import GameState, BoardPiece, PlayerAction, check_end_state, apply_player_action
+from agents.common import GameState, BoardPiece, PlayerAction, check_end_state, apply_player_action, is_symmetric
+from agents.common import mirror_board
+from agents.common import NO_PLAYER, DEFAULT_CONFIG
 from agents.agents_random.random import generate_move_random
+from agents.agent_Monte_Carlo.heuristic import evaluate_board, win_probability
+from agents.agent_Monte_Carlo.priors import move_priors
+
+
+class SearchSettings:
+    """
+    Options of the MonteCarlo search, shared by all the nodes of a tree.
+
+    Attributes
+    ----------
+    stats_store: StatsStore or None
+        persistent statistics used to seed new nodes and updated after every search
+    seed_limit: int
+        maximum number of games a new node is seeded with from the stats_store
+    rollout_depth: int or None
+        if given, number of plies after which random games are stopped and scored by the heuristic evaluation
+    evaluation_weights: dict or None
+        weights of the heuristic evaluation (see heuristic.evaluate_board)
+    evaluation_scale: float
+        scale of the logistic function turning evaluations into probabilities of winning
+    priors: callable, array or None
+        if given, prior of every column (or function of the board and the player to move returning them,
+        e.g. priors.center_priors), used to order the children and by the PUCT selection
+    c_puct: float
+        exploration constant of the PUCT selection
+    widening_base: float or None
+        if given, children are created in prior order as the node is visited, a node with n games having
+        ceil(widening_base * (n + 1) ** widening_exponent) of them
+    widening_exponent: float
+        growth of the number of children with the games of the node
+    rave_equivalence: float or None
+        if given, all-moves-as-first (AMAF) statistics are kept and blended into the values of the nodes,
+        with a weight of sqrt(k / (3 n + k)) for a node with n games, k being rave_equivalence
+    batch_size: int or None
+        if given, leaves are selected by batches of this size, with virtual losses, and evaluated together
+    evaluator: callable or None
+        evaluation of a batch of leaves, called like playout.random_games (its default) with the boards,
+        the main player, the players to move first and the keyword arguments max_plies, weights, scale,
+        moves and connect, and returning whether the main player wins from every board
+    tactics: bool
+        whether forced moves (wins in one or two and blocks of a single threat, see tactics.forced_move)
+        are played at once without searching
+    config: GameConfig
+        dimensions of the game, whose board shape must match the searched boards
+    telemetry: Telemetry or None
+        if given, receives the statistics of every search (see montecarlo_exec.search_stats)
+    """
+
+    def __init__(self, stats_store=None, seed_limit=50, rollout_depth=None, evaluation_weights=None,
+                 evaluation_scale=1.0, priors=None, c_puct=1.5, widening_base=None, widening_exponent=0.5,
+                 rave_equivalence=None, batch_size=None, evaluator=None, tactics=True, config=DEFAULT_CONFIG,
+                 telemetry=None):
+        self.stats_store = stats_store
+        self.seed_limit = seed_limit
+        self.rollout_depth = rollout_depth
+        self.evaluation_weights = evaluation_weights
+        self.evaluation_scale = evaluation_scale
+        self.priors = priors
+        self.c_puct = c_puct
+        self.widening_base = widening_base
+        self.widening_exponent = widening_exponent
+        self.rave_equivalence = rave_equivalence
+        self.batch_size = batch_size
+        self.evaluator = evaluator
+        self.tactics = tactics
+        self.config = config
+        self.telemetry = telemetry
+
+    @property
+    def ordered(self):
+        """Whether children are created in prior order rather than all at once in column order."""
+        return self.priors is not None or self.widening_base is not None
+
+    def children_allowed(self, games):
+        """Number of children of a node with `games` games, None if there is no limit."""
+        if self.widening_base is None:
+            return None
+        return int(np.ceil(self.widening_base * (games + 1) ** self.widening_exponent))
 
 
 class TreeNode:
@@ -29,26 +109,51 @@ class TreeNode:
         whether this node is a losing node (losing combination of pieces already in the board) (default is False)
     terminal: bool
         whether this is a terminal node (losing/winning/draw) (default is False)
+    prior_games: int
+        number of the total_games already known by the stats store, seeded from it or recorded into it (default is 0)
+    prior_wins: int
+        number of the wins already known by the stats store (default is 0)
+    prior: float or None
+        prior probability of the move, when the search uses priors (default is None)
+    untried: list or None
+        (move, prior) pairs of the children not created yet, in prior order, when the search uses
+        progressive widening (default is None)
+    amaf_games: int
+        number of games below the parent in which turn_player played move at any time (default is 0)
+    amaf_wins: int
+        number of them won by the main player (default is 0)
 
     Methods
     -------
-    new_child(children, main_player, last_action)
+    new_child(children, main_player, connect)
         Appending new children to the tree, using self as parent
-    find_ucb1()
+    find_value(rave_equivalence)
+        Finding the node's win rate, blended with its AMAF win rate
+    find_ucb1(rave_equivalence)
         Finding the node's upper confidence bound (UBC1)
-    find_best_child():
-        Finding the child of a node with best UCB value
-    select_node():
+    find_puct(c_puct)
+        Finding the node's PUCT value
+    find_best_child(settings):
+        Finding the child of a node with best UCB (or PUCT) value
+    select_node(main_player, settings):
         Performing the SELECTION step
+    widen(main_player, settings):
+        Creating the next children of the node in prior order
+    legal_moves():
+        Finding the moves of the children of the node
+    children_by_column():
+        Finding the child of every column, including the mirrored columns left out at a symmetric root
+    mirror(parent):
+        Copying the subtree of the node reflected left-right
     check_winning_children():
         Check whether any children node has a board winning combination
     check_losing_children():
         Check whether any children node has a board losing combination
     opponent_choice(action):
         Take the action made by the opponent and find which child of the node corresponds to that case
-    losing_case(losing_nodes):
+    losing_case(losing_nodes, connect):
         Prevent losing scenarios by returning lose-preventing nodes
-    expansion(main_player):
+    expansion(main_player, settings, playout):
         Performs the EXPANSION of the algorithm
     """
 
@@ -78,8 +183,14 @@ class TreeNode:
         self.winner = False
         self.loser = False
         self.terminal = False
-
-    def new_child(self, children, main_player):
+        self.prior_games = 0
+        self.prior_wins = 0
+        self.prior = None
+        self.untried = None
+        self.amaf_games = 0
+        self.amaf_wins = 0
+
+    def new_child(self, children, main_player, connect=4):
         """Appending new children to the tree, using self as the parent.
 
         Parameters
@@ -88,6 +199,8 @@ class TreeNode:
             new TreeNode structure to be appended as a child to self
         main_player: BoardPiece
             piece of the player using this tree node (machine_player)
+        connect: int
+            number of aligned pieces needed to win
         """
         # Appending the new child and choosing it as node variable
         if self.child is None:
@@ -97,7 +210,7 @@ class TreeNode:
 
         # Checking whether it is a terminal node (result different from
         # GameState.STILL_PLAYING and if so, load it into its attributes
-        result = check_end_state(node.board, node.turn_player, node.move)
+        result = check_end_state(node.board, node.turn_player, node.move, connect)
 
         if main_player == node.turn_player and result == GameState.IS_WIN:
             node.winner = True
@@ -108,9 +221,37 @@ class TreeNode:
         elif result == GameState.IS_DRAW:
             node.terminal = True
 
-    def find_ucb1(self):
+    def find_value(self, rave_equivalence=None):
+        """Finding the node's win rate, blended with its AMAF win rate.
+
+        The AMAF win rate is known after far fewer games but is biased, so its weight decreases
+        as the games of the node grow.
+
+        Parameters
+        ----------
+        rave_equivalence: float or None
+            number of games at which both win rates have about the same weight, None to ignore AMAF statistics
+
+        Returns
+        -------
+        value: float
+            win rate of the node (0 if it has no games at all)
+        """
+        value = self.wins / self.total_games if self.total_games > 0 else 0.
+        if rave_equivalence is not None and self.amaf_games > 0:
+            beta = np.sqrt(rave_equivalence / (3 * self.total_games + rave_equivalence))
+            value = (1 - beta) * value + beta * self.amaf_wins / self.amaf_games
+
+        return value
+
+    def find_ucb1(self, rave_equivalence=None):
         """Finding the node's upper confidence bound (UBC1).
 
+        Parameters
+        ----------
+        rave_equivalence: float or None
+            if given, the win rate is blended with the AMAF win rate (see find_value)
+
         Returns
         -------
         ucb1: None or float
@@ -122,19 +263,49 @@ class TreeNode:
             return ucb1
         else:
             # sqrt(2) used as exploration parameter
-            ucb1 = self.wins / self.total_games + np.sqrt(2 * np.log(self.parent.total_games) / self.total_games)
+            ucb1 = self.find_value(rave_equivalence) + np.sqrt(2 * np.log(self.parent.total_games) / self.total_games)
             return ucb1
 
-    def find_best_child(self):
+    def find_puct(self, c_puct, rave_equivalence=None):
+        """Finding the node's PUCT value, its win rate plus an exploration term weighted by its prior.
+
+        Parameters
+        ----------
+        c_puct: float
+            exploration constant
+        rave_equivalence: float or None
+            if given, the win rate is blended with the AMAF win rate (see find_value)
+
+        Returns
+        -------
+        puct: float
+            PUCT value of the node, unvisited nodes having a win rate of 0
+        """
+        prior = self.prior if self.prior is not None else 1 / len(self.parent.child)
+        value = self.find_value(rave_equivalence)
+        return value + c_puct * prior * np.sqrt(self.parent.total_games) / (1 + self.total_games)
+
+    def find_best_child(self, settings=None):
         """Finding the child of a node with best UCB value.
 
+        If the search uses priors, the child with the best PUCT value is chosen instead.
+
+        Parameters
+        ----------
+        settings: SearchSettings or None
+            options of the search
+
         Returns
         -------
         node: TreeNode
             leaf node with highest UCB values
         """
         node = self
-        ucb_values = [children.find_ucb1() for children in node.child]
+        rave = settings.rave_equivalence if settings is not None else None
+        if settings is not None and settings.priors is not None:
+            return node.child[int(np.argmax([children.find_puct(settings.c_puct, rave) for children in node.child]))]
+
+        ucb_values = [children.find_ucb1(rave) for children in node.child]
 
         # Choosing random children if there is a child which has not been
         # explored yet (meaning it has None as its UCB value)
@@ -145,11 +316,19 @@ class TreeNode:
 
         return node
 
-    def select_node(self):
+    def select_node(self, main_player=None, settings=None):
         """Performing the SELECTION step.
 
         Finding the last node that is not terminal and has no children yet (leaf node),
         going through a path of selection guided by the UCB values of the nodes.
+        With progressive widening, the nodes on the path get new children as their games grow.
+
+        Parameters
+        ----------
+        main_player: BoardPiece or None
+            piece of the player using this tree node, needed for progressive widening
+        settings: SearchSettings or None
+            options of the search
 
         Returns
         -------
@@ -159,10 +338,129 @@ class TreeNode:
         node = self
 
         while node.child is not None and not node.terminal:
-            node = node.find_best_child()
+            if settings is not None and settings.widening_base is not None:
+                node.widen(main_player, settings)
+            node = node.find_best_child(settings)
+
+        return node
+
+    def legal_moves(self):
+        """Finding the moves of the children of the node.
+
+        These are the valid columns, except at a root whose board is symmetric, where only one
+        of two mirrored columns is kept as both lead to equivalent positions.
+
+        Returns
+        -------
+        cols: np.array or None
+            columns that can be used (see valid_columns)
+        """
+        cols = valid_columns(self.board)
+
+        if self.parent is None and cols is not None and cols.size > 1 and is_symmetric(self.board):
+            cols = cols[cols <= (self.board.shape[1] - 1) // 2]
+            if cols.size == 1:  # Single column, as given by valid_columns
+                cols = np.array(int(cols[0]))
+
+        return cols
+
+    def children_by_column(self):
+        """Finding the child of every column, including the mirrored columns left out at a symmetric root.
+
+        The columns left out by legal_moves lead to the mirror image of the position of their mirrored
+        column, so they share its child and its statistics.
+
+        Returns
+        -------
+        children: dict
+            child of every column, by column
+        """
+        children = {int(node.move): node for node in self.child or []}
+
+        if self.parent is None and is_symmetric(self.board):
+            last = self.board.shape[1] - 1
+            for move, node in list(children.items()):
+                children.setdefault(last - move, node)
+
+        return children
+
+    def mirror(self, parent):
+        """Copying the subtree of the node reflected left-right (see common.mirror_board).
+
+        Parameters
+        ----------
+        parent: TreeNode or None
+            parent of the copy
+
+        Returns
+        -------
+        node: TreeNode
+            copy of the node, with the same statistics for the mirrored moves
+        """
+        last = self.board.shape[1] - 1
+        move = None if self.move is None else PlayerAction(last - self.move)
+        node = TreeNode(mirror_board(self.board).copy(), move, parent, self.turn_player)
+        for name in ('total_games', 'wins', 'winner', 'loser', 'terminal', 'prior_games', 'prior_wins', 'prior',
+                     'amaf_games', 'amaf_wins'):
+            setattr(node, name, getattr(self, name))
+        if self.untried is not None:
+            node.untried = [(last - move, prior) for move, prior in self.untried]
+        if self.child is not None:
+            node.child = [children.mirror(node) for children in self.child]
 
         return node
 
+    def widen(self, main_player, settings):
+        """Creating the next children of the node in prior order, as many as its games allow.
+
+        Parameters
+        ----------
+        main_player: BoardPiece
+            piece of the player using this tree node (machine_player)
+        settings: SearchSettings
+            options of the search
+
+        Returns
+        -------
+        new_children: list
+            children created by the call
+        """
+        player = change_player(self.turn_player)
+        if self.untried is None:
+            cols = self.legal_moves()
+            if cols is None:
+                self.untried = []
+            else:
+                priors = settings.priors if settings.priors is not None else np.ones(self.board.shape[1])
+                ordered = move_priors(self.board, player, priors, cols)
+                # Children that already exist (e.g. of a loaded tree) are not created again, nor
+                # the mirror of a child of a symmetric root (see legal_moves)
+                existing = {int(children.move): children for children in self.child or []}
+                if self.parent is None and is_symmetric(self.board):
+                    last = self.board.shape[1] - 1
+                    existing.update({last - move: children for move, children in list(existing.items())})
+                for move, prior in ordered:
+                    if move in existing:
+                        existing[move].prior = prior
+                self.untried = [(move, prior) for move, prior in ordered if move not in existing]
+
+        allowed = settings.children_allowed(self.total_games)
+        new_children = []
+        while self.untried and (allowed is None or len(self.child or []) < allowed):
+            move, prior = self.untried.pop(0)
+            board = self.board.copy()
+            apply_player_action(board, PlayerAction(move), player=player)
+            self.new_child(TreeNode(board, PlayerAction(move), parent=self, turn_player=player), main_player,
+                           settings.config.connect)
+            self.child[-1].prior = prior
+            new_children.append(self.child[-1])
+
+        # New children start from what previous searches learnt about their positions
+        if new_children and settings.stats_store is not None:
+            settings.stats_store.seed(new_children, main_player, settings.seed_limit)
+
+        return new_children
+
     def check_winning_children(self):
         """Check whether any children node has a board winning combination.
 
@@ -214,15 +512,28 @@ class TreeNode:
         -------
         child_opponent: TreeNode
             child of the node corresponding to that move of the opponent
+
+        Raises
+        ------
+        ValueError
+            if no child corresponds to that move
         """
 
-        moves = [children.move for children in self.child]
-        ind_opponent_move = int(np.argwhere(moves == action))
-        child_opponent = self.child[ind_opponent_move]
+        moves = [int(children.move) for children in self.child or []]
+        if int(action) in moves:
+            return self.child[moves.index(int(action))]
+
+        mirrored = self.board.shape[1] - 1 - int(action)
+        if self.parent is None and mirrored in moves and is_symmetric(self.board):
+            # A symmetric root only has the children of one half of the board (see legal_moves),
+            # the subtree of the mirrored column is reflected
+            child_opponent = self.child[moves.index(mirrored)].mirror(self)
+            self.child.append(child_opponent)
+            return child_opponent
 
-        return child_opponent
+        raise ValueError(f'no child for the column {action}')
 
-    def losing_case(self, losing_nodes):
+    def losing_case(self, losing_nodes, connect=4):
         """Prevent losing scenarios by returning lose-preventing nodes.
 
         Take the action would make the opponent win, returns the node
@@ -233,6 +544,8 @@ class TreeNode:
         ----------
         losing_nodes: list
             indexes of the winners which have a losing combination
+        connect: int
+            number of aligned pieces needed to win
 
         Returns
         -------
@@ -240,6 +553,20 @@ class TreeNode:
             node preventing the loss from happening.
         """
         move_needed = self.child[int(losing_nodes[0])].move
+        untried = dict(self.parent.untried or [])
+        if int(move_needed) in untried:
+            # With progressive widening the preventing move may not have been created yet.
+            # self is a node of the player using the tree, so its turn_player is that player.
+            self.parent.untried.remove((int(move_needed), untried[int(move_needed)]))
+            board = self.parent.board.copy()
+            apply_player_action(board, PlayerAction(move_needed), player=self.turn_player)
+            self.parent.new_child(TreeNode(board, PlayerAction(move_needed), parent=self.parent,
+                                           turn_player=self.turn_player), self.turn_player, connect)
+            self.parent.child[-1].prior = untried[int(move_needed)]
+        if self.parent.parent is None and all(children.move != move_needed for children in self.parent.child):
+            # A symmetric root only has the children of one half of the board, the mirrored column
+            # leads to the mirror image of the preventing position
+            move_needed = self.parent.board.shape[1] - 1 - move_needed
         node = self.parent.opponent_choice(move_needed)
 
         # This node is thought to be terminal as it is assumed the opponent will
@@ -250,7 +577,7 @@ class TreeNode:
 
         return node
 
-    def expansion(self, main_player):
+    def expansion(self, main_player, settings=None, playout=None, simulate=True):
         """Performs the EXPANSION of the algorithm.
 
         Expands the tree from the self node if it is non-terminal by creating the children with
@@ -263,35 +590,51 @@ class TreeNode:
         ----------
         main_player: BoardPiece
             piece of the player using this tree node (machine_player)
+        settings: SearchSettings or None
+            options of the search
+        playout: list or None
+            if given, the (player, column) moves of the randomized simulation are appended to it
+        simulate: bool
+            if False, the randomized simulation is left to the caller (e.g. to evaluate many nodes at once)
 
         Returns
         -------
         node: TreeNode
             node that performed the randomized simulation or a winning/preventing from losing node
-        win: bool
-            whether the outcome of the game of that node was a win
+        win: bool or None
+            whether the outcome of the game of that node was a win, None if the simulation was left to the caller
         """
-        cols = valid_columns(self.board)  # Finding all possible moves
+        cols = self.legal_moves()  # Finding all possible moves
         win = False
         node = self
 
+        connect = DEFAULT_CONFIG.connect if settings is None else settings.config.connect
+
         # Check whether it is possible to create new children
         if not self.terminal and cols is not None:
 
             old_board = self.board.copy()
-            if cols.size > 1:
+            if settings is not None and settings.ordered:
+                # Children in prior order, only the first ones with progressive widening
+                self.widen(main_player, settings)
+
+            elif cols.size > 1:
                 for i, column in enumerate(cols):
                     board = old_board.copy()
                     # Create a child for each possible move
                     apply_player_action(board, column, player=change_player(self.turn_player))
                     self.new_child(TreeNode(board, PlayerAction(column), parent=self, turn_player=change_player(
-                        self.turn_player)), main_player)
+                        self.turn_player)), main_player, connect)
 
             else:  # in case there is only 1 column (had problems with this scenario, so i separated it)
                 board = old_board.copy()
                 apply_player_action(board, PlayerAction(cols), player=change_player(self.turn_player))
                 self.new_child(TreeNode(board, PlayerAction(cols), parent=self, turn_player=change_player(
-                    self.turn_player)), main_player)
+                    self.turn_player)), main_player, connect)
+
+            # New children start from what previous searches learnt about their positions
+            if settings is not None and settings.stats_store is not None and not settings.ordered:
+                settings.stats_store.seed(self.child, main_player, settings.seed_limit)
 
             # Check whether there are any winning or losing children
             winning_nodes = self.check_winning_children()
@@ -303,7 +646,7 @@ class TreeNode:
             # If there are losing children, find the node that prevents it and treat it
             # as a win (biasing the algorithm towards desiring this preventing node)
             if len(losing_nodes) > 0:
-                node = self.losing_case(losing_nodes)
+                node = self.losing_case(losing_nodes, connect)
                 win = True
 
             # If there are winning children, use them as the back propagating node so that
@@ -315,11 +658,17 @@ class TreeNode:
             # If there are no winning nor losing nodes, pick a random children and simulate a
             # a random game from that board state on.
             else:
-                ind = int(np.random.randint(cols.size))
+                ind = int(np.random.randint(len(self.child)))
                 node = self.child[ind]
                 old_board = node.board.copy()
-                if node.terminal is False:
-                    win = random_game(node.board, main_player, node.turn_player)
+                if node.terminal is False and not simulate:
+                    win = None
+                elif node.terminal is False:
+                    if settings is not None and settings.rollout_depth is not None:
+                        win = random_game(node.board, main_player, node.turn_player, settings.rollout_depth,
+                                          settings.evaluation_weights, settings.evaluation_scale, playout, connect)
+                    else:
+                        win = random_game(node.board, main_player, node.turn_player, moves=playout, connect=connect)
                 node.board = old_board
 
         # Check whether it is terminal because it is a winning or a losing node
@@ -334,12 +683,15 @@ class TreeNode:
         return node, win
 
 
-def back_prop(node, winning):
+def back_prop(node, winning, playout=None):
     """Performs the BACKPROPAGATION of the algorithm.
 
     Propagates the results of simulations from lower nodes to higher in the hierarchy,
     parental to them, as well as increasing the total games per node as back-propagating
     occurs.
+    If the moves of the simulation are given, the AMAF statistics of the siblings of the nodes on
+    the path are updated too: a child of a node counts the game if its move was played by its player
+    anywhere after that node, in the tree or in the simulation.
 
     Parameters
     ----------
@@ -347,8 +699,11 @@ def back_prop(node, winning):
         node that performed the randomized simulation or a winning/preventing from losing node
     winning: bool
         whether the outcome of the game of that node was a win
+    playout: list or None
+        (player, column) moves of the simulation, if AMAF statistics are kept
     """
     parent = node
+    played = None if playout is None else {(int(player), int(move)) for player, move in playout}
 
     while parent is not None:
         parent.total_games += 1
@@ -356,6 +711,36 @@ def back_prop(node, winning):
         if winning:
             parent.wins += 1
 
+        if played is not None:
+            if parent.child is not None:
+                for children in parent.child:
+                    if (int(children.turn_player), int(children.move)) in played:
+                        children.amaf_games += 1
+                        if winning:
+                            children.amaf_wins += 1
+            if parent.move is not None:
+                played.add((int(parent.turn_player), int(parent.move)))
+
+        parent = parent.parent
+
+
+def add_virtual_loss(node, count=1):
+    """Counts `count` lost games in the node and all its parents (or removes them, if negative).
+
+    The path of a simulation that is still pending then looks worse, so that the next selections
+    of a batch go elsewhere.
+
+    Parameters
+    ----------
+    node: TreeNode
+        node whose simulation is pending
+    count: int
+        number of virtual games
+    """
+    parent = node
+
+    while parent is not None:
+        parent.total_games += count
         parent = parent.parent
 
 
@@ -390,23 +775,15 @@ def valid_columns(board):
     Returns
     -------
     ind: np.array or None
-        columns that can be used
+        columns that can be used (a 0-d array if there is only one)
     """
-    ind = None
-    valid = False
-
-    for j in range(0, board.shape[1]):
-        j_good = column_free(board, j)
-
-        if j_good and not valid:
-            ind = j
-            valid = True
-        elif j_good and valid:
-            ind = np.hstack((ind, j))
+    # A column is free as long as its top cell is empty
+    ind = np.flatnonzero(board[0] == NO_PLAYER)
 
-    if ind is not None:
-        ind = np.array(ind)
-        return ind
+    if ind.size == 0:
+        return None
+    elif ind.size == 1:
+        return np.array(ind[0])
     else:
         return ind
 
@@ -454,12 +831,15 @@ def same_player(turn_player, main_player):
     return same
 
 
-def random_game(board, main_player, turn_player):
+def random_game(board, main_player, turn_player, max_plies=None, weights=None, scale=1.0, moves=None, connect=4):
     """Performs a randomized game.
 
     A random game is performed from the board initial position until a final
     position is reached. Then, it is checked whether on that final position,
     the main player won or not (draw or loss).
+    If `max_plies` is given, the game is stopped after that many moves instead, and
+    the main player wins with the probability given by the heuristic evaluation
+    of the board reached.
 
     Parameters
     ----------
@@ -469,6 +849,16 @@ def random_game(board, main_player, turn_player):
         main player
     turn_player: BoardPiece
         player of the turn
+    max_plies: int or None
+        if given, number of moves after which the game is stopped and evaluated
+    weights: dict or None
+        weights of the heuristic evaluation (see heuristic.evaluate_board)
+    scale: float
+        scale of the logistic function turning the evaluation into a probability of winning
+    moves: list or None
+        if given, the (player, column) moves of the game are appended to it
+    connect: int
+        number of aligned pieces needed to win
 
     Returns
     -------
@@ -477,17 +867,22 @@ def random_game(board, main_player, turn_player):
     """
     state = GameState.STILL_PLAYING
     win = False
+    plies = 0
 
     while state == GameState.STILL_PLAYING:
+        if max_plies is not None and plies >= max_plies:
+            score = evaluate_board(board, main_player, weights, connect)
+            return bool(np.random.random() < win_probability(score, scale))
+
         move, _ = generate_move_random(board, turn_player, None)
         apply_player_action(board, move, turn_player)
+        plies += 1
+        if moves is not None:
+            moves.append((turn_player, move))
 
         # Checking whether the game has come to an end
-        if check_end_state(board, turn_player, move) == GameState.IS_WIN:
-            state = GameState.IS_WIN
-        elif check_end_state(board, turn_player, move) == GameState.IS_DRAW:
-            state = GameState.IS_DRAW
-        else:
+        state = check_end_state(board, turn_player, move, connect)
+        if state == GameState.STILL_PLAYING:
             turn_player = change_player(turn_player)  # Next turn, change of players.
 
     # There is only a win if the player that won in the last turn is the same as the main player.
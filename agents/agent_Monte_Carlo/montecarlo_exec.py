@@ -1,12 +1,16 @@
 import time
-from agents.common import BoardPiece, apply_player_action, PlayerAction
-from agents.agent_Monte_Carlo.montecarlo import TreeNode, change_player, back_prop
+import numpy as np
+from agents.common import BoardPiece, apply_player_action, PlayerAction, is_symmetric, DEFAULT_CONFIG
+from agents.agent_Monte_Carlo.montecarlo import TreeNode, SearchSettings, change_player, back_prop, add_virtual_loss
+from agents.agent_Monte_Carlo.playout import random_games
+from agents.agent_Monte_Carlo.tactics import forced_move
 
 
-def montecarlo(board, player, saved_state, last_action, train_time=5):
+def montecarlo(board, player, saved_state, last_action, train_time=5, iterations=None, settings=None):
     """ Performance of the MonteCarlo algorithm.
 
-    A MonteCarlo algorithm is performed for as long as the given training time.
+    A MonteCarlo algorithm is performed for as long as the given training time, unless
+    the move is forced (see tactics.forced_move), in which case it is played at once.
 
     Parameters
     ----------
@@ -18,8 +22,13 @@ def montecarlo(board, player, saved_state, last_action, train_time=5):
         previously chosen node
     last_action: BoardPiece or None
         action performed by the other player in previous turn
-    train_time: int
-        time devoted for the MonteCarlo algorithm
+    train_time: float
+        seconds devoted for the MonteCarlo algorithm, counted from the call. No iteration is started
+        if the last one shows that it would end after that
+    iterations: int or None
+        if given, number of iterations performed instead of searching for `train_time`
+    settings: SearchSettings or None
+        options of the search
 
     Returns
     -------
@@ -28,35 +37,309 @@ def montecarlo(board, player, saved_state, last_action, train_time=5):
     saved_state: TreeNode
         chosen node from which is action was extracted
     """
-    # If the agent starts the game, the column 3 is chosen (best choice)
+    telemetry = None if settings is None else settings.telemetry
+    t0 = time.perf_counter()
+
+    # If the agent starts the game, the central column is chosen (best choice)
     if last_action is None:
-        action, saved_state = blank_board(board, player)
+        action, saved_state = blank_board(board, player, settings)
+        if telemetry is not None:
+            telemetry.record_search(saved_state, **search_stats(saved_state, saved_state, 'opening', train_time, 0,
+                                                                time.perf_counter() - t0, 0))
 
     # If not, the root is established, taken into consideration which one was the move of the opponent
     else:
         root = establish_root(board, player, saved_state, last_action)
+        reused = 0
+        if telemetry is not None and root.child is not None:
+            from agents.agent_Monte_Carlo.memory import count_nodes  # Only needed by the telemetry
+            reused = count_nodes(root)
+        connect = DEFAULT_CONFIG.connect if settings is None else settings.config.connect
+        forced = forced_move(board, player, connect) if settings is None or settings.tactics else None
 
-        start = int(round(time.time()))
-        present = int(round(time.time()))
+        done = 0
+        if forced is not None:
+            action, saved_state = forced_child(root, forced, player, connect)
+            if telemetry is not None:
+                telemetry.record_search(saved_state, **search_stats(root, saved_state, 'forced', train_time, 0,
+                                                                    time.perf_counter() - t0, reused))
+            return action, saved_state
+        elif iterations is not None:
+            run_iterations(root, player, iterations, settings)
+            done = iterations
+        else:
+            # The deadline counts from the call, so that setting up the root is part of the budget
+            deadline = t0 + train_time
 
-        while (present - start) < train_time:  # Loop until the training time is over
-            node = root.select_node()  # SELECTION
-            node, win = node.expansion(player)  # EXPANSION
-            back_prop(node, win)  # BACKPROPAGATION
+            # In batched mode, one batch of leaves per step
+            step = settings.batch_size if settings is not None and settings.batch_size is not None else 1
+            # Loop until the training time is over, not starting a step that would likely end after it
+            now = time.perf_counter()
+            step_time = 0.
+            while done == 0 or now + step_time < deadline:
+                run_iterations(root, player, step, settings)
+                done += step
 
-            # Time update
-            present = int(round(time.time()))
+                # Time update, the next step being expected to last as long as the last one
+                present = time.perf_counter()
+                step_time, now = present - now, present
 
-        # The child with the best UCB value from the root is chosen, along with its action
-        best_child = root.find_best_child()
-        saved_state = best_child
-        action = best_child.move
+        action, saved_state = best_move(root, settings)
+
+        # What was learnt about the root and its children is kept for later games
+        if settings is not None and settings.stats_store is not None:
+            settings.stats_store.record(root, player)
+
+        if telemetry is not None:
+            telemetry.record_search(saved_state, **search_stats(root, saved_state, 'search',
+                                                                train_time if iterations is None else None,
+                                                                done, time.perf_counter() - t0, reused))
 
     return action, saved_state
 
 
-def blank_board(board, player: BoardPiece):
-    """ Initialization of the root of the tree and assignment of the column 3 as first action.
+def search_stats(root, chosen, kind, budget, iterations, seconds, reused):
+    """ Statistics of one search, as recorded by the telemetry.
+
+    Counting the nodes of the tree takes time, so it is only done when telemetry is on.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the searched tree
+    chosen: TreeNode
+        child of the chosen action (the root itself for the first move of the game)
+    kind: str
+        'opening' for the first move, 'forced' for forced moves and 'search' for searched ones
+    budget: float or None
+        seconds given to the search, None when it was given a number of iterations
+    iterations: int
+        iterations performed
+    seconds: float
+        time taken by the search
+    reused: int
+        number of nodes of the root when the search started, kept from the previous move
+
+    Returns
+    -------
+    stats: dict
+        budget, seconds, iterations, playouts per second, tree_nodes, reused_nodes and visit share of
+        the chosen move
+    """
+    from agents.agent_Monte_Carlo.memory import count_nodes
+
+    games = sum(children.total_games for children in root.child or []) if chosen is not root else 0
+
+    return {'kind': kind, 'budget': budget, 'search_seconds': seconds, 'iterations': iterations,
+            'playouts_per_second': iterations / seconds if seconds > 0 else 0.0,
+            'tree_nodes': count_nodes(root), 'reused_nodes': reused,
+            'visit_share': chosen.total_games / games if games > 0 else None}
+
+
+def warm_up(config=DEFAULT_CONFIG):
+    """ Builds the lookup tables of the search and runs its code once, outside of any time budget.
+
+    Meant to be called once by every worker process (e.g. as the initializer of a Pool), so that the
+    first move of the worker is not slower than the following ones.
+
+    Parameters
+    ----------
+    config: GameConfig
+        dimensions of the games that will be searched
+    """
+    from agents.common import initialize_game_state, cell_lines, cell_windows, winning_lines, PLAYER1
+
+    winning_lines(config.rows, config.cols, config.connect)
+    cell_lines(config.rows, config.cols, config.connect)
+    cell_windows(config.rows, config.cols, config.connect)
+    board = initialize_game_state(config)
+    apply_player_action(board, PlayerAction(config.center), PLAYER1)
+    settings = None if config == DEFAULT_CONFIG else SearchSettings(config=config)
+    montecarlo(board, change_player(PLAYER1), None, PlayerAction(config.center), iterations=2, settings=settings)
+    random_games(board[np.newaxis], PLAYER1, np.array([PLAYER1]), connect=config.connect)
+
+
+def run_iterations(root, player, iterations, settings=None):
+    """ Performs a number of iterations of the MonteCarlo algorithm on the tree.
+
+    The tree is left as it is afterwards, so that a search can be paused and resumed later
+    with further calls.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the tree being searched
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    iterations: int
+        number of select/expand/simulate/back-propagate iterations
+    settings: SearchSettings or None
+        options of the search
+    """
+    if settings is not None and settings.batch_size is not None:
+        while iterations > 0:
+            run_batch(root, player, min(iterations, settings.batch_size), settings)
+            iterations -= settings.batch_size
+        return
+
+    rave = settings is not None and settings.rave_equivalence is not None
+    for _ in range(iterations):
+        playout = [] if rave else None  # Moves of the simulation, for the AMAF statistics
+        node = root.select_node(player, settings)  # SELECTION
+        node, win = node.expansion(player, settings, playout)  # EXPANSION
+        back_prop(node, win, playout)  # BACKPROPAGATION
+
+
+def run_batch(root, player, size, settings):
+    """ Performs `size` iterations of the MonteCarlo algorithm, evaluating their leaves together.
+
+    The leaves are selected one after the other, each with a virtual loss along its path until it is
+    evaluated, so that the selections differ. Then all the randomized simulations are performed by
+    one call to the evaluator of the settings (playout.random_games by default), and their results
+    are back-propagated.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the tree being searched
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    size: int
+        number of leaves of the batch
+    settings: SearchSettings
+        options of the search
+    """
+    evaluate_leaves(select_leaves(root, player, size, settings), player, settings)
+
+
+def select_leaves(root, player, size, settings):
+    """ Selects and expands `size` leaves of a tree, with a virtual loss on the path of those to simulate.
+
+    Leaves whose result is known without simulation (winning, losing or drawn nodes) are back-propagated
+    at once.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the tree being searched
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    size: int
+        number of leaves
+    settings: SearchSettings
+        options of the search
+
+    Returns
+    -------
+    pending: list
+        leaves to simulate, to be given to evaluate_leaves
+    """
+    pending = []
+    for _ in range(size):
+        node = root.select_node(player, settings)  # SELECTION
+        node, win = node.expansion(player, settings, simulate=False)  # EXPANSION
+        if win is None:
+            add_virtual_loss(node)
+            pending.append(node)
+        else:  # Result known without simulation (winning, losing or drawn node)
+            back_prop(node, win, [] if settings.rave_equivalence is not None else None)
+
+    return pending
+
+
+def evaluate_leaves(pending, player, settings):
+    """ Simulates from leaves returned by select_leaves with one call to the evaluator, and back-propagates.
+
+    The first move of a simulation is played by the player of its leaf, as in TreeNode.expansion.
+
+    Parameters
+    ----------
+    pending: list
+        leaves to simulate, which may belong to different trees searched by the same player
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    settings: SearchSettings
+        options of the search
+    """
+    if not pending:
+        return
+
+    # SIMULATION of all the pending leaves at once
+    evaluator = random_games if settings.evaluator is None else settings.evaluator
+    playouts = [] if settings.rave_equivalence is not None else None
+    wins = evaluator(np.stack([node.board for node in pending]), player,
+                     np.array([node.turn_player for node in pending]), max_plies=settings.rollout_depth,
+                     weights=settings.evaluation_weights, scale=settings.evaluation_scale, moves=playouts,
+                     connect=settings.config.connect)
+
+    for i, node in enumerate(pending):
+        add_virtual_loss(node, -1)
+        back_prop(node, bool(wins[i]), None if playouts is None else playouts[i])  # BACKPROPAGATION
+
+
+def forced_child(root, action, player, connect=4):
+    """ Choice of a forced action without search.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the tree
+    action: PlayerAction
+        forced action
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    action: PlayerAction
+        the forced action
+    saved_state: TreeNode
+        child of the root for the action, created if the root had not been expanded
+    """
+    for children in root.child or []:
+        if children.move == action:
+            return action, children
+
+    board = root.board.copy()
+    apply_player_action(board, action, player)
+    root.new_child(TreeNode(board, action, root, player), player, connect)
+
+    return action, root.child[-1]
+
+
+def best_move(root, settings=None):
+    """ Choice of the action at the end of the search.
+
+    Parameters
+    ----------
+    root: TreeNode
+        root of the searched tree
+    settings: SearchSettings or None
+        options of the search
+
+    Returns
+    -------
+    action: PlayerAction
+        selected action for the game
+    saved_state: TreeNode
+        chosen node from which is action was extracted
+    """
+    # With priors, the UCB values of children created late are not comparable, so the most
+    # visited child is chosen
+    if settings is not None and settings.ordered:
+        best_child = root.child[int(np.argmax([children.total_games for children in root.child]))]
+
+    # The child with the best UCB value from the root is chosen, along with its action
+    else:
+        best_child = root.find_best_child()
+
+    return best_child.move, best_child
+
+
+def blank_board(board, player: BoardPiece, settings=None):
+    """ Initialization of the root of the tree and assignment of the central column as first action.
 
     Parameters
     ----------
@@ -64,21 +347,23 @@ def blank_board(board, player: BoardPiece):
         state of the board (matrix)
     player: BoardPiece
         player that performs the MonteCarlo algorithm
+    settings: SearchSettings or None
+        options of the search
 
     Returns
     -------
     action: PlayerAction
-        selected action for the game (column 3)
+        selected action for the game (column 3 of the 6x7 board)
     saved_state: TreeNode
         chosen node from which is action was extracted
     """
-    action = PlayerAction(3)
+    action = PlayerAction((board.shape[1] - 1) // 2)
     apply_player_action(board, action, player, copy=False, pos=False)
     root = TreeNode(board, action, None, player)
 
     # Creating its child nodes
     node = root.select_node()
-    node.expansion(player)
+    node.expansion(player, settings)
     saved_state = root
 
     return action, saved_state
@@ -114,4 +399,16 @@ def establish_root(board, player, saved_state, last_action):
             root = TreeNode(board, last_action, None, change_player(player))  # In case no children were found
             root.parent = None
 
+    # A reused root of a symmetric position only keeps the most visited of two mirrored children
+    if root.child is not None and len(root.child) > 1 and is_symmetric(root.board):
+        last = root.board.shape[1] - 1
+        kept = {}
+        for children in root.child:
+            move = min(int(children.move), last - int(children.move))
+            if move not in kept or children.total_games > kept[move].total_games:
+                kept[move] = children
+        root.child = list(kept.values())
+        if root.untried is not None:
+            root.untried = [(move, prior) for move, prior in root.untried if min(move, last - move) not in kept]
+
     return root
@@ -0,0 +1,330 @@
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from agents.common import BoardPiece, PlayerAction, GameState, NO_PLAYER, PLAYER1, PLAYER2, DEFAULT_CONFIG
+from agents.common import apply_player_action, check_end_state, initialize_game_state
+from agents.agent_Monte_Carlo.playout import random_winners
+
+# One node of the shared tree. Wins are counted for the player who moved into the node, so that
+# every player chooses the children that are best for itself.
+NODE = np.dtype([('visits', np.int64), ('wins', np.int64), ('virtual', np.int32), ('first_child', np.int32),
+                 ('n_children', np.int8), ('move', np.int8), ('player', np.int8), ('state', np.int8),
+                 ('terminal', np.int8)])
+# state: whether the children of the node have been created
+_LEAF, _EXPANDING, _EXPANDED = 0, 1, 2
+# terminal: whether the game is over after the move of the node
+_PLAYING, _WON, _DRAWN = 0, 1, 2
+
+
+class SharedTree:
+    """
+    MonteCarlo tree stored in a shared memory block, so that several processes can search it.
+
+    The nodes are rows of a NODE array, the children of a node being consecutive rows. Updates of
+    the statistics of a node are done under one of `stripes` locks, chosen by the index of the node,
+    and reads are done without locks.
+
+    Attributes
+    ----------
+    nodes: np.array
+        NODE array of the tree, the root being its first row
+    capacity: int
+        maximum number of nodes
+    """
+
+    def __init__(self, capacity, locks, counter, name=None):
+        self._memory = shared_memory.SharedMemory(name=name, create=name is None,
+                                                  size=capacity * NODE.itemsize)
+        self.nodes = np.ndarray((capacity,), dtype=NODE, buffer=self._memory.buf)
+        self.capacity = capacity
+        self.locks = locks
+        self.counter = counter  # multiprocessing.Value with the number of nodes used
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    def lock(self, index):
+        return self.locks[index % len(self.locks)]
+
+    def reset(self, player):
+        """Empties the tree, keeping only a root whose move was made by the opponent of `player`."""
+        with self.counter.get_lock():
+            self.counter.value = 1
+        self.nodes[0] = np.zeros((), dtype=NODE)
+        self.nodes[0]['player'] = PLAYER2 if player == PLAYER1 else PLAYER1
+        self.nodes[0]['move'] = -1
+
+    def allocate(self, count):
+        """Index of `count` new consecutive nodes, None if the tree is full."""
+        with self.counter.get_lock():
+            start = self.counter.value
+            if start + count > self.capacity:
+                return None
+            self.counter.value = start + count
+        return start
+
+    def close(self, unlink=False):
+        del self.nodes
+        self._memory.close()
+        if unlink:
+            self._memory.unlink()
+
+
+def _select_child(nodes, index, exploration):
+    """Child of a node with best UCB1 value, virtual losses counting as lost games."""
+    first, count = int(nodes[index]['first_child']), int(nodes[index]['n_children'])
+    children = nodes[first:first + count]
+    games = children['visits'] + children['virtual']
+
+    unvisited = np.flatnonzero(games == 0)
+    if len(unvisited) > 0:
+        return first + int(np.random.choice(unvisited))
+
+    parent_games = max(int(nodes[index]['visits'] + nodes[index]['virtual']), 1)
+    ucb = children['wins'] / games + exploration * np.sqrt(np.log(parent_games) / games)
+    return first + int(np.argmax(ucb))
+
+
+def _expand(tree, index, board, player, connect=4):
+    """Creates the children of a node, whose board is `board` and whose next move is made by `player`."""
+    nodes = tree.nodes
+    with tree.lock(index):
+        if nodes[index]['state'] != _LEAF:
+            return False
+        nodes[index]['state'] = _EXPANDING
+
+    moves = np.flatnonzero(board[0] == NO_PLAYER)
+    first = tree.allocate(len(moves))
+    if first is None:  # The tree is full, the node stays a leaf
+        nodes[index]['state'] = _LEAF
+        return False
+
+    for i, move in enumerate(moves):
+        child = board.copy()
+        apply_player_action(child, PlayerAction(move), player)
+        state = check_end_state(child, player, PlayerAction(move), connect)
+        nodes[first + i] = np.zeros((), dtype=NODE)
+        nodes[first + i]['move'] = move
+        nodes[first + i]['player'] = player
+        nodes[first + i]['terminal'] = {GameState.IS_WIN: _WON, GameState.IS_DRAW: _DRAWN}.get(state, _PLAYING)
+
+    nodes[index]['first_child'] = first
+    nodes[index]['n_children'] = len(moves)
+    nodes[index]['state'] = _EXPANDED
+    return True
+
+
+def search_iteration(tree, board, player, exploration=np.sqrt(2), connect=4):
+    """ Performs one select/expand/simulate/back-propagate iteration on the shared tree.
+
+    Parameters
+    ----------
+    tree: SharedTree
+        tree being searched
+    board: np.array
+        board of the root
+    player: BoardPiece
+        player to move at the root
+    exploration: float
+        exploration constant of UCB1
+    connect: int
+        number of aligned pieces needed to win
+    """
+    nodes = tree.nodes
+    board = board.copy()
+    path = [0]
+    index = 0
+    to_move = player
+
+    # SELECTION, with a virtual loss on every node of the path until the result is known
+    while nodes[index]['terminal'] == _PLAYING:
+        if nodes[index]['state'] != _EXPANDED:
+            # EXPANSION of the nodes that have been simulated from once, the others are simulated from
+            if (index != 0 and nodes[index]['visits'] == 0) or not _expand(tree, index, board, to_move, connect):
+                break
+        index = _select_child(nodes, index, exploration)
+        with tree.lock(index):
+            nodes[index]['virtual'] += 1
+        apply_player_action(board, PlayerAction(nodes[index]['move']), to_move)
+        to_move = PLAYER2 if to_move == PLAYER1 else PLAYER1
+        path.append(index)
+
+    # SIMULATION
+    terminal = nodes[index]['terminal']
+    if terminal == _WON:
+        winner = nodes[index]['player']
+    elif terminal == _DRAWN:
+        winner = NO_PLAYER
+    else:
+        winner = random_winners(board[np.newaxis], to_move, connect=connect)[0]
+
+    # BACKPROPAGATION
+    for i, node in enumerate(path):
+        with tree.lock(node):
+            nodes[node]['visits'] += 1
+            if i > 0:
+                nodes[node]['virtual'] -= 1
+            if winner == nodes[node]['player']:
+                nodes[node]['wins'] += 1
+
+
+def _worker(name, capacity, locks, counter, tasks, results, config):
+    """Process of a ParallelSearch, searching the shared tree for every task until its deadline."""
+    tree = SharedTree(capacity, locks, counter, name)
+    # The lookup tables of the simulations are built before the first deadline starts
+    random_winners(initialize_game_state(config)[np.newaxis], PLAYER1, connect=config.connect)
+    try:
+        for task in iter(tasks.get, None):
+            board, player, deadline, seed = task
+            np.random.seed(seed)
+            iterations = 0
+            while time.monotonic() < deadline:
+                search_iteration(tree, board, player, connect=config.connect)
+                iterations += 1
+            results.put(iterations)
+    finally:
+        tree.close()
+
+
+class ParallelSearch:
+    """
+    Tree-parallel MonteCarlo search: worker processes build one shared tree together.
+
+    The worker processes are started once and wait for searches, so a search only costs its
+    `train_time`. Virtual losses make workers descend different paths of the tree. The tree
+    is emptied before every search, and its root is expanded before the workers start, so that
+    a move is found even if they do not get to search.
+
+    Attributes
+    ----------
+    workers: int
+        number of worker processes
+    capacity: int
+        maximum number of nodes of the tree
+    config: GameConfig
+        dimensions of the game
+    timeout: float
+        seconds after the end of a search after which workers that did not answer are considered stuck
+    """
+
+    def __init__(self, workers=None, capacity=1 << 20, stripes=64, config=DEFAULT_CONFIG, timeout=10):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.capacity = capacity
+        self.config = config
+        self.timeout = timeout
+        locks = [multiprocessing.Lock() for _ in range(stripes)]
+        self.tree = SharedTree(capacity, locks, multiprocessing.Value('q', 1))
+        self._tasks = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._processes = [multiprocessing.Process(target=_worker, daemon=True,
+                                                   args=(self.tree.name, capacity, locks, self.tree.counter,
+                                                         self._tasks, self._results, config))
+                           for _ in range(self.workers)]
+        for process in self._processes:
+            process.start()
+        self._searches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search(self, board, player, train_time=5):
+        """ Searches a position with all the workers.
+
+        Parameters
+        ----------
+        board: np.array
+            state of the board (matrix)
+        player: BoardPiece
+            player to move
+        train_time: float
+            seconds of search
+
+        Returns
+        -------
+        action: PlayerAction
+            most visited move of the root
+        stats: dict
+            iterations, nodes of the tree, seconds and iterations per second of the search
+
+        Raises
+        ------
+        ValueError
+            if the board has no free column
+        RuntimeError
+            if a worker died or did not answer within `timeout` seconds after the end of the search
+        """
+        self.tree.reset(player)
+        t0 = time.monotonic()
+        _expand(self.tree, 0, board, player, self.config.connect)
+        root = self.tree.nodes[0]
+        first, count = int(root['first_child']), int(root['n_children'])
+        if count == 0:
+            raise ValueError('no free column to play')
+
+        for i in range(self.workers):
+            self._tasks.put((board, player, t0 + train_time, self._searches * self.workers + i))
+        self._searches += 1
+        iterations = 0
+        for _ in range(self.workers):
+            iterations += self._result(t0 + train_time + self.timeout)
+        seconds = time.monotonic() - t0
+
+        children = self.tree.nodes[first:first + count]
+        action = PlayerAction(children['move'][int(np.argmax(children['visits']))])
+
+        return action, {'iterations': iterations, 'nodes': int(self.tree.counter.value), 'seconds': seconds,
+                        'iterations_per_second': iterations / seconds if seconds > 0 else 0.0}
+
+    def _result(self, deadline):
+        """Iterations of the next worker to finish its search, waiting at most until `deadline`."""
+        while True:
+            try:
+                return self._results.get(timeout=0.1)
+            except queue.Empty:
+                if not all(process.is_alive() for process in self._processes):
+                    raise RuntimeError('a worker of the parallel search died')
+                if time.monotonic() > deadline:
+                    raise RuntimeError('a worker of the parallel search did not answer')
+
+    def close(self):
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(self.timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.tree.close(unlink=True)
+
+
+def generate_move_parallel(board: np.ndarray, player: BoardPiece, saved_state, search: ParallelSearch,
+                           train_time=5):
+    """ Agent using a ParallelSearch, the saved_state being unused as the tree is emptied every move.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player to move
+    saved_state: None
+        not needed, kept for the common agent signature
+    search: ParallelSearch
+        started search processes
+    train_time: float
+        seconds of search
+
+    Returns
+    -------
+    action: PlayerAction
+        selected action
+    saved_state: None
+    """
+    action, _ = search.search(board, player, train_time)
+    return action, saved_state
@@ -0,0 +1,130 @@
+import numpy as np
+from agents.common import BoardPiece, NO_PLAYER, PLAYER1, PLAYER2, winning_lines, cell_lines
+from agents.agent_Monte_Carlo.heuristic import evaluate_boards, win_probability
+
+
+def _won(flat, cells, players, rows, cols, connect):
+    """Whether the piece just played in `cells` completes a line, for every board of `flat`."""
+    lines = winning_lines(rows, cols, connect)
+    through = cell_lines(rows, cols, connect)[cells]  # (k, max_lines)
+    valid = through >= 0
+    line_cells = lines[np.where(valid, through, 0)]  # (k, max_lines, connect)
+    pieces = np.take_along_axis(flat, line_cells.reshape(len(flat), -1), axis=1).reshape(line_cells.shape)
+    complete = np.all(pieces == players[:, np.newaxis, np.newaxis], axis=2) & valid
+
+    return complete.any(axis=1)
+
+
+def _simulate(boards, turn_players, max_plies=None, moves=None, connect=4):
+    """Plays random games until they end or `max_plies` moves, returning the winners and the final boards."""
+    boards = np.array(boards, dtype=BoardPiece)
+    n, rows, cols = boards.shape
+    flat = boards.reshape(n, rows * cols)
+    players = np.broadcast_to(np.asarray(turn_players, dtype=BoardPiece), (n,)).copy()
+    empty = np.sum(boards == 0, axis=1)  # Free cells of every column, shape (N, columns)
+    active = np.ones(n, dtype=bool)
+    winners = np.full(n, NO_PLAYER, dtype=BoardPiece)
+    history = None if moves is None else [[] for _ in range(n)]
+
+    plies = 0
+    while active.any() and (max_plies is None or plies < max_plies):
+        games = np.flatnonzero(active)
+
+        # Full boards are draws
+        free = empty[games] > 0
+        playing = free.any(axis=1)
+        active[games[~playing]] = False
+        games, free = games[playing], free[playing]
+        if len(games) == 0:
+            break
+
+        # Uniformly random non-full column
+        keys = np.random.random(free.shape)
+        keys[~free] = -1
+        columns = np.argmax(keys, axis=1)
+        cells = (empty[games, columns] - 1) * cols + columns
+        flat[games, cells] = players[games]
+        empty[games, columns] -= 1
+        if history is not None:
+            for game, column in zip(games, columns):
+                history[game].append((players[game], int(column)))
+
+        won = _won(flat[games], cells, players[games], rows, cols, connect)
+        winners[games[won]] = players[games[won]]
+        active[games[won]] = False
+
+        players[games] = np.where(players[games] == PLAYER1, PLAYER2, PLAYER1)
+        plies += 1
+
+    # Boards filled by the last ply are draws, not games left to evaluate
+    games = np.flatnonzero(active)
+    active[games[flat[games].all(axis=1)]] = False
+
+    if moves is not None:
+        moves.extend(history)
+
+    return winners, boards, active
+
+
+def random_winners(boards, turn_players, moves=None, connect=4):
+    """ Performs many randomized games at once until they end.
+
+    Parameters
+    ----------
+    boards: np.array
+        initial boards of shape (N, rows, columns), left unchanged
+    turn_players: np.array or BoardPiece
+        player making the first move of every game
+    moves: list or None
+        if given, one list per game is appended to it, with the (player, column) moves of the game
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    winners: np.array
+        winner of every game, NO_PLAYER for draws, shape (N,)
+    """
+    return _simulate(boards, turn_players, moves=moves, connect=connect)[0]
+
+
+def random_games(boards, main_player, turn_players, max_plies=None, weights=None, scale=1.0, moves=None,
+                 connect=4):
+    """ Performs many randomized games at once, with the same rules as montecarlo.random_game.
+
+    Every game moves a uniformly random non-full column per step, all games advancing together,
+    and only the lines through the new piece are checked for a win.
+
+    Parameters
+    ----------
+    boards: np.array
+        initial boards of shape (N, rows, columns), left unchanged
+    main_player: BoardPiece
+        main player
+    turn_players: np.array or BoardPiece
+        player making the first move of every game
+    max_plies: int or None
+        if given, number of moves after which the games still playing are stopped and evaluated
+    weights: dict or None
+        weights of the heuristic evaluation (see heuristic.evaluate_board)
+    scale: float
+        scale of the logistic function turning the evaluation into a probability of winning
+    moves: list or None
+        if given, one list per game is appended to it, with the (player, column) moves of the game
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    wins: np.array
+        whether the main player won each game, shape (N,)
+    """
+    winners, boards, unfinished = _simulate(boards, turn_players, max_plies, moves, connect)
+    wins = winners == main_player
+
+    games = np.flatnonzero(unfinished)
+    if len(games) > 0:
+        scores = evaluate_boards(boards[games], np.full(len(games), main_player), weights, connect)
+        wins[games] = np.random.random(len(games)) < win_probability(scores, scale)
+
+    return wins
@@ -0,0 +1,122 @@
+import numpy as np
+from agents.common import BoardPiece, encode_board, canonical_key
+
+
+def center_priors(board: np.ndarray, player: BoardPiece) -> np.ndarray:
+    """ Priors preferring the central columns, which belong to the most lines of four.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player to move
+
+    Returns
+    -------
+    priors: np.array
+        prior of every column, decreasing linearly with the distance to the centre
+    """
+    cols = board.shape[1]
+    weights = cols / 2 - np.abs(np.arange(cols) - (cols - 1) / 2)
+    return weights / weights.sum()
+
+
+class PriorTable:
+    """
+    Priors learnt from self-play data: the average share of the search visits of every column.
+
+    Positions missing from the table fall back to `default`, and so do boards too large for the
+    keys of encode_board.
+
+    Attributes
+    ----------
+    table: dict
+        visit shares of every column by canonical position key (see canonical_key), the shares of a
+        mirrored position being read in reverse order
+    default: callable
+        priors of unknown positions, called with the board and the player to move
+    """
+
+    def __init__(self, table=None, default=center_priors):
+        self.table = {} if table is None else table
+        self.default = default
+
+    def __len__(self):
+        return len(self.table)
+
+    def __call__(self, board, player):
+        try:
+            key = int(canonical_key(board))
+        except ValueError:  # (rows + 1) * columns > 64
+            return self.default(board, player)
+        priors = self.table.get(key)
+        if priors is None:
+            return self.default(board, player)
+        return priors if key == int(encode_board(board)) else priors[::-1]
+
+    @classmethod
+    def from_shards(cls, directory, min_count=1, default=center_priors):
+        """ Builds the table from the shards written by tools.selfplay.
+
+        Parameters
+        ----------
+        directory: str
+            directory of the shards
+        min_count: int
+            minimum number of times a position must have been searched to be kept
+        default: callable
+            priors of unknown positions
+
+        Returns
+        -------
+        table: PriorTable
+        """
+        from tools.selfplay import load_shards
+
+        sums = {}
+        counts = {}
+        for shard in load_shards(directory):
+            boards = np.asarray(shard['boards'])
+            keys = canonical_key(boards)
+            mirrored = keys != encode_board(boards)
+            for key, visits, flip in zip(keys.tolist(), shard['visits'], mirrored):
+                visits = visits[::-1] if flip else visits
+                if key in sums:
+                    sums[key] += visits
+                    counts[key] += 1
+                else:
+                    sums[key] = np.array(visits, dtype=np.float64)
+                    counts[key] = 1
+
+        return cls({key: sums[key] / counts[key] for key in sums if counts[key] >= min_count}, default)
+
+
+def move_priors(board: np.ndarray, player: BoardPiece, priors, moves) -> list:
+    """ Orders the legal moves of a position by prior, the highest first.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player to move
+    priors: callable or array
+        prior of every column, or function of the board and the player returning them
+    moves: np.array
+        legal columns
+
+    Returns
+    -------
+    ordered: list
+        (move, prior) pairs, with the priors of the legal moves normalized to sum to 1
+    """
+    values = priors(board, player) if callable(priors) else priors
+    moves = np.atleast_1d(moves)
+    values = np.asarray(values, dtype=np.float64)[moves]
+    total = values.sum()
+    values = values / total if total > 0 else np.full(len(moves), 1 / len(moves))
+
+    # Stable sort, so that equal priors keep the order of the columns
+    order = np.argsort(-values, kind='stable')
+    return [(int(moves[i]), float(values[i])) for i in order]
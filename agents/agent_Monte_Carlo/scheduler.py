@@ -0,0 +1,234 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from agents.agent_Monte_Carlo.montecarlo_exec import blank_board, establish_root, run_iterations, best_move
+from agents.agent_Monte_Carlo.montecarlo_exec import forced_child, search_stats
+from agents.agent_Monte_Carlo.tactics import forced_move
+
+
+class SearchTask:
+    """
+    One MonteCarlo search handled by the SearchScheduler.
+
+    Attributes
+    ----------
+    root: TreeNode
+        root of the tree being searched, kept between slices
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    deadline: float
+        time.monotonic() value by which the move must be chosen
+    max_iterations: int or None
+        if given, the search ends as soon as this number of iterations has been performed
+    iterations: int
+        iterations performed so far
+    slice_seconds: float
+        time taken by the last slice of the search
+    order: int
+        submission order, breaking ties between searches
+    started: float
+        time.monotonic() value at which the search was submitted
+    budget: float or None
+        seconds given to the search
+    reused: int
+        number of nodes of the root kept from the previous move, counted for the telemetry only
+    future: Future
+        resolves to (action, saved_state), as returned by montecarlo
+    """
+
+    def __init__(self, root, player, deadline, max_iterations=None, order=0):
+        self.root = root
+        self.player = player
+        self.deadline = deadline
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self.slice_seconds = 0.0
+        self.order = order
+        self.started = time.monotonic()
+        self.budget = None
+        self.reused = 0
+        self.future = Future()
+
+    def done(self, now, turn):
+        """Whether the search has to end: its iteration budget has been reached, or its deadline would pass
+        before it has run another slice, `turn` being the time taken by one slice of every search.
+
+        A search always performs one slice before ending, so that the root has children to choose from.
+        """
+        if self.iterations == 0:
+            return False
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return True
+        return now + turn >= self.deadline
+
+
+class SearchScheduler:
+    """
+    Cooperative scheduler interleaving many MonteCarlo searches in one thread.
+
+    Searches are cut into slices of `slice_iterations` iterations, run in turn: the search that
+    has performed the fewest iterations so far runs next (the one with the closest deadline among
+    equals), so that the searches share the iterations evenly, whatever pauses delay some of their
+    slices, and a search submitted later does not wait behind whole searches submitted before it. A search ends as soon as its deadline would pass before its next
+    turn, a turn lasting as long as the last slice of every search. Between slices the tree of every
+    search stays in its SearchTask, ready to be resumed.
+
+    Attributes
+    ----------
+    slice_iterations: int
+        iterations of a search performed before the scheduler chooses again
+    margin: float
+        seconds before its deadline at which a search is ended, to leave time for an answer
+    settings: SearchSettings or None
+        options of all the searches
+    """
+
+    def __init__(self, slice_iterations=20, margin=0.0, settings=None):
+        self.slice_iterations = slice_iterations
+        self.margin = margin
+        self.settings = settings
+        self._tasks = []
+        self._count = itertools.count()  # Breaks ties between equal deadlines in submission order
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def submit(self, board, player, saved_state, last_action, train_time=5, max_iterations=None):
+        """ Adds a search, with the same arguments as montecarlo.
+
+        It can be called from any thread while another one runs the scheduler.
+
+        Parameters
+        ----------
+        board: np.array
+            state of the board (matrix)
+        player: BoardPiece
+            player that performs the MonteCarlo algorithm
+        saved_state: TreeNode or None
+            previously chosen node
+        last_action: PlayerAction or None
+            action performed by the other player in previous turn
+        train_time: float
+            seconds from now until the deadline of the move
+        max_iterations: int or None
+            if given, the search ends earlier once it has performed this number of iterations
+
+        Returns
+        -------
+        future: Future
+            resolves to (action, saved_state)
+        """
+        telemetry = None if self.settings is None else self.settings.telemetry
+        started = time.monotonic()
+
+        # If the agent starts the game there is nothing to search
+        if last_action is None:
+            future = Future()
+            action, saved_state = blank_board(board, player, self.settings)
+            if telemetry is not None:
+                telemetry.record_search(saved_state, **search_stats(saved_state, saved_state, 'opening', train_time,
+                                                                    0, time.monotonic() - started, 0))
+            future.set_result((action, saved_state))
+            return future
+
+        root = establish_root(board, player, saved_state, last_action)
+        reused = 0
+        if telemetry is not None and root.child is not None:
+            from agents.agent_Monte_Carlo.memory import count_nodes  # Only needed by the telemetry
+            reused = count_nodes(root)
+
+        # Forced moves are answered at once
+        if self.settings is None or self.settings.tactics:
+            connect = 4 if self.settings is None else self.settings.config.connect
+            forced = forced_move(board, player, connect)
+            if forced is not None:
+                future = Future()
+                action, saved_state = forced_child(root, forced, player, connect)
+                if telemetry is not None:
+                    telemetry.record_search(saved_state, **search_stats(root, saved_state, 'forced', train_time, 0,
+                                                                        time.monotonic() - started, reused))
+                future.set_result((action, saved_state))
+                return future
+
+        task = SearchTask(root, player, time.monotonic() + train_time - self.margin, max_iterations, next(self._count))
+        task.started, task.budget, task.reused = started, train_time, reused
+
+        with self._condition:
+            self._tasks.append(task)
+            self._condition.notify()
+
+        return task.future
+
+    def run_slice(self):
+        """ Ends the searches that cannot run another slice in time, then runs one slice of the search
+        that has performed the fewest iterations.
+
+        Returns
+        -------
+        ran: bool
+            False if there was no search to run
+        """
+        with self._condition:
+            if not self._tasks:
+                return False
+            now = time.monotonic()
+            turn = sum(task.slice_seconds for task in self._tasks)
+            ending = [task for task in self._tasks if task.done(now, turn)]
+            self._tasks = [task for task in self._tasks if task not in ending]
+            task = min(self._tasks, key=lambda t: (t.iterations, t.deadline, t.order)) if self._tasks else None
+            if task is not None:
+                self._tasks.remove(task)
+
+        for ended in ending:
+            self._finish(ended)
+        if task is None:
+            return True
+
+        t0 = time.monotonic()
+        try:
+            run_iterations(task.root, task.player, self.slice_iterations, self.settings)
+        except Exception as error:
+            task.future.set_exception(error)
+            return True
+        task.slice_seconds = time.monotonic() - t0
+        task.iterations += self.slice_iterations
+
+        with self._condition:
+            self._tasks.append(task)
+
+        return True
+
+    def _finish(self, task):
+        """Chooses the move of an ended search and resolves its future."""
+        if self.settings is not None and self.settings.stats_store is not None:
+            self.settings.stats_store.record(task.root, task.player)
+        action, saved_state = best_move(task.root, self.settings)
+        if self.settings is not None and self.settings.telemetry is not None:
+            self.settings.telemetry.record_search(
+                saved_state, **search_stats(task.root, saved_state, 'search', task.budget, task.iterations,
+                                            time.monotonic() - task.started, task.reused))
+        task.future.set_result((action, saved_state))
+
+    def run_until_complete(self):
+        """Runs slices until every submitted search has ended."""
+        while self.run_slice():
+            pass
+
+    def run_forever(self):
+        """Runs slices as searches are submitted, until stop() is called."""
+        while True:
+            with self._condition:
+                while not self._tasks and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+            self.run_slice()
+
+    def stop(self):
+        """Makes run_forever return after its current slice."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
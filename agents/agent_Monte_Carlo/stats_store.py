@@ -0,0 +1,173 @@
+import os
+import numpy as np
+from agents.common import canonical_key, PLAYER2
+
+# One slot of the table. The key is the position key of canonical_key, shared by mirrored positions,
+# with two flag bits: the top one marks the slot as used and the next one the player whose wins are counted.
+# Position keys must therefore fit in the 62 other bits, (rows + 1) * columns <= 62.
+ENTRY = np.dtype([('key', np.uint64), ('visits', np.uint32), ('wins', np.uint32)])
+_USED = np.uint64(1 << 63)
+_PLAYER2 = np.uint64(1 << 62)
+_KEY_BITS = 62
+_HASH = 0x9E3779B97F4A7C15  # Fibonacci hashing multiplier
+_MASK = (1 << 64) - 1
+
+
+class StatsStore:
+    """
+    On-disk hash table of the games simulated through positions, shared by all searches.
+
+    The table is memory-mapped from a .npy file, so it survives the end of a game and of the
+    process, and several searches of one process can use it at once. Boards whose keys need more
+    than 62 bits ((rows + 1) * columns > 62, see encode_board) are refused. Open addressing is used
+    with at most `probes` slots looked at for a key. When all of them are used by other
+    positions, the one with the fewest visits is evicted, so the size of the file never grows.
+
+    Attributes
+    ----------
+    table: np.memmap
+        slots of the table
+    capacity: int
+        number of slots
+    probes: int
+        number of slots in which a key can be stored
+    """
+
+    def __init__(self, path, capacity=1 << 20, probes=8):
+        if os.path.exists(path):
+            self.table = np.lib.format.open_memmap(path, mode='r+')
+            if self.table.dtype != ENTRY:
+                raise ValueError(f'{path} is not a statistics store')
+        else:
+            self.table = np.lib.format.open_memmap(path, mode='w+', dtype=ENTRY, shape=(capacity,))
+        self.capacity = len(self.table)
+        self.probes = min(probes, self.capacity)
+
+    def __len__(self):
+        """Number of positions stored."""
+        return int(np.count_nonzero(self.table['key'] & _USED))
+
+    def _key(self, board, main_player):
+        rows, cols = board.shape
+        if (rows + 1) * cols > _KEY_BITS:
+            raise ValueError(f'Boards of {rows}x{cols} do not fit in the keys of a statistics store')
+        key = np.uint64(canonical_key(board)) | _USED
+        if main_player == PLAYER2:
+            key |= _PLAYER2
+        return key
+
+    def _slots(self, key):
+        start = ((int(key) * _HASH) & _MASK) % self.capacity
+        return [(start + i) % self.capacity for i in range(self.probes)]
+
+    def lookup(self, board, main_player):
+        """ Statistics of a position.
+
+        Parameters
+        ----------
+        board: np.array
+            state of the board (matrix)
+        main_player: BoardPiece
+            player whose wins are counted
+
+        Returns
+        -------
+        stats: tuple or None
+            games simulated through the position and wins of main_player among them, None if unknown
+        """
+        key = self._key(board, main_player)
+        for slot in self._slots(key):
+            entry = self.table[slot]
+            if entry['key'] == key:
+                return int(entry['visits']), int(entry['wins'])
+        return None
+
+    def add(self, board, main_player, visits, wins):
+        """ Adds games simulated through a position to its statistics.
+
+        Parameters
+        ----------
+        board: np.array
+            state of the board (matrix)
+        main_player: BoardPiece
+            player whose wins are counted
+        visits: int
+            number of new games
+        wins: int
+            number of them won by main_player
+        """
+        if visits <= 0:
+            return
+
+        key = self._key(board, main_player)
+        slots = self._slots(key)
+        keys = self.table['key'][slots]
+
+        found = np.flatnonzero(keys == key)
+        if len(found) > 0:
+            slot = slots[found[0]]
+        else:
+            empty = np.flatnonzero((keys & _USED) == 0)
+            if len(empty) > 0:
+                slot = slots[empty[0]]
+            else:  # Eviction of the least visited position
+                slot = slots[int(np.argmin(self.table['visits'][slots]))]
+            self.table[slot] = (key, 0, 0)
+
+        # Counts are halved rather than overflowing
+        table = self.table
+        while int(table['visits'][slot]) + visits >= 1 << 32:
+            table['visits'][slot] //= 2
+            table['wins'][slot] //= 2
+        table['visits'][slot] += visits
+        table['wins'][slot] += min(max(wins, 0), visits)
+
+    def seed(self, nodes, main_player, limit):
+        """ Seeds new nodes with the statistics of their positions.
+
+        At most `limit` games are seeded, keeping the win rate, so that old knowledge guides the
+        search without preventing it from changing its mind.
+
+        Parameters
+        ----------
+        nodes: list
+            new TreeNodes, with no games yet
+        main_player: BoardPiece
+            player using the tree
+        limit: int
+            maximum number of seeded games per node
+        """
+        for node in nodes:
+            stats = self.lookup(node.board, main_player)
+            if stats is not None:
+                visits, wins = stats
+                node.prior_games = min(visits, limit)
+                node.prior_wins = int(round(wins * node.prior_games / visits))
+                node.total_games += node.prior_games
+                node.wins += node.prior_wins
+
+    def record(self, root, main_player):
+        """ Adds the games simulated by a search through its root and the root's children.
+
+        The games seeded into the nodes are not counted again.
+
+        Parameters
+        ----------
+        root: TreeNode
+            root of the search
+        main_player: BoardPiece
+            player using the tree
+        """
+        for node in [root] + (root.child or []):
+            self.add(node.board, main_player, node.total_games - node.prior_games, node.wins - node.prior_wins)
+            # The recorded games are now known by the store
+            node.prior_games = node.total_games
+            node.prior_wins = node.wins
+
+    def flush(self):
+        """Writes the changes to the file."""
+        self.table.flush()
+
+    def close(self):
+        self.flush()
+        del self.table
@@ -0,0 +1,60 @@
+import numpy as np
+from agents.common import BoardPiece, PlayerAction
+from agents.agent_solver.solver import Position
+
+
+def _center_first(cols):
+    center = (cols - 1) / 2
+    return sorted(range(cols), key=lambda col: abs(col - center))
+
+
+def _winning_moves(position):
+    return [col for col in range(position.cols) if position.can_play(col) and position.is_winning_move(col)]
+
+
+def forced_move(board: np.ndarray, player: BoardPiece, connect: int = 4):
+    """ Move that needs no search: a win in one, the block of a single threat or a win in two.
+
+    A win in two is a move after which the opponent cannot win at once and every reply of the
+    opponent leaves a winning move. Positions are checked with the bitboards of the solver.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player to move
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    action: PlayerAction or None
+        forced move, None if the position has to be searched
+    """
+    position = Position.from_board(board, player, connect)
+
+    wins = _winning_moves(position)
+    if wins:
+        return PlayerAction(wins[0])
+
+    # Moves with which the opponent would win if it were its turn
+    opponent = Position(position.rows, position.cols, position.current ^ position.mask, position.mask,
+                        position.moves, connect)
+    threats = _winning_moves(opponent)
+    if len(threats) == 1:
+        return PlayerAction(threats[0])
+    elif len(threats) > 1:  # Lost against best play, the search chooses how to go on
+        return None
+
+    for col in _center_first(position.cols):
+        if not position.can_play(col):
+            continue
+        after = position.play(col)
+        replies = [reply for reply in range(after.cols) if after.can_play(reply)]
+        if not replies or _winning_moves(after):
+            continue
+        if all(_winning_moves(after.play(reply)) for reply in replies):
+            return PlayerAction(col)
+
+    return None
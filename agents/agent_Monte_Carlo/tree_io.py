@@ -0,0 +1,284 @@
+import struct
+import numpy as np
+from agents.common import BoardPiece, PlayerAction, apply_player_action
+from agents.agent_Monte_Carlo.montecarlo import TreeNode, change_player
+
+# Layout of a saved tree (little endian):
+#   header: magic, version, rows, columns, turn player and move of the root, number of nodes,
+#   number of untried moves
+#   board of the root (rows * columns int8), padded to a multiple of 8 bytes
+#   columns of the nodes in breadth-first order: total_games (uint32), wins (uint32),
+#   prior_games (uint32), prior_wins (uint32), amaf_games (uint32), amaf_wins (uint32),
+#   prior (float32, NaN if None), number of children (uint8), move (int8), flags (uint8),
+#   number of untried moves (int8, -1 if None)
+#   untried moves of all the nodes (int8) followed by their priors (float32)
+# Children of a node are stored next to each other, so no parent or child pointers are needed,
+# and so are the untried moves of a node.
+_MAGIC = b'C4MC'
+_VERSION = 3
+_HEADER = struct.Struct('<4sHHHbbII')
+
+WINNER_FLAG = 1
+LOSER_FLAG = 2
+TERMINAL_FLAG = 4
+
+_COLUMNS = (('total_games', np.uint32), ('wins', np.uint32), ('prior_games', np.uint32),
+            ('prior_wins', np.uint32), ('amaf_games', np.uint32), ('amaf_wins', np.uint32),
+            ('prior', np.float32), ('n_children', np.uint8), ('move', np.int8), ('flags', np.uint8),
+            ('n_untried', np.int8))
+_UNTRIED = (('untried_move', np.int8), ('untried_prior', np.float32))
+
+NODE_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in _COLUMNS)  # Bytes of one node in the columns
+
+
+def _flatten(root, max_depth, min_visits):
+    """Lists the nodes to be saved in breadth-first order, without recursion."""
+    nodes = [root]
+    depths = [0]
+    n_children = []
+    untried = []
+
+    i = 0
+    while i < len(nodes):
+        node = nodes[i]
+        children = node.child
+        # Children are kept or dropped all together, so that a saved node is either
+        # fully expanded or not expanded at all (and will be expanded again when searched).
+        keep = children is not None and (max_depth is None or depths[i] < max_depth) \
+            and node.total_games >= min_visits
+        if keep:
+            nodes.extend(children)
+            depths.extend([depths[i] + 1] * len(children))
+        n_children.append(len(children) if keep else 0)
+        # The untried moves of a node whose children are dropped are listed again when it is widened
+        untried.append(node.untried if keep or children is None else None)
+        i += 1
+
+    return nodes, n_children, untried
+
+
+def dumps_tree(root, max_depth=None, min_visits=0) -> bytes:
+    """ Serializes the tree below `root` into the compact columnar format.
+
+    Only the board of the root is stored, the boards of the other nodes are rebuilt
+    from the moves when the tree is loaded.
+
+    Parameters
+    ----------
+    root: TreeNode
+        node from which the tree is saved (its parent is not saved)
+    max_depth: int or None
+        if given, nodes deeper than this below the root are dropped
+    min_visits: int
+        children of nodes with fewer simulated games than this are dropped
+
+    Returns
+    -------
+    data: bytes
+        serialized tree
+    """
+    nodes, n_children, untried = _flatten(root, max_depth, min_visits)
+    rows, cols = root.board.shape
+    move = -1 if root.move is None else int(root.move)
+    pairs = [pair for moves in untried if moves is not None for pair in moves]
+
+    header = _HEADER.pack(_MAGIC, _VERSION, rows, cols, int(root.turn_player), move, len(nodes), len(pairs))
+    board = np.ascontiguousarray(root.board, dtype=BoardPiece).tobytes()
+    padding = b'\0' * (-(len(header) + len(board)) % 8)
+
+    flags = np.array([WINNER_FLAG * node.winner + LOSER_FLAG * node.loser + TERMINAL_FLAG * node.terminal
+                      for node in nodes], dtype=np.uint8)
+    columns = {
+        'total_games': np.array([node.total_games for node in nodes], dtype=np.uint32),
+        'wins': np.array([node.wins for node in nodes], dtype=np.uint32),
+        'prior_games': np.array([node.prior_games for node in nodes], dtype=np.uint32),
+        'prior_wins': np.array([node.prior_wins for node in nodes], dtype=np.uint32),
+        'amaf_games': np.array([node.amaf_games for node in nodes], dtype=np.uint32),
+        'amaf_wins': np.array([node.amaf_wins for node in nodes], dtype=np.uint32),
+        'prior': np.array([np.nan if node.prior is None else node.prior for node in nodes], dtype=np.float32),
+        'n_children': np.array(n_children, dtype=np.uint8),
+        'move': np.array([-1 if node.move is None else node.move for node in nodes], dtype=np.int8),
+        'flags': flags,
+        'n_untried': np.array([-1 if moves is None else len(moves) for moves in untried], dtype=np.int8),
+        'untried_move': np.array([move for move, _ in pairs], dtype=np.int8),
+        'untried_prior': np.array([prior for _, prior in pairs], dtype=np.float32),
+    }
+
+    return b''.join([header, board, padding] + [columns[name].astype(dtype).tobytes()
+                                                for name, dtype in _COLUMNS + _UNTRIED])
+
+
+def save_tree(root, path, max_depth=None, min_visits=0):
+    """ Saves the tree below `root` into the file `path` (see dumps_tree). """
+    with open(path, 'wb') as file:
+        file.write(dumps_tree(root, max_depth, min_visits))
+
+
+class TreeArrays:
+    """
+    Columns of a saved tree, read from bytes or memory-mapped from a file.
+
+    Attributes
+    ----------
+    board: np.array
+        board of the root
+    turn_player: BoardPiece
+        player who played the move of the root
+    first_child: np.array
+        index of the first child of each node
+    first_untried: np.array
+        index of the first untried move of each node
+    total_games, wins, prior_games, prior_wins, amaf_games, amaf_wins, prior, n_children, move, flags,
+    n_untried: np.array
+        columns of the nodes, in breadth-first order
+    untried_move, untried_prior: np.array
+        untried moves of all the nodes and their priors
+    """
+
+    def __init__(self, buffer, mmap_path=None):
+        magic, version, rows, cols, turn_player, move, n_nodes, n_untried = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError('Not a saved MonteCarlo tree')
+        if version != _VERSION:
+            raise ValueError(f'Saved MonteCarlo tree of version {version}, expected {_VERSION}')
+
+        offset = _HEADER.size
+        self.board = np.frombuffer(buffer, dtype=BoardPiece, count=rows * cols, offset=offset).reshape(rows, cols)
+        self.turn_player = BoardPiece(turn_player)
+        self.root_move = None if move == -1 else PlayerAction(move)
+        self.n_nodes = n_nodes
+        offset += rows * cols
+        offset += -offset % 8
+
+        counts = [(column, n_nodes) for column in _COLUMNS] + [(column, n_untried) for column in _UNTRIED]
+        for (name, dtype), count in counts:
+            if count == 0:
+                column = np.zeros(0, dtype=dtype)
+            elif mmap_path is None:
+                column = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            else:
+                column = np.memmap(mmap_path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+            setattr(self, name, column)
+            offset += count * np.dtype(dtype).itemsize
+
+        # Children of node i start right after the children of all nodes before it
+        self.first_child = np.concatenate(([1], 1 + np.cumsum(self.n_children, dtype=np.int64)))[:-1]
+        # And so do its untried moves
+        self.first_untried = np.concatenate(([0], np.cumsum(np.maximum(self.n_untried, 0), dtype=np.int64)))[:-1]
+
+    def subtree_nodes(self, index):
+        """Number of saved nodes in the subtree of node `index`, including it."""
+        nodes = 0
+        first, last = index, index + 1
+        while first < last:
+            # The children of the nodes of one level of the subtree are stored next to each other
+            nodes += last - first
+            first, last = int(self.first_child[first]), int(self.first_child[last - 1] + self.n_children[last - 1])
+        return nodes
+
+
+class LazyTreeNode(TreeNode):
+    """
+    TreeNode whose children are only built from the saved columns when first used.
+
+    Nodes that are never visited by the following searches are therefore never created.
+    """
+
+    def __init__(self, arrays, index, parent, turn_player, move, board):
+        super().__init__(board, move, parent, turn_player)
+        self._arrays = arrays
+        self._index = index
+        self._child = None
+        self._loaded = False  # Set after TreeNode.__init__, which assigns no children
+
+        flags = int(arrays.flags[index])
+        self.total_games = int(arrays.total_games[index])
+        self.wins = int(arrays.wins[index])
+        self.prior_games = int(arrays.prior_games[index])
+        self.prior_wins = int(arrays.prior_wins[index])
+        self.amaf_games = int(arrays.amaf_games[index])
+        self.amaf_wins = int(arrays.amaf_wins[index])
+        prior = float(arrays.prior[index])
+        self.prior = None if np.isnan(prior) else prior
+        n_untried = int(arrays.n_untried[index])
+        if n_untried >= 0:
+            first = int(arrays.first_untried[index])
+            self.untried = [(int(arrays.untried_move[j]), float(arrays.untried_prior[j]))
+                            for j in range(first, first + n_untried)]
+        self.winner = bool(flags & WINNER_FLAG)
+        self.loser = bool(flags & LOSER_FLAG)
+        self.terminal = bool(flags & TERMINAL_FLAG)
+
+    @property
+    def child(self):
+        if not self._loaded:
+            self._loaded = True
+            arrays, i = self._arrays, self._index
+            n = int(arrays.n_children[i])
+            if n > 0:
+                first = int(arrays.first_child[i])
+                turn_player = change_player(self.turn_player)
+                self._child = []
+                for j in range(first, first + n):
+                    # Board rebuilt from the one of this node and the move of the child
+                    move = PlayerAction(arrays.move[j])
+                    board = self.board.copy()
+                    apply_player_action(board, move, turn_player)
+                    self._child.append(LazyTreeNode(arrays, j, self, turn_player, move, board))
+        return self._child
+
+    @property
+    def unloaded_nodes(self):
+        """Number of saved nodes below this one that have not been built, 0 once its children are."""
+        return 0 if self._loaded else self._arrays.subtree_nodes(self._index) - 1
+
+    @child.setter
+    def child(self, value):
+        self._loaded = True
+        self._child = value
+
+
+def _root(arrays):
+    return LazyTreeNode(arrays, 0, None, arrays.turn_player, arrays.root_move, arrays.board.copy())
+
+
+def loads_tree(data):
+    """ Loads a tree serialized by dumps_tree.
+
+    Parameters
+    ----------
+    data: bytes
+        serialized tree
+
+    Returns
+    -------
+    root: LazyTreeNode
+        root of the tree, with no parent. Its descendants are created when first used.
+    """
+    return _root(TreeArrays(data))
+
+
+def load_tree(path, mmap=True):
+    """ Loads a tree saved by save_tree.
+
+    Parameters
+    ----------
+    path: str
+        file of the saved tree
+    mmap: bool
+        whether the columns are memory-mapped instead of read into memory
+
+    Returns
+    -------
+    root: LazyTreeNode
+        root of the tree, with no parent. Its descendants are created when first used.
+    """
+    if mmap:
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+            rows, cols = _HEADER.unpack(header)[2:4]
+            header += file.read(rows * cols)
+        return _root(TreeArrays(header, mmap_path=path))
+
+    with open(path, 'rb') as file:
+        return loads_tree(file.read())
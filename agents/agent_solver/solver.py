@@ -0,0 +1,242 @@
+import numpy as np
+from agents.common import PlayerAction, BoardPiece, NO_PLAYER
+
+EXACT, LOWER, UPPER = 0, 1, 2  # Kinds of bounds stored in the transposition table
+
+
+class BudgetExceeded(Exception):
+    """Raised when the solver has searched more nodes than it was allowed to."""
+
+
+class Position:
+    """
+    Bitboard representation of a position, used by the solver.
+
+    Every column uses rows + 1 bits (the extra one stays empty), the lowest bit being the bottom
+    cell, so that the pieces of a player can be shifted to test whole lines at once.
+
+    Attributes
+    ----------
+    current: int
+        bits of the pieces of the player to move
+    mask: int
+        bits of all the pieces on the board
+    moves: int
+        number of pieces on the board
+    connect: int
+        number of aligned pieces needed to win
+    """
+
+    def __init__(self, rows, cols, current=0, mask=0, moves=0, connect=4):
+        self.rows = rows
+        self.cols = cols
+        self.current = current
+        self.mask = mask
+        self.moves = moves
+        self.connect = connect
+
+    @classmethod
+    def from_board(cls, board: np.ndarray, player: BoardPiece, connect=4):
+        """Position of `board` with `player` to move."""
+        rows, cols = board.shape
+        position = cls(rows, cols, connect=connect)
+        for i in range(rows):
+            for j in range(cols):
+                if board[i, j] != NO_PLAYER:
+                    bit = 1 << (j * (rows + 1) + rows - 1 - i)  # Row 0 of the board is the top one
+                    position.mask |= bit
+                    position.moves += 1
+                    if board[i, j] == player:
+                        position.current |= bit
+        return position
+
+    def bottom(self, col):
+        return 1 << (col * (self.rows + 1))
+
+    def top(self, col):
+        return 1 << (col * (self.rows + 1) + self.rows - 1)
+
+    def can_play(self, col) -> bool:
+        return self.mask & self.top(col) == 0
+
+    def play(self, col):
+        """Position after the player to move plays in `col`."""
+        mask = self.mask | (self.mask + self.bottom(col))
+        return Position(self.rows, self.cols, self.current ^ self.mask, mask, self.moves + 1, self.connect)
+
+    def is_winning_move(self, col) -> bool:
+        """Whether playing in `col` connects four pieces of the player to move."""
+        pieces = self.current | ((self.mask + self.bottom(col)) & self.column_mask(col))
+        return connected(pieces, self.rows, self.connect)
+
+    def column_mask(self, col):
+        return ((1 << self.rows) - 1) << (col * (self.rows + 1))
+
+    def key(self):
+        return self.current + self.mask
+
+    def mirror_key(self):
+        """Key of the position reflected left-right."""
+        key = self.key()
+        height = self.rows + 1
+        column = (1 << height) - 1
+        mirrored = 0
+        for col in range(self.cols):
+            mirrored |= ((key >> (col * height)) & column) << ((self.cols - 1 - col) * height)
+        return mirrored
+
+
+def connected(pieces, rows, n=4) -> bool:
+    """Whether the bitboard `pieces` contains `n` aligned pieces."""
+    for shift in (1, rows + 1, rows, rows + 2):  # Vertical, horizontal and both diagonals
+        m = pieces
+        for k in range(1, n):
+            m &= pieces >> (k * shift)
+        if m:
+            return True
+    return False
+
+
+class Solver:
+    """
+    Negamax solver with alpha-beta pruning and a transposition table.
+
+    Scores are given for the player to move: positive if it wins (the sooner the higher),
+    negative if it loses and 0 for a draw.
+
+    Attributes
+    ----------
+    max_nodes: int or None
+        if given, number of nodes after which the search gives up
+    nodes: int
+        number of nodes searched
+    """
+
+    def __init__(self, max_nodes=None):
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.table = {}
+
+    def order(self, position):
+        """Columns sorted from the centre outwards, where the best moves usually are."""
+        center = (position.cols - 1) / 2
+        return sorted(range(position.cols), key=lambda col: abs(col - center))
+
+    def negamax(self, position, alpha, beta):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded()
+
+        size = position.rows * position.cols
+        if position.moves == size:
+            return 0
+        for col in range(position.cols):
+            if position.can_play(col) and position.is_winning_move(col):
+                return (size + 1 - position.moves) // 2
+
+        alpha_0 = alpha
+        key = min(position.key(), position.mirror_key())  # Mirrored positions share their entry
+        if key in self.table:
+            kind, value = self.table[key]
+            if kind == EXACT:
+                return value
+            elif kind == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        best = -size
+        for col in self.order(position):
+            if position.can_play(col):
+                score = -self.negamax(position.play(col), -beta, -alpha)
+                best = max(best, score)
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+
+        if best <= alpha_0:
+            self.table[key] = (UPPER, best)
+        elif best >= beta:
+            self.table[key] = (LOWER, best)
+        else:
+            self.table[key] = (EXACT, best)
+
+        return best
+
+    def column_scores(self, position):
+        """Exact score of every playable column (None for full ones)."""
+        size = position.rows * position.cols
+        scores = [None] * position.cols
+        for col in range(position.cols):
+            if position.can_play(col):
+                if position.is_winning_move(col):
+                    scores[col] = (size + 1 - position.moves) // 2
+                else:
+                    scores[col] = -self.negamax(position.play(col), -size, size)
+        return scores
+
+
+def solve(board: np.ndarray, player: BoardPiece, max_nodes=None, connect=4):
+    """ Solves a position with `player` to move.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player to move
+    max_nodes: int or None
+        if given, maximum number of nodes to search
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    action: PlayerAction or None
+        best column, None if the budget was exceeded
+    scores: list
+        score of every column for `player` (positive is a win, 0 a draw, None for full columns),
+        None if the budget was exceeded
+    nodes: int
+        number of nodes searched
+    """
+    solver = Solver(max_nodes)
+    try:
+        scores = solver.column_scores(Position.from_board(board, player, connect))
+    except BudgetExceeded:
+        return None, None, solver.nodes
+
+    action = max((col for col in range(len(scores)) if scores[col] is not None), key=lambda col: scores[col])
+
+    return PlayerAction(action), scores, solver.nodes
+
+
+def generate_move_solver(board, player, saved_state=None, max_nodes=None):
+    """Plays the best move found by the solver, a random one if it runs out of budget.
+
+    Parameters
+    ----------
+    board: np.array
+        current state of the board
+    player: BoardPiece
+        whose turn is it
+    saved_state: None
+        not needed for the solver
+    max_nodes: int or None
+        if given, maximum number of nodes to search
+
+    Returns
+    -------
+    action: PlayAction
+        Column to use.
+    saved_state: None.
+        not needed for the solver
+    """
+    action, _, _ = solve(board, player, max_nodes)
+    if action is None:
+        action = PlayerAction(np.random.choice(np.flatnonzero(board[0] == NO_PLAYER)))
+
+    return action, saved_state
+
@@ -29,7 +29,7 @@ def generate_move_random(board, player, saved_state=None):
     action = np.array([0])
 
     while not exit_yes:
-        action = PlayerAction(np.random.randint(7))
+        action = PlayerAction(np.random.randint(board.shape[1]))
         old_board, position = apply_player_action(old_board, action, player, True, True)
         if position is not None:
             exit_yes = True
@@ -0,0 +1,198 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+import numpy as np
+from agents.common import BoardPiece, PlayerAction, GenMove, AsyncGenMove, GameState, PLAYER1
+from agents.common import initialize_game_state, apply_player_action, check_end_state
+
+_shared_executors = {}
+
+
+def shared_executor(cpu_bound: bool = True) -> Executor:
+    """Executor shared by every asynchronous agent of the process.
+
+    Executors are created the first time they are needed, with one worker per core, so that
+    blocking agents run outside of the event loop thread. CPU-bound agents (e.g. the MonteCarlo
+    search) run in a process pool, as threads running Python code would wait for each other on the
+    GIL. Their arguments, results and saved states must therefore be picklable (trees are shipped
+    serialized with dumps_tree, see make_async). Other agents (e.g.
+    those waiting for I/O, or holding objects of this process) run in a thread pool.
+
+    Parameters
+    ----------
+    cpu_bound: bool
+        whether the process pool is returned rather than the thread pool
+
+    Returns
+    -------
+    executor: Executor
+        the shared executor
+    """
+    if cpu_bound not in _shared_executors:
+        if cpu_bound:
+            _shared_executors[cpu_bound] = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        else:
+            _shared_executors[cpu_bound] = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                              thread_name_prefix='agent')
+
+    return _shared_executors[cpu_bound]
+
+
+def _call_with_tree(generate_move, board, player, saved_state, *args):
+    """Runs `generate_move` in a worker process, loading and serializing its tree with the tree_io format."""
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode
+    from agents.agent_Monte_Carlo.tree_io import dumps_tree, loads_tree
+
+    if isinstance(saved_state, bytes):
+        saved_state = loads_tree(saved_state)
+    action, saved_state = generate_move(board, player, saved_state, *args)
+    if isinstance(saved_state, TreeNode):
+        saved_state = dumps_tree(saved_state)
+
+    return action, saved_state
+
+
+def make_async(generate_move: GenMove, executor: Optional[Executor] = None, cpu_bound: bool = True) -> AsyncGenMove:
+    """Turns a blocking GenMove callable into an awaitable one.
+
+    The call is sent to `executor` (one of the shared ones by default), so awaiting it does not
+    stall the event loop while the agent is thinking. Extra positional arguments, like the last
+    action needed by the MonteCarlo agent, are forwarded as they are.
+
+    Parameters
+    ----------
+    generate_move: GenMove
+        blocking agent to be wrapped
+    executor: Executor or None
+        executor running the agent. When a process pool is used, the saved state is pickled to
+        and from the worker at every move, except trees (TreeNode), which travel serialized with
+        dumps_tree as the columnar arrays are much cheaper to pickle than the nodes. The saved
+        state returned is then the serialized tree, to be given back as it is at the next move.
+    cpu_bound: bool
+        whether the agent runs in the shared process pool or in the shared thread pool, when no
+        executor is given (see shared_executor)
+
+    Returns
+    -------
+    generate_move_async: AsyncGenMove
+        coroutine function with the same arguments and results as `generate_move`, except for the
+        trees sent to a process pool (see `executor`)
+    """
+    async def generate_move_async(board, player, saved_state, *args):
+        loop = asyncio.get_running_loop()
+        pool = executor or shared_executor(cpu_bound)
+        if isinstance(pool, ProcessPoolExecutor):
+            from agents.agent_Monte_Carlo.montecarlo import TreeNode
+            from agents.agent_Monte_Carlo.tree_io import dumps_tree
+
+            if isinstance(saved_state, TreeNode):
+                saved_state = dumps_tree(saved_state)
+            call = functools.partial(_call_with_tree, generate_move, board, player, saved_state, *args)
+        else:
+            call = functools.partial(generate_move, board, player, saved_state, *args)
+
+        return await loop.run_in_executor(pool, call)
+
+    return generate_move_async
+
+
+class AgentSession:
+    """ Class used to keep the state of one agent during one game.
+
+       Every game hosted by the service owns its sessions, so the saved state of the agent
+       (e.g. the MonteCarlo tree) survives between the awaits of consecutive moves without
+       being shared with other games.
+
+       Attributes:
+           generate_move : Awaitable agent.
+           player : Piece played by the agent.
+           saved_state : Saved state returned by the agent in its last move (trees are serialized
+                         with dumps_tree when the agent runs in a process pool, see make_async).
+           needs_last_action : Whether the opponent's last action is passed to the agent.
+           name : Name of the agent in the telemetry.
+    """
+    def __init__(self, generate_move: GenMove, player: BoardPiece, executor: Optional[Executor] = None,
+                 needs_last_action: bool = False, name: Optional[str] = None, cpu_bound: bool = True):
+        self.generate_move = make_async(generate_move, executor, cpu_bound)
+        self.name = getattr(generate_move, '__name__', 'agent') if name is None else name
+        self.player = player
+        self.saved_state = None
+        self.needs_last_action = needs_last_action
+        self._lock = asyncio.Lock()
+
+    async def move(self, board: np.ndarray, last_action: Optional[PlayerAction] = None) -> PlayerAction:
+        """Asks the agent for its next move, updating its saved state.
+
+        Concurrent calls for the same session are served one after the other.
+
+        Parameters
+        ----------
+        board: np.array
+            current state of the board, it is not modified
+        last_action: PlayerAction or None
+            action performed by the opponent in the previous turn
+
+        Returns
+        -------
+        action: PlayerAction
+            column chosen by the agent
+        """
+        args = (last_action,) if self.needs_last_action else ()
+
+        async with self._lock:
+            action, self.saved_state = await self.generate_move(board.copy(), self.player, self.saved_state, *args)
+
+        return action
+
+
+async def agent_vs_agent_async(session_1: AgentSession, session_2: AgentSession, telemetry=None):
+    """Plays a whole game between two sessions without blocking the event loop.
+
+    `session_1` plays first. Many games can be awaited concurrently (e.g. with asyncio.gather),
+    all of them sharing the executors of their sessions.
+
+    Parameters
+    ----------
+    session_1: AgentSession
+        session playing first
+    session_2: AgentSession
+        session playing second
+    telemetry: Telemetry or None
+        if given, one record is written for every move of the game
+
+    Returns
+    -------
+    board: np.array
+        final state of the board
+    end_state: GameState
+        GameState.IS_WIN or GameState.IS_DRAW
+    winner: BoardPiece or None
+        piece of the winner, None in case of draw
+    """
+    board = initialize_game_state()
+    action = None
+    end_state = GameState.STILL_PLAYING
+    player = PLAYER1
+    game = None if telemetry is None else telemetry.new_game()
+    ply = 0
+
+    while end_state == GameState.STILL_PLAYING:
+        for session in (session_1, session_2):
+            player = session.player
+            t0 = time.perf_counter()
+            action = await session.move(board, action)
+            if telemetry is not None:
+                telemetry.record_move(game, ply, session.name, action, time.perf_counter() - t0,
+                                      session.saved_state, player=int(player))
+            ply += 1
+            apply_player_action(board, action, player)
+            end_state = check_end_state(board, player, action)
+            if end_state != GameState.STILL_PLAYING:
+                break
+
+    winner = player if end_state == GameState.IS_WIN else None
+
+    return board, end_state, winner
@@ -1,7 +1,8 @@
 from enum import Enum
+from functools import lru_cache
 from typing import Optional
 import numpy as np
-from typing import Callable, Tuple
+from typing import Awaitable, Callable, Tuple
 
 
 BoardPiece = np.int8  # The data type (dtype) of the board
@@ -16,6 +17,12 @@ PLAYER2_PRINT = str('O')
 
 PlayerAction = np.int8  # The column to be played
 
+# Lookup tables between pieces and their printed characters
+_PIECE_CHARS = np.frombuffer((NO_PLAYER_PRINT + PLAYER1_PRINT + PLAYER2_PRINT).encode('ascii'), dtype=np.uint8)
+_CHAR_PIECES = np.zeros(256, dtype=BoardPiece)
+_CHAR_PIECES[ord(PLAYER1_PRINT)] = PLAYER1
+_CHAR_PIECES[ord(PLAYER2_PRINT)] = PLAYER2
+
 
 class SavedState:
     """ Class used to save a computational result.
@@ -29,6 +36,47 @@ class SavedState:
         self.computational_result = computational_result
 
 
+class GameConfig:
+    """ Class used to store the dimensions of the game.
+
+       The board can have any number of rows and columns and the number of aligned
+       pieces needed to win can be changed, the default being the 6x7 Connect 4.
+
+       Attributes:
+           rows: Number of rows of the board.
+           cols: Number of columns of the board.
+           connect: Number of aligned pieces needed to win.
+    """
+    def __init__(self, rows: int = 6, cols: int = 7, connect: int = 4):
+        if rows < 1 or cols < 1 or not 2 <= connect <= max(rows, cols):
+            raise ValueError(f'Invalid game: {rows}x{cols} board with {connect} in a row')
+        self.rows = rows
+        self.cols = cols
+        self.connect = connect
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self.cols
+
+    @property
+    def center(self) -> PlayerAction:
+        """Central column (the left one of the two central columns of an even number of columns)."""
+        return PlayerAction((self.cols - 1) // 2)
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and (self.rows, self.cols, self.connect) == \
+            (other.rows, other.cols, other.connect)
+
+    def __hash__(self):
+        return hash((self.rows, self.cols, self.connect))
+
+    def __repr__(self):
+        return f'GameConfig(rows={self.rows}, cols={self.cols}, connect={self.connect})'
+
+
+DEFAULT_CONFIG = GameConfig()
+
+
 class GameState(Enum):
     """ Class used to store the state of the game
 
@@ -45,17 +93,25 @@ GenMove = Callable[
     Tuple[PlayerAction, Optional[SavedState]]  # Return type of the generate_move function
 ]
 
+AsyncGenMove = Callable[
+    [np.ndarray, BoardPiece, Optional[SavedState]],  # Same arguments as GenMove
+    Awaitable[Tuple[PlayerAction, Optional[SavedState]]]  # Awaited by the caller instead of returned
+]
+
 
-def initialize_game_state() -> np.ndarray:
+def initialize_game_state(config: GameConfig = DEFAULT_CONFIG) -> np.ndarray:
     """ Initializes C4 board.
 
     Returns an array, shape (6, 7) and data type (data type) BoardPiece, initialized to 0 (NO_PLAYER).
     Apparently the board is flipped here in comparison to the given convention.
 
+    Args:
+        config: Dimensions of the game, the board having shape (config.rows, config.cols).
+
     Returns:
         board: Initialized board with no pieces on it.
     """
-    board = np.full((6, 7), NO_PLAYER)
+    board = np.full(config.shape, NO_PLAYER)
 
     return board
 
@@ -81,38 +137,35 @@ def pretty_print_board(board: np.ndarray) -> str:
     Returns:
         board_str: String to print the pretty readable board.
     """
+    return pretty_print_boards(board[np.newaxis])[0]
 
-    x, y = np.shape(board)
 
-    board_str = '|'
-    for p in range(0, y):
-        board_str += '=='
-    board_str += '|\n'
+def pretty_print_boards(boards: np.ndarray) -> list:
+    """ Print many boards as readable for the user, see pretty_print_board.
 
-    for i in range(0, x):
-        string = '|'
+    The pieces of all the boards are converted to characters at once, so printing a batch
+    costs little more than joining its strings.
+
+    Args:
+        boards: Boards to print, array of shape (N, rows, columns).
 
-        for j in range(0, y):
-            if board[i, j] == NO_PLAYER:
-                string += NO_PLAYER_PRINT
-            elif board[i, j] == PLAYER1:
-                string += PLAYER1_PRINT
-            elif board[i, j] == PLAYER2:
-                string += PLAYER2_PRINT
-            string += ' '
-        board_str += string + '|\n'
+    Returns:
+        boards_str: List of the N strings to print the boards.
+    """
+    n, x, y = np.shape(boards)
 
-    board_str += '|'
-    for m in range(0, y):
-        board_str += '=='
-    board_str += '|\n'
+    border = '|' + '==' * y + '|\n'
+    footer = border + '|' + ''.join(str(p) + ' ' for p in range(y)) + '|'
 
-    board_str += '|'
-    for p in range(0, y):
-        board_str += str(p) + ' '
-    board_str += '|'
+    # Characters of all the rows, each one being '|', then every piece followed by a space, then '|\n'
+    rows = np.empty((n, x, 2 * y + 3), dtype=np.uint8)
+    rows[:, :, 0] = ord('|')
+    rows[:, :, 1:2 * y:2] = _PIECE_CHARS[np.asarray(boards, dtype=np.intp)]
+    rows[:, :, 2:2 * y + 1:2] = ord(' ')
+    rows[:, :, -2] = ord('|')
+    rows[:, :, -1] = ord('\n')
 
-    return board_str
+    return [border + board_rows.tobytes().decode('ascii') + footer for board_rows in rows]
 
 
 def string_to_board(pp_board: str) -> np.ndarray:
@@ -129,29 +182,190 @@ def string_to_board(pp_board: str) -> np.ndarray:
         board_out: Board extracted from the string as a matrix with its associated BoardPieces.
 
     """
-    start = 0
-    board_out = np.ndarray([])
-    for line in pp_board.split('\n'):
-        if '=' in line:
-            start += 1
-        elif '=' not in line and start < 2:
-            line = line[1:-2:2]
-            print(line)
-            line_np = np.array([])
-            for j in range(0, len(line)):
-                if line[j] == NO_PLAYER_PRINT:
-                    line_np = np.append(line_np, NO_PLAYER)
-                elif line[j] == PLAYER1_PRINT:
-                    line_np = np.append(line_np, PLAYER1)
-                elif line[j] == PLAYER2_PRINT:
-                    line_np = np.append(line_np, PLAYER2)
-            if line_np:
-                board_out = np.hstack((board_out, line_np))
-
-    board_out = board_out[1::]
-    board_out = board_out.reshape(6, 7)
-
-    return board_out
+    return strings_to_boards([pp_board])[0]
+
+
+def strings_to_boards(pp_boards: list) -> np.ndarray:
+    """ Many string boards to a single array, see string_to_board.
+
+    All the boards must have the same shape, and ValueError is raised otherwise. Their characters
+    are converted to pieces with a lookup table, in time linear in the length of the strings.
+
+    Args:
+        pp_boards: Strings containing pretty_print_board outputs.
+
+    Returns:
+        boards_out: Boards extracted from the strings, array of shape (N, rows, columns).
+    """
+    rows = []
+    shape = None
+    for n, pp_board in enumerate(pp_boards):
+        start = 0
+        board_rows = []
+        for line in pp_board.split('\n'):
+            if '=' in line:
+                start += 1
+            elif start == 1:  # Lines between the top and bottom borders
+                board_rows.append(line[1:-2:2])
+
+        if shape is None:
+            shape = (len(board_rows), len(board_rows[0]) if board_rows else 0)
+        if len(board_rows) != shape[0] or shape[0] == 0 or any(len(row) != shape[1] for row in board_rows):
+            raise ValueError(f'Board {n} is not a printed board of {shape[0]}x{shape[1]}')
+        rows.extend(board_rows)
+
+    chars = np.frombuffer(''.join(rows).encode('ascii'), dtype=np.uint8)
+    boards_out = _CHAR_PIECES[chars].reshape((len(pp_boards),) + (shape or (0, 0)))
+
+    return boards_out
+
+
+def _key_weights(rows: int, cols: int) -> np.ndarray:
+    """Bit of the key of every cell: rows + 1 bits per column, the lowest one being the bottom cell."""
+    i, j = np.indices((rows, cols))
+    return np.left_shift(np.uint64(1), (j * (rows + 1) + rows - 1 - i).astype(np.uint64))
+
+
+def encode_board(board: np.ndarray):
+    """ Compact 64-bit key of a board, or of every board of a batch.
+
+    The key is the sum of the bits of the pieces of PLAYER1 and of the bits of all the pieces,
+    which is unique for every board whose pieces lie on top of each other. It needs
+    (rows + 1) * columns <= 64, which holds for the 6x7 board, and raises ValueError otherwise.
+
+    Args:
+        board: Board of shape (rows, columns), or batch of boards of shape (N, rows, columns).
+
+    Returns:
+        key: np.uint64 key of the board, or array of shape (N,) with the keys of the batch.
+    """
+    board = np.asarray(board)
+    rows, cols = board.shape[-2:]
+    if (rows + 1) * cols > 64:
+        raise ValueError(f'Boards of {rows}x{cols} do not fit in 64-bit keys')
+    weights = _key_weights(rows, cols)
+    mask = np.sum(np.where(board != NO_PLAYER, weights, np.uint64(0)), axis=(-2, -1), dtype=np.uint64)
+    player1 = np.sum(np.where(board == PLAYER1, weights, np.uint64(0)), axis=(-2, -1), dtype=np.uint64)
+
+    return player1 + mask
+
+
+def decode_key(key, rows: int = 6, cols: int = 7) -> np.ndarray:
+    """ Board, or batch of boards, of keys given by encode_board.
+
+    Args:
+        key: Key of a board, or array of shape (N,) of keys.
+        rows: Number of rows of the boards.
+        cols: Number of columns of the boards.
+
+    Returns:
+        board: Board of shape (rows, columns), or batch of boards of shape (N, rows, columns).
+    """
+    keys = np.atleast_1d(np.asarray(key, dtype=np.uint64))
+    height = np.arange(rows, dtype=np.uint64)  # Height of each cell from the bottom
+    boards = np.full((keys.size, rows, cols), NO_PLAYER)
+
+    for j in range(cols):
+        value = (keys >> np.uint64(j * (rows + 1))) & np.uint64((1 << (rows + 1)) - 1)
+        # value = pieces of PLAYER1 + (2 ** n_pieces - 1), with the pieces of PLAYER1 < 2 ** n_pieces
+        n_pieces = np.floor(np.log2(value.astype(np.float64) + 1)).astype(np.uint64)
+        player1 = value - ((np.uint64(1) << n_pieces) - np.uint64(1))
+        filled = height[np.newaxis] < n_pieces[:, np.newaxis]
+        is_player1 = ((player1[:, np.newaxis] >> height[np.newaxis]) & np.uint64(1)).astype(bool)
+        boards[:, ::-1, j] = np.where(filled, np.where(is_player1, PLAYER1, PLAYER2), NO_PLAYER)
+
+    return boards[0] if np.ndim(key) == 0 else boards
+
+
+def mirror_board(board: np.ndarray) -> np.ndarray:
+    """ Board reflected left-right, which has the same game-theoretic value.
+
+    Args:
+        board: Board of shape (rows, columns), or batch of boards of shape (N, rows, columns).
+
+    Returns:
+        mirrored: View of the board(s) with the columns in reverse order.
+    """
+    return np.asarray(board)[..., ::-1]
+
+
+def is_symmetric(board: np.ndarray) -> bool:
+    """ Whether a board is its own reflection, so that mirrored moves are equivalent.
+
+    Args:
+        board: Current state of the board.
+
+    Returns:
+        bool: True if column j and column (columns - 1 - j) are equal for every j.
+    """
+    return bool(np.array_equal(board, board[:, ::-1]))
+
+
+def canonical_key(board: np.ndarray):
+    """ Key shared by a board and its reflection: the smaller of their keys of encode_board.
+
+    Args:
+        board: Board of shape (rows, columns), or batch of boards of shape (N, rows, columns).
+
+    Returns:
+        key: np.uint64 canonical key of the board, or array of shape (N,) with the keys of the batch.
+    """
+    return np.minimum(encode_board(board), encode_board(mirror_board(board)))
+
+
+def moves_to_board(moves, config: GameConfig = DEFAULT_CONFIG) -> np.ndarray:
+    """ Board reached by playing a move string from the empty board.
+
+    Args:
+        moves: Columns played one after the other, PLAYER1 first (e.g. '3342'), or a list
+               of columns for boards with more than 10 columns.
+        config: Dimensions of the game.
+
+    Returns:
+        board: Board after all the moves.
+    """
+    return moves_to_boards([moves], config)[0]
+
+
+def moves_to_boards(moves: list, config: GameConfig = DEFAULT_CONFIG) -> np.ndarray:
+    """ Boards reached by playing many move strings, see moves_to_board.
+
+    A move outside of the board or into a full column raises ValueError.
+
+    Args:
+        moves: Move strings (or lists of columns).
+        config: Dimensions of the game.
+
+    Returns:
+        boards: Array of shape (N, rows, columns) with the board of every move string.
+    """
+    boards = np.full((len(moves),) + config.shape, NO_PLAYER)
+    heights = np.zeros((len(moves), config.cols), dtype=np.intp)
+
+    for n, game in enumerate(moves):
+        for ply, move in enumerate(game):
+            col = int(move)
+            if not 0 <= col < config.cols or heights[n, col] == config.rows:
+                raise ValueError(f'Move {ply} of game {n} cannot be played in the column {col}')
+            heights[n, col] += 1
+            boards[n, config.rows - heights[n, col], col] = PLAYER1 if ply % 2 == 0 else PLAYER2
+
+    return boards
+
+
+def player_to_move(board: np.ndarray) -> BoardPiece:
+    """ Finds whose turn it is on a board.
+
+    Args:
+        board: Current state of the board, PLAYER1 having played first.
+
+    Returns:
+        player: PLAYER1 if both players have the same number of pieces, PLAYER2 otherwise.
+    """
+    if np.sum(board == PLAYER1) == np.sum(board == PLAYER2):
+        return PLAYER1
+    else:
+        return PLAYER2
 
 
 def apply_player_action(
@@ -203,18 +417,84 @@ def findall(element: BoardPiece, board: np.array) -> np.ndarray:
              found.
 
     """
-    result = []
+    res = np.argwhere(board == element)
+    return res
 
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == element:
-                result.append([i, j])
 
-    res = np.array(result)
-    return res
+@lru_cache(maxsize=None)
+def winning_lines(rows: int = 6, cols: int = 7, connect: int = 4) -> np.ndarray:
+    """ Cells of every line of `connect` cells of a board, computed once per board size.
+
+    Lines are horizontal, vertical and both diagonals, there are 69 of them on the 6x7 board.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        connect: Number of aligned pieces needed to win.
+
+    Returns:
+        lines: Read-only array of shape (n_lines, connect) with the flat indices (row * cols + column)
+               of the cells of every line.
+    """
+    lines = []
+    for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for i in range(rows):
+            for j in range(cols):
+                end_i, end_j = i + di * (connect - 1), j + dj * (connect - 1)
+                if 0 <= end_i < rows and 0 <= end_j < cols:
+                    lines.append([(i + di * k) * cols + j + dj * k for k in range(connect)])
 
+    lines = np.array(lines, dtype=np.intp).reshape(-1, connect)
+    lines.setflags(write=False)
+    return lines
+
+
+@lru_cache(maxsize=None)
+def cell_lines(rows: int = 6, cols: int = 7, connect: int = 4) -> np.ndarray:
+    """ Lines of winning_lines going through every cell, so that only they are checked after a move.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        connect: Number of aligned pieces needed to win.
 
-def connected_four(board: np.ndarray, player: BoardPiece, last_action: PlayerAction = None) -> bool:
+    Returns:
+        table: Read-only array of shape (rows * cols, max_lines) with the indices in winning_lines of the
+               lines through every cell, padded with -1 (at most 13 lines go through a cell of a 6x7 board).
+    """
+    lines = winning_lines(rows, cols, connect)
+    through = [[] for _ in range(rows * cols)]
+    for index, line in enumerate(lines):
+        for cell in line:
+            through[cell].append(index)
+
+    table = np.full((rows * cols, max(len(cell) for cell in through)), -1, dtype=np.intp)
+    for cell, indices in enumerate(through):
+        table[cell, :len(indices)] = indices
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def cell_windows(rows: int = 6, cols: int = 7, connect: int = 4) -> tuple:
+    """ Cells of the lines going through every cell, as Python tuples for checks of single moves.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        connect: Number of aligned pieces needed to win.
+
+    Returns:
+        windows: Tuple with, for every cell (row * cols + column), a tuple of the lines through it,
+                 each one a tuple of the flat indices of its cells.
+    """
+    lines = winning_lines(rows, cols, connect).tolist()
+    return tuple(tuple(tuple(lines[index]) for index in indices if index >= 0)
+                 for indices in cell_lines(rows, cols, connect).tolist())
+
+
+def connected_four(board: np.ndarray, player: BoardPiece, last_action: PlayerAction = None,
+                   connect: int = 4) -> bool:
     """ Check if there are 4 connected pieces in the board for the player.
 
     Returns True if there are four adjacent pieces equal to `player` arranged
@@ -226,55 +506,35 @@ def connected_four(board: np.ndarray, player: BoardPiece, last_action: PlayerAct
         board: Current state of the board.
         player: Whose turn is it.
         last_action: Last action taken.
+        connect: Number of aligned pieces needed (4 in Connect 4).
     Returns:
-        bool: True if there are at least 4 connected pieces, False otherwise
+        bool: True if there are at least `connect` connected pieces, False otherwise
 
     """
     if last_action is None:
-        indexes = findall(player, board)
-    else:
-        indexes = np.array([[np.sum(board[:, last_action] == 0), last_action]])
-
-    x, y = np.shape(board)
-
-    dirs = np.array([[1, 1], [1, -1], [1, 0], [0, 1]])  # Directions to inspect the board.
-    sums = np.zeros((indexes.shape[0], 4))
-
-    for i in range(0, indexes.shape[0]):
-        for j in range(0, 4):
-            new_ind = indexes[i]
-            dim = False
-            break_0 = False
-
-            while not break_0 and not dim:
-                if new_ind[0] > x - 1 or new_ind[1] > y - 1 or new_ind[0] < 0 or new_ind[1] < 0:
-                    dim = True
-                elif player != board[new_ind[0], new_ind[1]]:
-                    break_0 = True
-                else:
-                    sums[i, j] += 1
-                    new_ind = new_ind + dirs[j]
-
-            break_0 = dim = False
-            sums[i, j] -= 1
-            new_ind = indexes[i]
-
-            while not break_0 and not dim:
-                if new_ind[0] > x - 1 or new_ind[1] > y - 1 or new_ind[0] < 0 or new_ind[1] < 0:
-                    dim = True
-                elif player != board[new_ind[0], new_ind[1]]:
-                    break_0 = True
-                else:
-                    sums[i, j] += 1
-                    new_ind = new_ind - dirs[j]
-
-    if np.sum(sums >= 4) > 0:
-        return True
-    else:
+        # Every line of the board at once
+        lines = winning_lines(board.shape[0], board.shape[1], connect)
+        return bool(np.any(np.all(np.ravel(board)[lines] == player, axis=1)))
+
+    # Only the lines through the top piece of the column played
+    rows, cols = board.shape
+    row = rows - np.count_nonzero(board[:, last_action])
+    if row == rows:
         return False
+    item = board.item  # Python ints, cheaper than NumPy indexing for a few cells
+    player = int(player)
+    for line in cell_windows(rows, cols, connect)[row * cols + int(last_action)]:
+        for cell in line:
+            if item(cell) != player:
+                break
+        else:
+            return True
+
+    return False
 
 
-def check_end_state(board: np.ndarray, player: BoardPiece, last_action: PlayerAction = None) -> object:
+def check_end_state(board: np.ndarray, player: BoardPiece, last_action: PlayerAction = None,
+                    connect: int = 4) -> object:
     """ Checks the state of the game.
 
     Returns the current game state for the current `player`, i.e. has their last
@@ -285,15 +545,17 @@ def check_end_state(board: np.ndarray, player: BoardPiece, last_action: PlayerAc
         board: Current state of the board.
         player: Whose turn is it.
         last_action: Last action taken in the game.
+        connect: Number of aligned pieces needed to win.
     Returns:
         state_game: GameState.IS_WIN if player won, GameState. Otherwise,
                     GameState.STILL_PLAYING or GameState.IS_DRAW if board is full.
     """
     state_game = GameState.STILL_PLAYING
 
-    if connected_four(board, player, last_action):
+    # One check for the win, the board being full otherwise meaning a draw
+    if connected_four(board, player, last_action, connect):
         state_game = GameState.IS_WIN
-    elif np.sum(board == 0) == 0 and not connected_four(board, player, last_action):
+    elif board.all():
         state_game = GameState.IS_DRAW
 
     return state_game
@@ -0,0 +1,118 @@
+import json
+import threading
+import uuid
+import weakref
+
+
+class Telemetry:
+    """
+    Buffered sink of per-move telemetry, written as one JSON object per line.
+
+    Game loops call record_move after every move. Searches that know more about the move (e.g. the
+    MonteCarlo search, given the sink in its SearchSettings) call record_search first with the node
+    they return as saved state, and their fields are added to the record of that move. Records are
+    kept in memory and written `buffer_size` at a time, so that telemetry stays off the search.
+    Several games, in several threads, can share one sink. The statistics of a search are only kept
+    as long as its saved state exists, so those of moves that are never recorded do not pile up.
+
+    Attributes
+    ----------
+    path: str
+        JSON-lines file the records are appended to
+    buffer_size: int
+        number of records kept before they are written
+    """
+
+    def __init__(self, path, buffer_size=256):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._searches = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._file = open(path, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def new_game() -> str:
+        """Unique id of a new game."""
+        return uuid.uuid4().hex
+
+    def record_search(self, saved_state, **fields):
+        """ Keeps the statistics of a search until the move it returned is recorded.
+
+        Parameters
+        ----------
+        saved_state: object
+            saved state returned with the move (the chosen node for the MonteCarlo search), which must
+            support weak references
+        fields:
+            statistics of the search
+        """
+        with self._lock:
+            self._searches[saved_state] = fields
+
+    def record_move(self, game, ply, agent, action, seconds, saved_state=None, **fields):
+        """ Adds the record of a move to the buffer, writing the buffer when it is full.
+
+        Parameters
+        ----------
+        game: str
+            id of the game
+        ply: int
+            number of moves played before this one
+        agent: str
+            name of the agent
+        action: PlayerAction
+            move played
+        seconds: float
+            time taken by the agent
+        saved_state: object
+            saved state returned with the move, whose search statistics are added to the record
+        fields:
+            other fields of the record
+        """
+        record = {'game': game, 'ply': int(ply), 'agent': agent, 'move': int(action), 'seconds': seconds}
+        with self._lock:
+            try:
+                record.update(self._searches.pop(saved_state, {}))
+            except TypeError:  # None or a saved state without weak references, never given to record_search
+                pass
+            record.update(fields)
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.buffer_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered records."""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            if records:
+                self._file.write(''.join(json.dumps(record) + '\n' for record in records))
+                self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_telemetry(path) -> list:
+    """ Reads the records of a telemetry file.
+
+    Parameters
+    ----------
+    path: str
+        JSON-lines file written by a Telemetry
+
+    Returns
+    -------
+    records: list
+        one dict per move
+    """
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -0,0 +1,154 @@
+import argparse
+import json
+import multiprocessing
+import time
+import numpy as np
+from agents.common import PlayerAction, moves_to_board, player_to_move
+from benchmarks.solved_positions import load_suite
+
+VARIANTS = ('single', 'parallel', 'loaded')
+
+
+def move_latencies(positions, budget, settings=None, seed=0):
+    """ Runs the MonteCarlo agent on every position with a time budget, measuring the time of every move.
+
+    Parameters
+    ----------
+    positions: list
+        strings of the columns played from the empty board (see benchmarks.solved_positions)
+    budget: float
+        seconds given to every move
+    settings: SearchSettings or None
+        options of the searches
+    seed: int
+        seed of the searches
+
+    Returns
+    -------
+    latencies: list
+        seconds taken by every move, from the call of montecarlo to its return
+    """
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo, warm_up
+
+    warm_up()
+    np.random.seed(seed)
+    latencies = []
+    for moves in positions:
+        board = moves_to_board(moves)
+        t0 = time.perf_counter()
+        montecarlo(board, player_to_move(board), None, PlayerAction(int(moves[-1])), train_time=budget,
+                   settings=settings)
+        latencies.append(time.perf_counter() - t0)
+
+    return latencies
+
+
+def _worker_latencies(job):
+    positions, budget, seed = job
+    return move_latencies(positions, budget, seed=seed)
+
+
+def _burn(stop):
+    """Keeps a core busy until `stop` is set."""
+    while not stop.is_set():
+        sum(range(10000))
+
+
+def run_variant(variant, positions, budget, workers=None, load=None, seed=0):
+    """ Latencies of the moves of one variant of the harness.
+
+    Parameters
+    ----------
+    variant: str
+        'single' (one process), 'parallel' (`workers` processes searching at the same time, each on its
+        share of the positions) or 'loaded' (one process, while `load` other processes keep cores busy)
+    positions: list
+        strings of the columns played from the empty board
+    budget: float
+        seconds given to every move
+    workers: int or None
+        processes of the parallel variant (default: one per core)
+    load: int or None
+        busy processes of the loaded variant (default: one per core)
+    seed: int
+        seed of the searches
+
+    Returns
+    -------
+    latencies: list
+        seconds taken by every move
+    """
+    if variant == 'single':
+        return move_latencies(positions, budget, seed=seed)
+
+    elif variant == 'parallel':
+        workers = workers or multiprocessing.cpu_count()
+        jobs = [(positions[i::workers], budget, seed + i) for i in range(workers)]
+        with multiprocessing.Pool(workers) as pool:
+            return [latency for latencies in pool.map(_worker_latencies, jobs) for latency in latencies]
+
+    elif variant == 'loaded':
+        stop = multiprocessing.Event()
+        burners = [multiprocessing.Process(target=_burn, args=(stop,), daemon=True)
+                   for _ in range(load or multiprocessing.cpu_count())]
+        for burner in burners:
+            burner.start()
+        try:
+            return move_latencies(positions, budget, seed=seed)
+        finally:
+            stop.set()
+            for burner in burners:
+                burner.join()
+
+    raise ValueError(f'unknown variant {variant!r}, expected one of {VARIANTS}')
+
+
+def latency_report(latencies, budget):
+    """ Percentiles of the latencies of the moves and of their overshoot of the deadline.
+
+    Parameters
+    ----------
+    latencies: list
+        seconds taken by every move
+    budget: float
+        seconds given to every move
+
+    Returns
+    -------
+    report: dict
+        number of moves, p50/p95/p99/max latency, p50/p95/p99/max overshoot (latency minus budget,
+        negative when the move was early) and share of moves over their deadline
+    """
+    latencies = np.asarray(latencies)
+    report = {'moves': len(latencies), 'budget': budget}
+    for name, values in (('latency', latencies), ('overshoot', latencies - budget)):
+        for q in (50, 95, 99):
+            report[f'{name}_p{q}'] = float(np.percentile(values, q))
+        report[f'{name}_max'] = float(values.max())
+    report['late'] = float(np.mean(latencies > budget))
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='How far MonteCarlo moves overshoot their time budget.')
+    parser.add_argument('--budget', type=float, default=0.1, help='seconds per move')
+    parser.add_argument('--positions', type=int, default=60, help='positions of the solved suite searched')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--workers', type=int, default=None, help='processes of the parallel variant')
+    parser.add_argument('--load', type=int, default=None, help='busy processes of the loaded variant')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='one JSON line per variant instead of a table')
+    args = parser.parse_args()
+
+    suite = [moves for moves, _, _ in load_suite()[:args.positions]]
+    for name in args.variants:
+        result = latency_report(run_variant(name, suite, args.budget, args.workers, args.load, args.seed), args.budget)
+        result['variant'] = name
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{name:8s} {result['moves']:4d} moves: latency p50 {1000 * result['latency_p50']:7.1f} ms "
+                  f"p95 {1000 * result['latency_p95']:7.1f} ms p99 {1000 * result['latency_p99']:7.1f} ms "
+                  f"max {1000 * result['latency_max']:7.1f} ms, "
+                  f"overshoot p99 {1000 * result['overshoot_p99']:6.1f} ms, {100 * result['late']:.0f}% late")
@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+import numpy as np
+from agents.common import GameState, PlayerAction, PLAYER1, PLAYER2
+from agents.common import initialize_game_state, apply_player_action, check_end_state
+from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+from agents.agent_Monte_Carlo.lockstep import montecarlo_lockstep
+
+
+def random_positions(count, moves=6, seed=0):
+    """ Positions reached by `moves` random moves, without a finished game.
+
+    Returns
+    -------
+    positions: list
+        (board, player to move, last action) of every position
+    """
+    rng = np.random.default_rng(seed)
+    positions = []
+    while len(positions) < count:
+        board = initialize_game_state()
+        player = PLAYER1
+        for _ in range(moves):
+            action = PlayerAction(rng.choice(np.flatnonzero(board[0] == 0)))
+            apply_player_action(board, action, player)
+            if check_end_state(board, player, action) != GameState.STILL_PLAYING:
+                break
+            player = PLAYER2 if player == PLAYER1 else PLAYER1
+        else:
+            positions.append((board, player, action))
+
+    return positions
+
+
+def throughput(games, iterations=200, seed=0):
+    """ Iterations per second of the searches of many games, one after the other and in lockstep.
+
+    Both ways search every tree with one leaf per step, simulated by playout.random_games.
+
+    Parameters
+    ----------
+    games: int
+        number of games searched
+    iterations: int
+        iterations of every search
+    seed: int
+        seed of the positions and of the searches
+
+    Returns
+    -------
+    results: dict
+        iterations per second of the sequential and of the lockstep searches, and the speedup
+    """
+    positions = random_positions(games, seed=seed)
+    # Forced moves are answered without search, which would not measure the searches
+    settings = SearchSettings(batch_size=1, tactics=False)
+
+    np.random.seed(seed)
+    t0 = time.perf_counter()
+    for board, player, action in positions:
+        montecarlo(board.copy(), player, None, action, iterations=iterations, settings=settings)
+    sequential = games * iterations / (time.perf_counter() - t0)
+
+    np.random.seed(seed)
+    t0 = time.perf_counter()
+    montecarlo_lockstep([board.copy() for board, _, _ in positions], [player for _, player, _ in positions],
+                        [None] * games, [action for _, _, action in positions], iterations=iterations,
+                        settings=settings)
+    lockstep = games * iterations / (time.perf_counter() - t0)
+
+    return {'games': games, 'sequential': sequential, 'lockstep': lockstep, 'speedup': lockstep / sequential}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='MonteCarlo searches of many games, sequential vs lockstep.')
+    parser.add_argument('--games', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--iterations', type=int, default=200, help='MonteCarlo iterations per search')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='one JSON line per number of games instead of a table')
+    args = parser.parse_args()
+
+    for count in args.games:
+        result = throughput(count, args.iterations, args.seed)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{count:4d} games: sequential {result['sequential']:8.0f} it/s, lockstep {result['lockstep']:8.0f} it/s"
+                  f" ({result['speedup']:.2f}x)")
@@ -0,0 +1,48 @@
+import argparse
+from agents.common import moves_to_board, player_to_move
+from agents.agent_Monte_Carlo.parallel import ParallelSearch
+
+
+def scaling(board, workers, train_time=2.0, capacity=1 << 20):
+    """ Iterations per second of the tree-parallel search for every number of workers.
+
+    Parameters
+    ----------
+    board: np.array
+        searched position
+    workers: list
+        numbers of worker processes to measure
+    train_time: float
+        seconds of every search
+    capacity: int
+        maximum number of nodes of the tree
+
+    Returns
+    -------
+    results: list
+        stats of ParallelSearch.search with the number of workers, one dict per number of workers
+    """
+    player = player_to_move(board)
+    results = []
+    for count in workers:
+        with ParallelSearch(count, capacity) as search:
+            search.search(board, player, 0.1)  # Warm-up of the processes
+            _, stats = search.search(board, player, train_time)
+        stats['workers'] = count
+        results.append(stats)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scaling of the tree-parallel MonteCarlo search with the workers.')
+    parser.add_argument('--moves', default='', help='columns played from the empty board (e.g. 3342)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--train-time', type=float, default=2.0)
+    args = parser.parse_args()
+
+    base = None
+    for stats in scaling(moves_to_board(args.moves), args.workers, args.train_time):
+        base = base or stats['iterations_per_second']
+        print(f"{stats['workers']:3d} workers: {stats['iterations_per_second']:9.0f} iterations/s "
+              f"(x{stats['iterations_per_second'] / base:.2f}), {stats['nodes']} nodes")
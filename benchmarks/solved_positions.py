@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from agents.common import GameState, PlayerAction, PLAYER1, PLAYER2
+from agents.common import apply_player_action, check_end_state, moves_to_board, player_to_move
+
+# Suite shipped with the benchmark: one position per line, as the columns played from the empty board,
+# the value of the position for the player to move (1 win, 0 draw, -1 loss) and the best columns
+SUITE = os.path.join(os.path.dirname(__file__), 'solved_positions.txt')
+
+
+def best_columns(scores):
+    """ Value of a solved position and its best columns.
+
+    Parameters
+    ----------
+    scores: list
+        score of every column, as returned by solver.solve
+
+    Returns
+    -------
+    value: int
+        value of the position for the player to move: 1 win, 0 draw, -1 loss
+    best: list
+        columns keeping the value. Every column of a lost position loses, the best ones are those losing the latest.
+    """
+    played = {col: score for col, score in enumerate(scores) if score is not None}
+    top = max(played.values())
+    value = int(np.sign(top))
+    if value < 0:
+        return value, [col for col, score in played.items() if score == top]
+    return value, [col for col, score in played.items() if np.sign(score) == value]
+
+
+def generate_suite(count=100, min_moves=14, max_moves=26, max_nodes=200000, seed=0):
+    """ Solves random positions to build a suite.
+
+    Positions are reached by random moves. The suite holds as many won, drawn and lost positions (one more
+    of the first values when `count` is not a multiple of 3), so that the accuracy of an agent does not
+    mostly measure one kind of position. Positions with a forced move (see tactics.forced_move), which the
+    agent plays without searching, positions the solver cannot solve within `max_nodes` and positions where
+    every column is a best one (see best_columns) are left out.
+
+    Parameters
+    ----------
+    count: int
+        number of positions
+    min_moves, max_moves: int
+        range of the number of moves played in the positions
+    max_nodes: int
+        budget of the solver for every position
+    seed: int
+        seed of the random moves
+
+    Returns
+    -------
+    suite: list
+        (moves, value, best) tuples, with the string of the columns played, the value of the position
+        for the player to move and the list of the best columns
+    """
+    from agents.agent_solver.solver import solve
+    from agents.agent_Monte_Carlo.tactics import forced_move
+
+    rng = np.random.default_rng(seed)
+    values = (1, 0, -1)
+    quotas = {value: count // len(values) + (i < count % len(values)) for i, value in enumerate(values)}
+    suite = []
+    while len(suite) < count:
+        board = moves_to_board('')
+        moves = ''
+        player = PLAYER1
+        for _ in range(rng.integers(min_moves, max_moves + 1)):
+            col = PlayerAction(rng.choice(np.flatnonzero(board[0] == 0)))
+            apply_player_action(board, col, player)
+            moves += str(col)
+            if check_end_state(board, player, col) != GameState.STILL_PLAYING:
+                break
+            player = PLAYER2 if player == PLAYER1 else PLAYER1
+        else:
+            if forced_move(board, player) is not None:
+                continue
+            _, scores, _ = solve(board, player, max_nodes)
+            if scores is None:
+                continue
+            value, best = best_columns(scores)
+            if quotas[value] > 0 and len(best) < sum(score is not None for score in scores):
+                suite.append((moves, value, best))
+                quotas[value] -= 1
+
+    return suite
+
+
+def write_suite(suite, path=SUITE):
+    with open(path, 'w') as file:
+        file.write('# moves value best-columns\n')
+        for moves, value, best in suite:
+            file.write(f"{moves} {value} {''.join(str(col) for col in best)}\n")
+
+
+def load_suite(path=SUITE) -> list:
+    """ Reads a suite written by write_suite.
+
+    Parameters
+    ----------
+    path: str
+        file of the suite
+
+    Returns
+    -------
+    suite: list
+        (moves, value, best) tuples, as returned by generate_suite
+    """
+    suite = []
+    with open(path) as file:
+        for line in file:
+            if line.strip() and not line.startswith('#'):
+                moves, value, best = line.split()
+                suite.append((moves, int(value), [int(col) for col in best]))
+    return suite
+
+
+def accuracy(suite, budgets=(100, 400, 1600), settings=None, seed=0):
+    """ Runs the MonteCarlo agent on every position of a suite for every budget.
+
+    Parameters
+    ----------
+    suite: list
+        (moves, value, best) tuples (see load_suite)
+    budgets: tuple
+        iterations of the searches
+    settings: SearchSettings or None
+        options of the searches
+    seed: int
+        seed of every search
+
+    Returns
+    -------
+    results: list
+        one dict per budget with the iterations, the share of positions where a best move was chosen,
+        the CPU seconds per move and the playouts per CPU second
+    """
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    results = []
+    for budget in budgets:
+        correct = 0
+        t0 = time.process_time()
+        for moves, value, best in suite:
+            np.random.seed(seed)
+            board = moves_to_board(moves)
+            action, _ = montecarlo(board, player_to_move(board), None, PlayerAction(int(moves[-1])),
+                                   iterations=budget, settings=settings)
+            correct += int(action) in best
+        seconds = time.process_time() - t0
+
+        results.append({'iterations': budget, 'accuracy': correct / len(suite),
+                        'seconds_per_move': seconds / len(suite),
+                        'playouts_per_second': budget * len(suite) / seconds if seconds > 0 else 0.0})
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Accuracy of the MonteCarlo agent on solved positions.')
+    parser.add_argument('--budgets', type=int, nargs='+', default=[100, 400, 1600], help='iterations per move')
+    parser.add_argument('--suite', default=SUITE)
+    parser.add_argument('--limit', type=int, default=None, help='number of positions of the suite used')
+    parser.add_argument('--generate', type=int, default=None, metavar='COUNT',
+                        help='solves COUNT random positions and writes them to the suite instead')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='one JSON line per budget instead of a table')
+    args = parser.parse_args()
+
+    if args.generate is not None:
+        write_suite(generate_suite(args.generate, seed=args.seed), args.suite)
+    else:
+        positions = load_suite(args.suite)[:args.limit]
+        for result in accuracy(positions, args.budgets, seed=args.seed):
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{result['iterations']:6d} iterations: {100 * result['accuracy']:5.1f}% best moves, "
+                      f"{result['seconds_per_move']:.3f} CPU s/move, {result['playouts_per_second']:.0f} playouts/s")
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules whose import time is measured, each in a new interpreter
+MODULES = ['numpy', 'agents.common', 'agents.agent_Monte_Carlo.montecarlo_exec', 'main']
+
+# Run by a new interpreter: imports the agent and plays two moves, printing its timings as JSON
+_FIRST_MOVE = '''
+import json, time
+t0 = time.perf_counter()
+from agents.common import moves_to_board, PLAYER2
+from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo, warm_up
+t1 = time.perf_counter()
+if {warm}:
+    warm_up()
+t2 = time.perf_counter()
+montecarlo(moves_to_board('3'), PLAYER2, None, 3, iterations={iterations})
+t3 = time.perf_counter()
+montecarlo(moves_to_board('3'), PLAYER2, None, 3, iterations={iterations})
+t4 = time.perf_counter()
+print(json.dumps({{'imports': t1 - t0, 'warm_up': t2 - t1, 'first_move': t3 - t2, 'second_move': t4 - t3,
+                  'done': time.time()}}))
+'''
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=_ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def import_times(modules=MODULES, repeat=5):
+    """ Import time of every module in a new interpreter, the median of `repeat` processes.
+
+    Returns
+    -------
+    times: dict
+        seconds of the interpreter start ('python') and of the import of every module
+    """
+    times = {}
+    starts = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _run('pass')
+        starts.append(time.perf_counter() - t0)
+    times['python'] = statistics.median(starts)
+
+    for module in modules:
+        code = f'import time; t0 = time.perf_counter(); import {module}; print(time.perf_counter() - t0)'
+        times[module] = statistics.median(float(_run(code)) for _ in range(repeat))
+
+    return times
+
+
+def first_move(iterations=100, warm=False, repeat=5):
+    """ Time from the start of a new process to the first move of the MonteCarlo agent.
+
+    Parameters
+    ----------
+    iterations: int
+        iterations of every search
+    warm: bool
+        whether montecarlo_exec.warm_up is called before the first move
+    repeat: int
+        number of processes, the medians being kept
+
+    Returns
+    -------
+    times: dict
+        seconds of the imports, of the warm-up, of the first and second moves and from the start of the
+        process to the end of the first move ('to_first_move')
+    """
+    code = _FIRST_MOVE.format(warm=warm, iterations=iterations)
+    runs = []
+    for _ in range(repeat):
+        start = time.time()
+        run = json.loads(_run(code))
+        run['to_first_move'] = run.pop('done') - start - run['second_move']
+        runs.append(run)
+
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Import time and time to the first move of new processes.')
+    parser.add_argument('--iterations', type=int, default=100, help='MonteCarlo iterations per move')
+    parser.add_argument('--repeat', type=int, default=5, help='processes per measure, the median being kept')
+    parser.add_argument('--json', action='store_true', help='one JSON object instead of a table')
+    args = parser.parse_args()
+
+    results = {'imports': import_times(repeat=args.repeat),
+               'cold': first_move(args.iterations, False, args.repeat),
+               'warm': first_move(args.iterations, True, args.repeat)}
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for module, seconds in results['imports'].items():
+            print(f'import {module:45s} {1000 * seconds:8.1f} ms')
+        for name in ('cold', 'warm'):
+            times = results[name]
+            print(f"{name}: imports {1000 * times['imports']:.1f} ms, warm-up {1000 * times['warm_up']:.1f} ms, "
+                  f"first move {1000 * times['first_move']:.1f} ms, second move {1000 * times['second_move']:.1f} ms, "
+                  f"process start to first move {1000 * times['to_first_move']:.1f} ms")
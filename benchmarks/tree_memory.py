@@ -0,0 +1,66 @@
+import argparse
+import json
+import sys
+import numpy as np
+from agents.common import GameState, PLAYER1, PLAYER2, initialize_game_state, apply_player_action, check_end_state
+from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+from agents.agent_Monte_Carlo.memory import tree_memory, peak_rss
+
+
+def game_memory(iterations=1000, seed=0):
+    """ Plays a MonteCarlo vs MonteCarlo game, both players reusing their trees through establish_root.
+
+    Parameters
+    ----------
+    iterations: int
+        iterations of every search
+    seed: int
+        seed of the game
+
+    Returns
+    -------
+    records: list
+        one dict per move with the ply, the player, the memory of the tree kept by the player
+        (see memory.tree_memory) and the peak RSS of the process
+    """
+    np.random.seed(seed)
+    board = initialize_game_state()
+    saved_state = {PLAYER1: None, PLAYER2: None}
+    action = None
+    player = PLAYER1
+    end_state = GameState.STILL_PLAYING
+    records = []
+
+    while end_state == GameState.STILL_PLAYING:
+        action, saved_state[player] = montecarlo(board.copy(), player, saved_state[player], action,
+                                                 iterations=iterations)
+        # The root of the search stays reachable from the saved state until the next move
+        kept = saved_state[player].parent or saved_state[player]
+        record = {'ply': len(records) + 1, 'player': int(player)}
+        record.update(tree_memory(kept))
+        record['peak_rss'] = peak_rss()
+        records.append(record)
+
+        apply_player_action(board, action, player)
+        end_state = check_end_state(board, player, action)
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Memory of the MonteCarlo trees kept during a game.')
+    parser.add_argument('--iterations', type=int, default=1000, help='MonteCarlo iterations per move')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='one JSON line per move instead of a table')
+    args = parser.parse_args()
+
+    records = game_memory(args.iterations, args.seed)
+    for record in records:
+        if args.json:
+            print(json.dumps(record))
+        else:
+            print(f"ply {record['ply']:2d} player {record['player']}: {record['nodes']:7d} nodes "
+                  f"{record['bytes'] / 2 ** 20:8.2f} MiB ({record['bytes_per_node']:.0f} B/node), "
+                  f"peak RSS {record['peak_rss'] / 2 ** 20:.1f} MiB")
+    print(f"largest tree: {max(record['bytes'] for record in records) / 2 ** 20:.2f} MiB", file=sys.stderr)
@@ -1,7 +1,9 @@
 import numpy as np
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from typing import Callable
-from agents.common import PlayerAction, BoardPiece, SavedState, GenMove
+from agents.common import PlayerAction, BoardPiece, SavedState, GenMove, GameConfig, DEFAULT_CONFIG
+if TYPE_CHECKING:  # Only imported by the callers that record telemetry
+    from agents.telemetry import Telemetry
 # from agents.agents_random.random import generate_move_random
 from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
 
@@ -25,6 +27,8 @@ def human_vs_agent(
         args_2: tuple = (),
         init_1: Callable = lambda board, player: None,
         init_2: Callable = lambda board, player: None,
+        config: GameConfig = DEFAULT_CONFIG,
+        telemetry: Optional['Telemetry'] = None,
 ):
     import time
     from agents.common import PLAYER1, PLAYER2, PLAYER1_PRINT, PLAYER2_PRINT, GameState
@@ -34,10 +38,10 @@ def human_vs_agent(
     players = (PLAYER1, PLAYER2)
     for play_first in (1, -1):
         for init, player in zip((init_1, init_2)[::play_first], players):
-            init(initialize_game_state(), player)
+            init(initialize_game_state(config), player)
 
         saved_state = {PLAYER1: None, PLAYER2: None}
-        board = initialize_game_state()
+        board = initialize_game_state(config)
         gen_moves = (generate_move_1, generate_move_2)[::play_first]
         player_names = (player_1, player_2)[::play_first]
         gen_args = (args_1, args_2)[::play_first]
@@ -46,6 +50,8 @@ def human_vs_agent(
         else:
             machine_player = PLAYER2
 
+        game = None if telemetry is None else telemetry.new_game()
+        ply = 0
         playing = True
 
         while playing:
@@ -66,9 +72,14 @@ def human_vs_agent(
                 else:
                     action, saved_state[player] = gen_move(
                         board.copy(), player, saved_state[player])
-                print(f"Move time: {time.time() - t0:.3f}s")
+                seconds = time.time() - t0
+                print(f"Move time: {seconds:.3f}s")
+                if telemetry is not None:
+                    telemetry.record_move(game, ply, player_name, action, seconds, saved_state[player],
+                                          player=int(player))
+                ply += 1
                 apply_player_action(board, action, player)
-                end_state = check_end_state(board, player)
+                end_state = check_end_state(board, player, connect=config.connect)
                 if end_state != GameState.STILL_PLAYING:
                     print(pretty_print_board(board))
                     if end_state == GameState.IS_DRAW:
@@ -80,6 +91,9 @@ def human_vs_agent(
                     playing = False
                     break
 
+    if telemetry is not None:
+        telemetry.flush()
+
 
 if __name__ == "__main__":
     # human_vs_agent(montecarlo,generate_move_random)
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from agents.common import encode_board
+
+
+class DecisionCache:
+    """ Class used to share the recent decisions of the MonteCarlo agent between the sessions of the server.
+
+       A decision is keyed by the position (see encode_board), the player to move and the time given to
+       the search, and holds the chosen move, the subtree of the chosen node serialized with dumps_tree and
+       the visits and wins of every child of the root. When another session reaches the same position with
+       the same budget, the decision is played again instead of being searched. The least recently used
+       decision is evicted when more than `max_entries` are kept, and decisions older than `max_age`
+       seconds are never returned.
+
+       Attributes:
+           max_entries : Number of decisions kept.
+           max_age : Seconds during which a decision is returned.
+           hits : Lookups answered by a decision.
+           misses : Lookups of unknown or expired positions.
+           expired : Decisions dropped because they were older than max_age.
+           evictions : Decisions dropped to keep at most max_entries.
+    """
+    def __init__(self, max_entries: int = 1024, max_age: float = 300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(board, player, budget):
+        return int(encode_board(board)), int(player), budget
+
+    def get(self, board, player, budget):
+        """ Recent decision for a position.
+
+        Parameters
+        ----------
+        board: np.array
+            state of the board (matrix)
+        player: BoardPiece
+            player to move
+        budget: float
+            seconds given to the search
+
+        Returns
+        -------
+        decision: tuple or None
+            (action, tree, stats) as given to put, None if the position was not searched within max_age
+        """
+        key = self._key(board, player, budget)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[0] > self.max_age:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, board, player, budget, action, tree, stats):
+        """ Stores the decision of a search, evicting the least recently used one if the cache is full.
+
+        Parameters
+        ----------
+        board: np.array
+            state of the searched board (matrix)
+        player: BoardPiece
+            player to move
+        budget: float
+            seconds given to the search
+        action: PlayerAction
+            chosen action
+        tree: bytes
+            subtree of the chosen node, serialized with dumps_tree
+        stats: dict
+            visits and wins of every child of the root, by column (see service.server.root_stats)
+        """
+        if self.max_entries <= 0:
+            return
+        key = self._key(board, player, budget)
+        with self._lock:
+            self._entries[key] = (self._clock(), (action, tree, stats))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def hit_rate(self):
+        """Share of the lookups answered by a decision, None before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else None
+
+    def stats(self) -> dict:
+        """Counters of the cache, as reported by GET /stats of the server."""
+        return {'entries': len(self), 'max_entries': self.max_entries, 'max_age': self.max_age,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'expired': self.expired, 'evictions': self.evictions}
@@ -0,0 +1,128 @@
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+
+
+def request(url, method='GET', body=None):
+    """Sends a JSON request and returns the HTTP status and the decoded answer."""
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as answer:
+            return answer.status, json.loads(answer.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read() or b'{}')
+
+
+def percentile(latencies, q):
+    """Percentile `q` of the latencies, None if there are none."""
+    if len(latencies) == 0:
+        return None
+    return float(np.percentile(latencies, q))
+
+
+class Player(threading.Thread):
+    """ Class used to simulate a human player playing random moves against the server.
+
+       Attributes:
+           latencies : Seconds taken by each answered move request.
+           rejected : Number of move requests refused because the server was busy.
+           games : Number of finished games.
+    """
+    def __init__(self, url, games, train_time, seed):
+        super().__init__(daemon=True)
+        self.url = url
+        self.n_games = games
+        self.train_time = train_time
+        self.rng = np.random.default_rng(seed)
+        self.latencies = []
+        self.rejected = 0
+        self.errors = 0
+        self.games = 0
+
+    def run(self):
+        for _ in range(self.n_games):
+            self.play_game()
+
+    def play_game(self):
+        status, game = request(self.url + '/games', 'POST', {
+            'agent_first': bool(self.rng.integers(2)), 'train_time': self.train_time})
+        while status == 503:
+            self.rejected += 1
+            time.sleep(0.1)
+            status, game = request(self.url + '/games', 'POST', {
+                'agent_first': bool(self.rng.integers(2)), 'train_time': self.train_time})
+        if status != 201:
+            self.errors += 1
+            return
+
+        moves_url = f"{self.url}/games/{game['game_id']}/moves"
+        while game['state'] == 'still_playing':
+            board = np.array(game['board'])
+            column = int(self.rng.choice(np.flatnonzero(board[0] == 0)))
+            t0 = time.perf_counter()
+            status, answer = request(moves_url, 'POST', {'column': column})
+            if status == 503:
+                self.rejected += 1
+                time.sleep(0.1)
+                continue
+            if status != 200:
+                self.errors += 1
+                break
+            self.latencies.append(time.perf_counter() - t0)
+            game = answer
+
+        request(f"{self.url}/games/{game['game_id']}", 'DELETE')
+        self.games += 1
+
+
+def run_load(url, players, games, train_time=1, seed=0):
+    """Simulates `players` concurrent players, each of them playing `games` games.
+
+    Returns
+    -------
+    report: dict
+        move latency percentiles (seconds), number of answered and rejected moves and throughput
+    """
+    simulated = [Player(url, games, train_time, seed + i) for i in range(players)]
+    t0 = time.perf_counter()
+    for player in simulated:
+        player.start()
+    for player in simulated:
+        player.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies = [latency for player in simulated for latency in player.latencies]
+
+    return {
+        'players': players,
+        'games': sum(player.games for player in simulated),
+        'moves': len(latencies),
+        'rejected': sum(player.rejected for player in simulated),
+        'errors': sum(player.errors for player in simulated),
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies) if latencies else None,
+        'moves_per_second': len(latencies) / elapsed,
+        'elapsed': elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load generator for the game server.')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--players', type=int, default=8, help='concurrent simulated players')
+    parser.add_argument('--games', type=int, default=1, help='games played by each player')
+    parser.add_argument('--train-time', type=float, default=1, help='seconds per agent move')
+    args = parser.parse_args()
+
+    report = run_load(args.url, args.players, args.games, args.train_time)
+    print(f"{report['players']} players, {report['games']} games, {report['moves']} moves "
+          f"({report['rejected']} rejected, {report['errors']} errors) in {report['elapsed']:.1f}s")
+    if report['moves']:
+        print(f"Move latency: p50 {report['p50']:.3f}s, p99 {report['p99']:.3f}s, max {report['max']:.3f}s, "
+              f"{report['moves_per_second']:.2f} moves/s")
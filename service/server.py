@@ -0,0 +1,360 @@
+import argparse
+import json
+import math
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from agents.common import PlayerAction, GameState, PLAYER1, PLAYER2
+from agents.common import initialize_game_state, apply_player_action, check_end_state
+from agents.agent_Monte_Carlo.montecarlo import change_player, column_free
+from service.decision_cache import DecisionCache
+
+
+class PoolBusy(Exception):
+    """Raised when the search pool has no room left for another search."""
+
+
+def root_stats(saved_state) -> dict:
+    """Visits and wins of every child of the searched root, by column, given the chosen node."""
+    root = saved_state.parent
+    if root is None:  # First move of the game, chosen without search
+        return {}
+    return {move: (children.total_games, children.wins) for move, children in root.children_by_column().items()}
+
+
+def search_move(board, player, tree, last_action, train_time):
+    """Runs the MonteCarlo agent for one move inside a worker process.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player that performs the MonteCarlo algorithm
+    tree: bytes or None
+        tree kept by the session since the previous move, serialized with dumps_tree
+    last_action: PlayerAction or None
+        action performed by the other player in previous turn
+    train_time: int
+        time devoted for the MonteCarlo algorithm
+
+    Returns
+    -------
+    action: PlayerAction
+        selected action for the game
+    tree: bytes
+        subtree of the chosen node, serialized with dumps_tree
+    stats: dict
+        visits and wins of every child of the root, by column (see root_stats)
+    """
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agent_Monte_Carlo.tree_io import dumps_tree, loads_tree
+
+    saved_state = None if tree is None else loads_tree(tree)
+    action, saved_state = montecarlo(board, player, saved_state, last_action, train_time)
+
+    return action, dumps_tree(saved_state), root_stats(saved_state)
+
+
+class SearchPool:
+    """ Class used to send searches to a bounded pool of worker processes.
+
+       At most `workers` searches run at the same time and at most `queue_size` more wait for
+       a free worker. Any further search is refused with PoolBusy instead of being queued, so
+       that a loaded server answers quickly rather than letting every move go past its time.
+
+       Attributes:
+           workers : Number of worker processes.
+           queue_size : Number of searches allowed to wait for a worker.
+    """
+    def __init__(self, workers: int = None, queue_size: int = 16):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.workers = self.executor._max_workers
+        self.queue_size = queue_size
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of searches running or waiting for a worker."""
+        return self._pending
+
+    def submit(self, fn, *args):
+        """Sends `fn(*args)` to a worker and waits for its result.
+
+        Raises PoolBusy if the pool and its queue are full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolBusy()
+
+        with self._lock:
+            self._pending += 1
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class GameSession:
+    """ Class used to store one game hosted by the server.
+
+       Attributes:
+           game_id : Identifier of the game.
+           board : Current state of the board.
+           agent_player : Piece of the MonteCarlo agent.
+           saved_state : Tree kept by the agent between moves, serialized with dumps_tree.
+           last_action : Last action performed in the game.
+           state : State of the game.
+           winner : Piece of the winner, if any.
+    """
+    def __init__(self, agent_player, train_time):
+        self.game_id = uuid.uuid4().hex
+        self.board = initialize_game_state()
+        self.agent_player = agent_player
+        self.train_time = train_time
+        self.saved_state = None
+        self.last_action = None
+        self.state = GameState.STILL_PLAYING
+        self.winner = None
+        self.lock = threading.Lock()
+
+    def play(self, action, player):
+        """Applies `action` of `player` to the board and updates the state of the game."""
+        apply_player_action(self.board, action, player)
+        self.last_action = action
+        self.state = check_end_state(self.board, player, action)
+        if self.state == GameState.IS_WIN:
+            self.winner = player
+
+    def to_json(self) -> dict:
+        return {
+            'game_id': self.game_id,
+            'board': self.board.tolist(),
+            'agent_player': int(self.agent_player),
+            'state': self.state.name.lower(),
+            'winner': None if self.winner is None else int(self.winner),
+        }
+
+
+class GameServer(ThreadingHTTPServer):
+    """ Class used to serve the games over HTTP/JSON.
+
+       Every request is handled in its own thread, which blocks while the search pool computes
+       the agent's move. Sessions, including their compactly serialized MonteCarlo trees, live in
+       this process, as does the cache of the decisions shared by all the sessions.
+
+       Attributes:
+           pool : Pool of workers running the searches.
+           sessions : Games hosted, by identifier.
+           train_time : Time devoted by the agent to each move.
+           max_train_time : Largest time per move a game may ask for.
+           cache : Recent decisions of the agent, played again in the same positions (None to search every move).
+    """
+    daemon_threads = True
+
+    def __init__(self, address, pool: SearchPool, train_time: float = 1, cache: DecisionCache = None,
+                 max_train_time: float = 10):
+        super().__init__(address, GameRequestHandler)
+        self.pool = pool
+        self.train_time = train_time
+        self.max_train_time = max_train_time
+        self.cache = cache
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+
+    def agent_move(self, session: GameSession):
+        """Plays the agent's move in `session`, from the cache if the position was searched recently,
+        otherwise asked to the pool."""
+        decision = None
+        if self.cache is not None:
+            decision = self.cache.get(session.board, session.agent_player, session.train_time)
+        if decision is None:
+            decision = self.pool.submit(
+                search_move, session.board.copy(), session.agent_player, session.saved_state,
+                session.last_action, session.train_time
+            )
+            if self.cache is not None:
+                self.cache.put(session.board, session.agent_player, session.train_time, *decision)
+
+        action, session.saved_state, _ = decision
+        session.play(PlayerAction(action), session.agent_player)
+
+        return action
+
+
+class GameRequestHandler(BaseHTTPRequestHandler):
+    """Handler of the requests of the GameServer.
+
+    POST /games             {"agent_first": bool, "train_time": float}, creates a game, train_time being
+                            at most the max_train_time of the server
+    GET /games/<id>         state of a game
+    POST /games/<id>/moves  {"column": int}, plays the human move and returns the agent's one
+    DELETE /games/<id>      ends a game
+    GET /stats              number of games, of pending searches and counters of the decision cache
+    """
+    server: GameServer
+    game_path = re.compile(r'^/games/([0-9a-f]+)(/moves)?$')
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 503:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length == 0:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError('the body is not a JSON object')
+        return body
+
+    def find_session(self):
+        match = self.game_path.match(self.path)
+        if match is None:
+            return None, None
+        with self.server.sessions_lock:
+            return self.server.sessions.get(match.group(1)), match.group(2)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.send_json(200, {'games': len(self.server.sessions), 'pending_searches': self.server.pool.pending,
+                                 'workers': self.server.pool.workers, 'queue_size': self.server.pool.queue_size,
+                                 'decision_cache': None if self.server.cache is None else self.server.cache.stats()})
+            return
+
+        session, moves = self.find_session()
+        if session is None or moves:
+            self.send_json(404, {'error': 'not found'})
+        else:
+            self.send_json(200, session.to_json())
+
+    def do_DELETE(self):
+        session, moves = self.find_session()
+        if session is None or moves:
+            self.send_json(404, {'error': 'not found'})
+            return
+        with self.server.sessions_lock:
+            self.server.sessions.pop(session.game_id, None)
+        self.send_json(200, {'game_id': session.game_id})
+
+    def do_POST(self):
+        try:
+            body = self.read_json()
+        except ValueError:
+            self.send_json(400, {'error': 'invalid JSON'})
+            return
+
+        if self.path == '/games':
+            self.create_game(body)
+            return
+
+        session, moves = self.find_session()
+        if session is None or not moves:
+            self.send_json(404, {'error': 'not found'})
+        else:
+            self.human_move(session, body)
+
+    def create_game(self, body):
+        agent_first = bool(body.get('agent_first', False))
+        train_time = body.get('train_time', self.server.train_time)
+        if isinstance(train_time, bool) or not isinstance(train_time, (int, float)) \
+                or not 0 < train_time <= self.server.max_train_time or not math.isfinite(train_time):
+            self.send_json(400, {'error': 'invalid train_time'})
+            return
+        session = GameSession(PLAYER1 if agent_first else PLAYER2, train_time)
+
+        agent_action = None
+        if agent_first:
+            try:
+                agent_action = self.server.agent_move(session)
+            except PoolBusy:
+                self.send_json(503, {'error': 'server busy'})
+                return
+
+        with self.server.sessions_lock:
+            self.server.sessions[session.game_id] = session
+        self.send_json(201, dict(session.to_json(), agent_move=None if agent_action is None else int(agent_action)))
+
+    def human_move(self, session: GameSession, body):
+        if not session.lock.acquire(blocking=False):
+            self.send_json(409, {'error': 'a move of this game is already being played'})
+            return
+        try:
+            status, answer = self.play_moves(session, body.get('column'))
+        finally:
+            # Released before answering, so the client may send its next move right away.
+            session.lock.release()
+        self.send_json(status, answer)
+
+    def play_moves(self, session: GameSession, column):
+        """Plays the human move in `column` and the agent's answer, returning the HTTP answer."""
+        if session.state != GameState.STILL_PLAYING:
+            return 409, {'error': 'game is over'}
+        if isinstance(column, bool) or not isinstance(column, int) or not 0 <= column < session.board.shape[1] \
+                or not column_free(session.board, column):
+            return 400, {'error': 'invalid column'}
+
+        board_before = session.board.copy()
+        last_action_before = session.last_action
+        session.play(PlayerAction(column), change_player(session.agent_player))
+
+        agent_action = None
+        if session.state == GameState.STILL_PLAYING:
+            try:
+                agent_action = self.server.agent_move(session)
+            except PoolBusy:
+                # The human move is undone so that it can be sent again later.
+                session.board = board_before
+                session.last_action = last_action_before
+                return 503, {'error': 'server busy'}
+
+        return 200, dict(session.to_json(), agent_move=None if agent_action is None else int(agent_action))
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: int = None, queue_size: int = 16,
+          train_time: float = 1, cache_size: int = 1024, cache_age: float = 300, max_train_time: float = 10):
+    """Serves games until interrupted, without decision cache if `cache_size` is 0."""
+    pool = SearchPool(workers, queue_size)
+    cache = DecisionCache(cache_size, cache_age) if cache_size > 0 else None
+    server = GameServer((host, port), pool, train_time, cache, max_train_time)
+    print(f'Serving on http://{host}:{server.server_address[1]} with {pool.workers} workers')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Localhost HTTP/JSON server of MonteCarlo games.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--queue-size', type=int, default=16, help='searches allowed to wait for a worker')
+    parser.add_argument('--train-time', type=float, default=1, help='seconds per agent move')
+    parser.add_argument('--max-train-time', type=float, default=10, help='largest seconds per move a game may ask for')
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help='recent decisions shared between the games (0 to search every move)')
+    parser.add_argument('--cache-age', type=float, default=300, help='seconds during which a decision is reused')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.queue_size, args.train_time, args.cache_size, args.cache_age,
+          args.max_train_time)
@@ -0,0 +1,79 @@
+import io
+import json
+import numpy as np
+from agents.common import BoardPiece, PlayerAction, initialize_game_state, apply_player_action, pretty_print_board
+
+
+def test_read_positions():
+    from tools.analyze import read_positions
+    from agents.common import moves_to_board
+
+    board = moves_to_board('3342')
+
+    lines = ['# comment', '3342', ''] + pretty_print_board(board).splitlines() + ['33']
+    boards = list(read_positions(lines))
+
+    assert len(boards) == 3
+    assert np.all(boards[0] == board)
+    assert np.all(boards[1] == board)
+    assert boards[1].dtype == BoardPiece
+    assert np.sum(boards[2] != 0) == 2
+
+
+def test_analyse_symmetric():
+    from tools.analyze import analyse
+
+    result = analyse((0, initialize_game_state(), 'montecarlo', 60))
+    # Only the columns 0 to 3 of the empty board are searched, the others are their mirror images
+    assert result['visits'] == result['visits'][::-1]
+    assert result['values'] == result['values'][::-1]
+    assert all(value is not None for value in result['values'])
+
+
+def test_analyse():
+    from tools.analyze import analyse
+
+    board = initialize_game_state()
+    for col in (0, 6, 0, 6, 0, 6):
+        apply_player_action(board, PlayerAction(col), BoardPiece(1) if col == 0 else BoardPiece(2))
+
+    result = analyse((0, board, 'montecarlo', 50))
+    assert result['player'] == 1
+    # Winning move, found by the expansion. Every other column but 6 lets the opponent win at once.
+    assert result['values'][0] == 1
+    assert all(value == 0 for value in result['values'][1:6] if value is not None)
+    assert sum(result['visits']) == 50
+    assert result['nodes'] > 7
+
+    result = analyse((1, board, 'solver', 1000))
+    assert result['best_move'] is None  # Out of budget.
+    assert result['nodes'] == 1001
+
+    apply_player_action(board, PlayerAction(0), BoardPiece(1))
+    assert analyse((2, board, 'montecarlo', 50))['error'] == 'game is over'
+
+    board = np.array([[0, 2, 2, 0, 1, 2, 2],
+                      [2, 1, 1, 2, 1, 2, 2],
+                      [2, 2, 1, 1, 1, 2, 2],
+                      [2, 1, 2, 2, 2, 1, 1],
+                      [1, 2, 1, 1, 1, 2, 2],
+                      [1, 1, 2, 1, 2, 1, 2]], dtype=BoardPiece)
+    result = analyse((3, board, 'solver', 1000))
+    assert result['player'] == 2
+    assert result['best_move'] == 0  # Completes the column 0.
+    assert result['values'] == [1, None, None, 0, None, None, None]
+
+
+def test_analyse_file(tmp_path):
+    from tools.analyze import analyse_file
+
+    positions = tmp_path / 'positions.txt'
+    positions.write_text('3\n33\n3342\n0101\n')
+    output = io.StringIO()
+
+    count = analyse_file(str(positions), output, 'montecarlo', 30, workers=2)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert count == 4
+    assert sorted(result['record'] for result in results) == [0, 1, 2, 3]
+    assert all(0 <= result['best_move'] < 7 for result in results)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import numpy as np
+from agents.common import BoardPiece, PlayerAction, GameState, initialize_game_state
+
+
+def test_make_async():
+    from agents.async_agent import make_async
+
+    def slow_move(board, player, saved_state):
+        time.sleep(0.2)  # Blocking agent
+        return PlayerAction(0), saved_state
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.ensure_future(heartbeat())
+        # Waiting agent, defined in this function: it cannot be sent to the process pool
+        slow_move_async = make_async(slow_move, cpu_bound=False)
+        action, saved_state = await slow_move_async(initialize_game_state(), BoardPiece(1), None)
+        beat.cancel()
+        return action, saved_state, ticks
+
+    action, saved_state, ticks = asyncio.run(run())
+
+    assert action == PlayerAction(0)
+    assert saved_state is None
+    assert ticks > 5  # The event loop kept running while the agent was thinking.
+
+
+def test_agent_session():
+    from agents.async_agent import AgentSession
+
+    def counting_move(board, player, saved_state, last_action):
+        count = 0 if saved_state is None else saved_state
+        return PlayerAction(count % board.shape[1]), count + 1
+
+    async def run():
+        session = AgentSession(counting_move, BoardPiece(1), needs_last_action=True, cpu_bound=False)
+        board = initialize_game_state()
+        actions = [await session.move(board, None) for _ in range(3)]
+        return session, board, actions
+
+    session, board, actions = asyncio.run(run())
+
+    assert actions == [0, 1, 2]
+    assert session.saved_state == 3  # Kept across awaits.
+    assert np.all(board == 0)  # The board given to the session is not modified.
+
+
+def test_agent_vs_agent_async():
+    from agents.async_agent import AgentSession, agent_vs_agent_async
+    from agents.agents_random.random import generate_move_random
+
+    async def run():
+        games = [agent_vs_agent_async(AgentSession(generate_move_random, BoardPiece(1)),
+                                      AgentSession(generate_move_random, BoardPiece(2))) for _ in range(8)]
+        return await asyncio.gather(*games)
+
+    results = asyncio.run(run())
+
+    assert len(results) == 8
+    for board, end_state, winner in results:
+        assert end_state in (GameState.IS_WIN, GameState.IS_DRAW)
+        assert (winner is None) == (end_state == GameState.IS_DRAW)
+
+
+def test_shared_process_pool():
+    import functools
+    from concurrent.futures import ProcessPoolExecutor
+    from agents.async_agent import AgentSession, shared_executor
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agent_Monte_Carlo.tree_io import loads_tree
+    from agents.common import apply_player_action
+
+    assert isinstance(shared_executor(), ProcessPoolExecutor)
+    assert shared_executor() is shared_executor()
+
+    async def run():
+        session = AgentSession(functools.partial(montecarlo, iterations=50), BoardPiece(2), needs_last_action=True)
+        board = initialize_game_state()
+        board[5, 3] = BoardPiece(1)
+        action = await session.move(board, PlayerAction(3))
+        tree = session.saved_state
+        apply_player_action(board, action, BoardPiece(2))
+        apply_player_action(board, PlayerAction(0), BoardPiece(1))
+        return session, action, tree, await session.move(board, PlayerAction(0))
+
+    session, action, tree, second = asyncio.run(run())
+
+    assert 0 <= action < 7 and 0 <= second < 7
+    # The tree searched in the worker process came back serialized, and was searched again at the next move
+    assert isinstance(tree, bytes) and isinstance(session.saved_state, bytes)
+    root = loads_tree(tree)
+    assert root.move == action and root.child is not None
+    assert loads_tree(session.saved_state).move == second
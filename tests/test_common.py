@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 from agents.common import GameState, BoardPiece,PlayerAction
 
 NO_PLAYER = BoardPiece(0)  # board[i, j] == NO_PLAYER where the position is empty
@@ -66,6 +67,37 @@ def test_connected_four():
     board = initialize_game_state()
     board[2:6, 0] = PLAYER2
     assert connected_four(board, PLAYER2)
+
+def test_game_config():
+    import pytest
+    from agents.common import GameConfig, DEFAULT_CONFIG, initialize_game_state, moves_to_board
+    from agents.common import string_to_board, pretty_print_board
+
+    assert DEFAULT_CONFIG == GameConfig(6, 7, 4) and DEFAULT_CONFIG.center == 3
+    config = GameConfig(8, 9, 5)
+    assert initialize_game_state(config).shape == (8, 9)
+    assert config.center == 4 and GameConfig(10, 10, 5).center == 4
+    with pytest.raises(ValueError):
+        GameConfig(4, 4, 5)
+
+    board = moves_to_board([8, 0, 8], config)
+    assert board.shape == (8, 9) and board[7, 8] == PLAYER1 and board[6, 8] == PLAYER1
+    assert np.array_equal(string_to_board(pretty_print_board(board)), board)
+
+
+def test_connected_four_connect():
+    from agents.common import GameConfig, connected_four, check_end_state, initialize_game_state
+
+    board = initialize_game_state(GameConfig(8, 9, 5))
+    board[7, 2:6] = PLAYER1
+    assert connected_four(board, PLAYER1)
+    assert not connected_four(board, PLAYER1, connect=5)
+    assert not connected_four(board, PLAYER1, PlayerAction(5), connect=5)
+    board[7, 6] = PLAYER1
+    assert connected_four(board, PLAYER1, connect=5)
+    assert connected_four(board, PLAYER1, PlayerAction(6), connect=5)
+    assert check_end_state(board, PLAYER1, PlayerAction(6), connect=5) == GameState.IS_WIN
+
 
 def test_check_end_state():
     from agents.common import check_end_state, initialize_game_state
@@ -82,3 +114,134 @@ def test_check_end_state():
                       [1, 1, 2, 1, 2, 1, 2]])
 
     assert check_end_state(board,PLAYER1) == GameState.IS_DRAW
+
+
+def test_string_to_board():
+    from agents.common import pretty_print_board, string_to_board, initialize_game_state, apply_player_action
+
+    board = initialize_game_state()
+    for column, player in ((3, PLAYER1), (3, PLAYER2), (4, PLAYER1), (0, PLAYER2)):
+        apply_player_action(board, PlayerAction(column), player)
+
+    board_out = string_to_board(pretty_print_board(board))
+
+    assert board_out.dtype == BoardPiece
+    assert np.all(board_out == board)
+
+
+def test_pretty_print_boards():
+    from agents.common import pretty_print_board, pretty_print_boards, strings_to_boards
+
+    boards = np.random.default_rng(0).integers(0, 3, size=(5, 6, 7)).astype(BoardPiece)
+    boards_str = pretty_print_boards(boards)
+
+    assert boards_str == [pretty_print_board(board) for board in boards]
+    assert np.all(strings_to_boards(boards_str) == boards)
+
+    # Boards of other shapes, or truncated ones, are refused
+    with pytest.raises(ValueError):
+        strings_to_boards([boards_str[0], pretty_print_board(boards[0, 1:])])
+    lines = boards_str[1].split('\n')
+    lines[2] = lines[2][:-3] + '|'  # A row with a missing cell
+    with pytest.raises(ValueError):
+        strings_to_boards([boards_str[0], '\n'.join(lines)])
+
+
+def test_moves_to_board():
+    from agents.common import moves_to_board, moves_to_boards
+
+    board = moves_to_board('3342')
+
+    assert board[5, 3] == PLAYER1 and board[4, 3] == PLAYER2
+    assert board[5, 4] == PLAYER1 and board[5, 2] == PLAYER2
+    assert np.sum(board != NO_PLAYER) == 4
+    assert moves_to_boards(['', '3342']).shape == (2, 6, 7)
+
+    with pytest.raises(ValueError):
+        moves_to_board('0000000')  # Seventh piece in a column of six
+    with pytest.raises(ValueError):
+        moves_to_boards(['33', '37'])  # No column 7
+
+
+def test_encode_decode_board():
+    from agents.common import encode_board, decode_key, moves_to_boards
+
+    boards = moves_to_boards(['', '3', '33', '3342', '0123456' * 5])
+    keys = encode_board(boards)
+
+    assert keys.dtype == np.uint64
+    assert len(set(keys.tolist())) == len(boards)
+    assert np.all(decode_key(keys) == boards)
+    for board, key in zip(boards, keys):
+        assert encode_board(board) == key
+        assert np.all(decode_key(key) == board)
+
+
+def test_winning_lines():
+    from agents.common import winning_lines
+
+    lines = winning_lines()
+
+    assert lines.shape == (69, 4)
+    assert len({tuple(line) for line in lines}) == 69
+    assert [0, 1, 2, 3] in lines.tolist()  # Horizontal
+    assert [0, 7, 14, 21] in lines.tolist()  # Vertical
+    assert [3, 9, 15, 21] in lines.tolist()  # Diagonal
+    assert winning_lines(8, 9, 5).shape[1] == 5
+
+
+def test_mirror_board():
+    from agents.common import mirror_board, is_symmetric, canonical_key, encode_board, moves_to_board
+
+    board = moves_to_board('01')
+    mirrored = moves_to_board('65')
+    assert np.array_equal(mirror_board(board), mirrored)
+    assert not is_symmetric(board)
+    assert is_symmetric(moves_to_board('3333'))
+    assert canonical_key(board) == canonical_key(mirrored) == min(encode_board(board), encode_board(mirrored))
+
+    keys = canonical_key(np.stack([board, mirrored]))
+    assert keys[0] == keys[1]
+
+
+def test_cell_lines():
+    from agents.common import winning_lines, cell_lines
+
+    lines = winning_lines()
+    table = cell_lines()
+
+    assert table.shape[0] == 42
+    assert np.sum(table[0] >= 0) == 3  # A corner is in one line of each direction but the other diagonal
+    assert np.sum(table[3 * 7 + 3] >= 0) == 13
+    for cell in range(42):
+        assert all(cell in lines[index] for index in table[cell] if index >= 0)
+
+
+def test_cell_windows():
+    from agents.common import winning_lines, cell_lines, cell_windows
+
+    windows = cell_windows()
+    assert len(windows) == 42
+    for cell in range(42):
+        expected = winning_lines()[cell_lines()[cell][cell_lines()[cell] >= 0]].tolist()
+        assert [list(line) for line in windows[cell]] == expected
+
+
+def test_connected_four_last_action():
+    from agents.common import connected_four, check_end_state, initialize_game_state, apply_player_action
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        board = initialize_game_state()
+        player = PLAYER1
+        state = GameState.STILL_PLAYING
+        while state == GameState.STILL_PLAYING:
+            action = PlayerAction(rng.choice(np.flatnonzero(board[0] == 0)))
+            apply_player_action(board, action, player)
+            # Until the first win, the lines through the last piece tell as much as all the lines
+            assert connected_four(board, player, action) == connected_four(board, player)
+            state = check_end_state(board, player, action)
+            assert state == check_end_state(board, player)
+            player = PLAYER2 if player == PLAYER1 else PLAYER1
+
+    assert not connected_four(initialize_game_state(), PLAYER1, PlayerAction(3))  # Empty column
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def test_latency_report():
+    from benchmarks.deadlines import latency_report
+
+    report = latency_report([0.09, 0.1, 0.12, 0.095], 0.1)
+    assert report['moves'] == 4
+    assert report['latency_max'] == 0.12
+    assert np.isclose(report['overshoot_max'], 0.02)
+    assert report['latency_p50'] <= report['latency_p95'] <= report['latency_p99'] <= report['latency_max']
+    assert report['late'] == 0.25
+
+
+def test_run_variant():
+    from benchmarks.deadlines import run_variant
+    from benchmarks.solved_positions import load_suite
+
+    positions = [moves for moves, _, _ in load_suite()[:2]]
+    for variant in ('single', 'parallel', 'loaded'):
+        latencies = run_variant(variant, positions, 0.05, workers=2, load=1)
+        assert len(latencies) == 2
+        assert all(0.02 < latency < 1 for latency in latencies)
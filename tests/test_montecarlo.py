@@ -1,6 +1,7 @@
 import numpy as np
 from agents.common import BoardPiece, PlayerAction, initialize_game_state, apply_player_action
 import time
+import pytest
 
 
 # Montecarlo
@@ -194,3 +195,663 @@ def test_blank_board():
     assert root.parent is None
     assert root.move == PlayerAction(3)
     assert root.turn_player == BoardPiece(1)
+
+    # The root is symmetric, so the replies in the columns 4 to 6 are the mirror of those in 0 to 2
+    assert sorted(int(children.move) for children in root.child) == [0, 1, 2, 3]
+    child = root.opponent_choice(PlayerAction(5))
+    assert child.move == PlayerAction(5) and child.parent is root
+    board = root.board.copy()
+    apply_player_action(board, PlayerAction(5), BoardPiece(2))
+    assert np.all(child.board == board)
+    assert child.total_games == root.opponent_choice(PlayerAction(1)).total_games
+
+
+def test_run_iterations():
+    from agents.agent_Monte_Carlo.montecarlo_exec import establish_root, run_iterations, best_move
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    root = establish_root(board, BoardPiece(1), None, PlayerAction(3))
+
+    run_iterations(root, BoardPiece(1), 50)
+    assert root.total_games == 50
+    run_iterations(root, BoardPiece(1), 25)  # The search is resumed on the same tree.
+    assert root.total_games == 75
+
+    action, saved_state = best_move(root)
+    assert saved_state.parent is root
+    assert action == saved_state.move
+
+
+def test_montecarlo_iterations():
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=100)
+
+    assert 0 <= action < 7
+    assert saved_state.parent.total_games == 100
+
+
+# Scheduler
+def test_search_scheduler():
+    from agents.agent_Monte_Carlo.scheduler import SearchScheduler
+
+    scheduler = SearchScheduler(slice_iterations=10)
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+
+    late = scheduler.submit(board.copy(), BoardPiece(1), None, PlayerAction(3), train_time=60, max_iterations=30)
+    early = scheduler.submit(board.copy(), BoardPiece(1), None, PlayerAction(3), train_time=30, max_iterations=30)
+    first = scheduler.submit(initialize_game_state(), BoardPiece(1), None, None)
+    assert first.done()  # Nothing to search on the first move.
+    assert len(scheduler) == 2
+
+    # The searches run in turn, the one with the closest deadline first.
+    scheduler.run_slice()
+    assert [task.iterations for task in scheduler._tasks] == [0, 10]
+    scheduler.run_slice()
+    assert [task.iterations for task in scheduler._tasks] == [10, 10]
+
+    scheduler.run_until_complete()
+    for future in (early, late):
+        action, saved_state = future.result()
+        assert saved_state.parent.total_games == 30
+    assert len(scheduler) == 0
+
+
+def test_search_scheduler_deadline():
+    from agents.agent_Monte_Carlo.scheduler import SearchScheduler
+
+    scheduler = SearchScheduler(slice_iterations=5)
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    start = time.monotonic()
+    futures = [scheduler.submit(board.copy(), BoardPiece(1), None, PlayerAction(3), train_time=0.5)
+               for _ in range(4)]
+    ends = []
+    for future in futures:
+        future.add_done_callback(lambda _: ends.append(time.monotonic()))
+
+    scheduler.run_until_complete()
+
+    # Every search ends by its deadline, after sharing the time with the others.
+    assert max(ends) - start < 0.5 + 0.05
+    games = [future.result()[1].parent.total_games for future in futures]
+    assert min(games) >= 20
+    assert max(games) <= 2 * min(games)
+
+
+# Tree serialization
+def test_dumps_loads_tree():
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agent_Monte_Carlo.tree_io import dumps_tree, loads_tree
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=200)
+    root = saved_state.parent
+
+    loaded = loads_tree(dumps_tree(root))
+    assert loaded.parent is None
+    assert loaded.total_games == root.total_games == 200
+    assert np.all(loaded.board == root.board)
+
+    nodes = [(root, loaded)]
+    while nodes:
+        node, copy = nodes.pop()
+        assert (node.move, node.total_games, node.wins) == (copy.move, copy.total_games, copy.wins)
+        assert (node.winner, node.loser, node.terminal) == (copy.winner, copy.loser, copy.terminal)
+        assert copy.turn_player == node.turn_player
+        assert np.all(node.board == copy.board)
+        assert (node.child is None) == (copy.child is None)
+        if node.child is not None:
+            nodes.extend(zip(node.child, copy.child))
+
+    # Only the root and its children are kept with max_depth=1.
+    cut = loads_tree(dumps_tree(root, max_depth=1))
+    assert len(cut.child) == 4  # Mirrored moves of the symmetric root are not searched
+    assert all(children.child is None for children in cut.child)
+
+
+def test_save_load_tree(tmp_path):
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agent_Monte_Carlo.tree_io import save_tree, load_tree
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    action, saved_state = montecarlo(board.copy(), BoardPiece(1), None, PlayerAction(3), iterations=200)
+    save_tree(saved_state, tmp_path / 'tree.bin')
+
+    loaded = load_tree(tmp_path / 'tree.bin', mmap=True)
+    assert loaded.total_games == saved_state.total_games
+    assert loaded.move == action
+
+    # The loaded tree can be used as saved state to continue the game.
+    apply_player_action(board, action, BoardPiece(1))
+    apply_player_action(board, PlayerAction(0), BoardPiece(2))
+    action, new_state = montecarlo(board, BoardPiece(1), loaded, PlayerAction(0), iterations=50)
+    assert new_state.parent.total_games >= 50
+
+
+def test_save_load_tree_search_state(tmp_path):
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agent_Monte_Carlo.priors import center_priors
+    from agents.agent_Monte_Carlo.tree_io import save_tree, load_tree
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    settings = SearchSettings(priors=center_priors, widening_base=1, rave_equivalence=100)
+    np.random.seed(0)
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=200, settings=settings)
+    root = saved_state.parent
+    save_tree(root, tmp_path / 'tree.bin')
+
+    # Priors, widening state and AMAF statistics are kept
+    nodes = [(root, load_tree(tmp_path / 'tree.bin'))]
+    while nodes:
+        node, copy = nodes.pop()
+        assert (node.amaf_games, node.amaf_wins) == (copy.amaf_games, copy.amaf_wins)
+        assert (node.prior is None) == (copy.prior is None)
+        if node.prior is not None:
+            assert np.isclose(node.prior, copy.prior)
+        assert (node.untried is None) == (copy.untried is None)
+        if node.untried is not None:
+            assert [move for move, _ in node.untried] == [move for move, _ in copy.untried]
+            assert np.allclose([prior for _, prior in node.untried], [prior for _, prior in copy.untried])
+        if node.child is not None:
+            nodes.extend(zip(node.child, copy.child))
+    assert any(node.untried for node in root.child)
+    assert load_tree(tmp_path / 'tree.bin', mmap=False).untried == load_tree(tmp_path / 'tree.bin').untried
+
+    # The untried moves of nodes whose children are dropped are listed again when they are widened
+    save_tree(root, tmp_path / 'cut.bin', max_depth=1)
+    cut = load_tree(tmp_path / 'cut.bin')
+    assert cut.untried is not None
+    assert all(children.untried is None for children in cut.child)
+
+
+# Statistics store
+def test_stats_store(tmp_path):
+    from agents.agent_Monte_Carlo.stats_store import StatsStore
+
+    store = StatsStore(str(tmp_path / 'stats.npy'), capacity=4, probes=2)
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(1))
+
+    assert store.lookup(board, BoardPiece(1)) is None
+    store.add(board, BoardPiece(1), 10, 7)
+    store.add(board, BoardPiece(1), 5, 1)
+    assert store.lookup(board, BoardPiece(1)) == (15, 8)
+    assert store.lookup(board, BoardPiece(2)) is None  # Wins are counted per player.
+    store.close()
+
+    # The statistics are kept in the file and the table never grows.
+    store = StatsStore(str(tmp_path / 'stats.npy'))
+    assert store.capacity == 4
+    assert store.lookup(board, BoardPiece(1)) == (15, 8)
+    for column in range(7):
+        other = initialize_game_state()
+        apply_player_action(other, PlayerAction(column), BoardPiece(2))
+        store.add(other, BoardPiece(1), 100, 50)
+    assert len(store) == 4
+    assert store.lookup(board, BoardPiece(1)) is None  # Least visited position, evicted.
+
+
+def test_montecarlo_stats_store(tmp_path):
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agent_Monte_Carlo.stats_store import StatsStore
+
+    settings = SearchSettings(stats_store=StatsStore(str(tmp_path / 'stats.npy'), capacity=1024), seed_limit=20)
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+
+    action, saved_state = montecarlo(board.copy(), BoardPiece(1), None, PlayerAction(3), iterations=100,
+                                     settings=settings)
+    root = saved_state.parent
+    assert settings.stats_store.lookup(root.board, BoardPiece(1))[0] == 100
+    child = root.child[0]
+    assert settings.stats_store.lookup(child.board, BoardPiece(1)) == (child.total_games, child.wins)
+
+    # A new game starts from what was learnt in the previous one.
+    action, saved_state = montecarlo(board.copy(), BoardPiece(1), None, PlayerAction(3), iterations=1,
+                                     settings=settings)
+    seeded = saved_state.parent.child
+    assert sum(children.total_games for children in seeded) > 1
+    assert all(children.total_games <= 20 + 1 for children in seeded)  # Seeded games + simulated one
+    assert settings.stats_store.lookup(root.board, BoardPiece(1))[0] == 101
+
+
+# Heuristic evaluation
+def test_evaluate_board():
+    from agents.agent_Monte_Carlo.heuristic import evaluate_board, evaluate_boards, win_probability
+
+    board = initialize_game_state()
+    assert evaluate_board(board, BoardPiece(1)) == 0
+
+    board[5, 0:3] = BoardPiece(1)  # Open three (and open twos) of player 1
+    score = evaluate_board(board, BoardPiece(1))
+    assert score > 1
+    assert evaluate_board(board, BoardPiece(2)) == -score
+    assert evaluate_board(board, BoardPiece(1), {3: 2.0}) == 2.0
+
+    board[5, 3] = BoardPiece(2)  # The three is blocked
+    assert evaluate_board(board, BoardPiece(1)) < score
+
+    boards = np.stack([initialize_game_state(), board])
+    scores = evaluate_boards(boards, np.array([1, 1]))
+    assert scores[0] == 0 and scores[1] == evaluate_board(board, BoardPiece(1))
+    assert win_probability(0) == 0.5
+
+
+def test_random_game_truncated():
+    from agents.agent_Monte_Carlo.montecarlo import random_game
+
+    board = initialize_game_state()
+    win = random_game(board, BoardPiece(1), BoardPiece(1), max_plies=3)
+
+    assert win in (True, False)
+    assert np.sum(board != 0) == 3  # Stopped after 3 moves.
+
+
+def test_stats_store_mirror(tmp_path):
+    from agents.agent_Monte_Carlo.stats_store import StatsStore
+    from agents.common import moves_to_board
+
+    store = StatsStore(str(tmp_path / 'stats.npy'), capacity=64)
+    store.add(moves_to_board('01'), BoardPiece(1), 10, 4)
+    assert store.lookup(moves_to_board('65'), BoardPiece(1)) == (10, 4)  # Mirrored position
+
+    # Keys of 8x7 boards need 63 bits, which would overlap the flags of the entries
+    store.add(np.zeros((7, 7), dtype=BoardPiece), BoardPiece(1), 1, 1)
+    with pytest.raises(ValueError):
+        store.add(np.zeros((8, 7), dtype=BoardPiece), BoardPiece(1), 1, 1)
+    with pytest.raises(ValueError):
+        store.lookup(np.zeros((8, 7), dtype=BoardPiece), BoardPiece(1))
+    store.close()
+
+
+def test_symmetric_root():
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode
+    from agents.agent_Monte_Carlo.montecarlo_exec import establish_root, run_iterations
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    root = establish_root(board, BoardPiece(1), None, PlayerAction(3))
+    run_iterations(root, BoardPiece(1), 20)
+    assert sorted(children.move for children in root.child) == [0, 1, 2, 3]
+
+    # The reused root keeps one of two mirrored children
+    node = TreeNode(board, PlayerAction(3), None, BoardPiece(2))
+    for column in range(7):
+        node.new_child(TreeNode(apply_player_action(board, PlayerAction(column), BoardPiece(1), copy=True),
+                                PlayerAction(column), node, BoardPiece(1)), BoardPiece(1))
+    node.child[5].total_games = 3
+    parent = TreeNode(initialize_game_state(), None, None, BoardPiece(1))
+    parent.child = [node]
+    node.parent = parent
+    root = establish_root(board, BoardPiece(1), parent, PlayerAction(3))
+    assert sorted(children.move for children in root.child) == [0, 2, 3, 5]
+
+
+# Priors and progressive widening
+def test_move_priors():
+    from agents.agent_Monte_Carlo.priors import center_priors, move_priors, PriorTable
+    from agents.common import encode_board
+
+    board = initialize_game_state()
+    priors = center_priors(board, BoardPiece(1))
+    assert np.isclose(priors.sum(), 1) and np.argmax(priors) == 3
+    assert priors[0] == priors[6] < priors[1]
+
+    ordered = move_priors(board, BoardPiece(1), center_priors, np.array([0, 1, 5]))
+    assert [move for move, _ in ordered] == [1, 5, 0]
+    assert np.isclose(sum(prior for _, prior in ordered), 1)
+
+    learnt = np.array([0, 0, 0, 0, 0, 0, 1.])
+    table = PriorTable({int(encode_board(board)): learnt})
+    assert table(board, BoardPiece(1)) is learnt
+    apply_player_action(board, PlayerAction(3), BoardPiece(1))
+    assert np.array_equal(table(board, BoardPiece(2)), priors)  # Unknown position
+
+    wide = np.zeros((8, 9), dtype=BoardPiece)  # 81 bits, too many for the keys of the table
+    assert np.array_equal(table(wide, BoardPiece(1)), center_priors(wide, BoardPiece(1)))
+
+
+def test_progressive_widening():
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import establish_root, run_iterations, best_move
+    from agents.agent_Monte_Carlo.priors import center_priors
+
+    settings = SearchSettings(priors=center_priors, widening_base=1.0)
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(2), BoardPiece(2))
+    root = establish_root(board, BoardPiece(1), None, PlayerAction(2))
+
+    run_iterations(root, BoardPiece(1), 1, settings)
+    assert [children.move for children in root.child] == [3]  # The move with the highest prior first
+
+    run_iterations(root, BoardPiece(1), 15, settings)
+    assert len(root.child) == settings.children_allowed(15)  # ceil(sqrt(16)) = 4
+    assert [children.move for children in root.child] == [3, 2, 4, 1]
+    assert root.total_games == 16
+
+    run_iterations(root, BoardPiece(1), 100, settings)
+    assert len(root.child) == 7
+    action, saved_state = best_move(root, settings)
+    assert saved_state.total_games == max(children.total_games for children in root.child)
+
+
+# RAVE
+def test_back_prop_amaf():
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode, back_prop
+
+    board = initialize_game_state()
+    root = TreeNode(board, None, None, BoardPiece(2))
+    for column in range(3):
+        root.new_child(TreeNode(apply_player_action(board, PlayerAction(column), BoardPiece(1), copy=True),
+                                PlayerAction(column), root, BoardPiece(1)), BoardPiece(1))
+
+    # Player 1 played columns 0, then 2 in the simulation, player 2 column 1
+    playout = [(BoardPiece(2), PlayerAction(1)), (BoardPiece(1), PlayerAction(2))]
+    back_prop(root.child[0], True, playout)
+
+    assert [children.amaf_games for children in root.child] == [1, 0, 1]
+    assert [children.amaf_wins for children in root.child] == [1, 0, 1]
+    assert root.child[2].total_games == 0
+    assert root.child[2].find_value(10) == 1.0  # Only AMAF statistics so far
+    assert root.child[2].find_value() == 0.
+
+
+def test_montecarlo_rave():
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    settings = SearchSettings(rave_equivalence=100)
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=100, settings=settings)
+
+    root = saved_state.parent
+    assert root.total_games == 100
+    # Every simulation updates the AMAF statistics of several children of the root
+    assert sum(children.amaf_games for children in root.child) > sum(children.total_games for children in root.child)
+
+
+# Batched evaluation
+def test_random_games():
+    from agents.agent_Monte_Carlo.playout import random_games
+
+    board = initialize_game_state()
+    boards = np.stack([board] * 50)
+    moves = []
+    wins = random_games(boards, BoardPiece(1), BoardPiece(1), moves=moves)
+
+    assert wins.shape == (50,) and wins.dtype == bool
+    assert np.all(boards == 0)  # The boards are left unchanged
+    assert len(moves) == 50 and moves[0][0][0] == BoardPiece(1)
+
+    # A win in one move for player 2, which moves first
+    board[5, 0:3] = BoardPiece(2)
+    board[4, 0:3] = BoardPiece(1)
+    np.random.seed(1)
+    wins = random_games(np.stack([board] * 200), BoardPiece(2), BoardPiece(2), max_plies=1)
+    assert 0 < wins.mean() < 1  # Either the winning column or an evaluated position
+
+    assert random_games(np.stack([board] * 10), BoardPiece(2), BoardPiece(2), max_plies=0).shape == (10,)
+
+    # A board filled by the last allowed ply is a draw, not an evaluated position
+    drawn = np.array([[1, 1, 2, 2, 1, 1, 2], [2, 2, 1, 1, 2, 2, 1]] * 3, dtype=BoardPiece)
+    drawn[0, 0] = 0
+    wins = random_games(np.stack([drawn] * 100), BoardPiece(1), BoardPiece(1), max_plies=1)
+    assert not wins.any()
+
+
+def test_montecarlo_batched():
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(3), BoardPiece(2))
+    settings = SearchSettings(batch_size=16, rave_equivalence=50)
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=100, settings=settings)
+
+    root = saved_state.parent
+    assert root.total_games == 100  # Virtual losses are all removed
+    assert sum(children.total_games for children in root.child) == 100
+
+    # Custom evaluators are called once per batch
+    calls = []
+
+    def evaluator(boards, main_player, turn_players, **kwargs):
+        calls.append(len(boards))
+        return np.zeros(len(boards), dtype=bool)
+
+    settings = SearchSettings(batch_size=8, evaluator=evaluator)
+    montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=20, settings=settings)
+    assert len(calls) == 3 and sum(calls) <= 20
+
+
+# Tree-parallel search
+def test_shared_tree_iterations():
+    import multiprocessing
+    from agents.agent_Monte_Carlo.parallel import SharedTree, search_iteration
+
+    tree = SharedTree(1000, [multiprocessing.Lock() for _ in range(4)], multiprocessing.Value('q', 1))
+    try:
+        board = initialize_game_state()
+        tree.reset(BoardPiece(1))
+        for _ in range(50):
+            search_iteration(tree, board, BoardPiece(1))
+
+        root = tree.nodes[0]
+        children = tree.nodes[root['first_child']:root['first_child'] + root['n_children']]
+        assert root['visits'] == 50 and root['n_children'] == 7
+        assert np.sum(children['visits']) == 50
+        assert np.all(children['virtual'] == 0)  # All virtual losses are removed
+        assert np.all(children['player'] == BoardPiece(1))
+    finally:
+        tree.close(unlink=True)
+
+
+def test_parallel_search():
+    from agents.agent_Monte_Carlo.parallel import ParallelSearch
+
+    board = initialize_game_state()
+    board[5, 0:3] = BoardPiece(1)
+    board[4, 0:3] = BoardPiece(2)
+    with ParallelSearch(workers=2, capacity=10000) as search:
+        action, stats = search.search(board, BoardPiece(1), train_time=0.5)
+        assert action == PlayerAction(3)  # Winning move
+        assert stats['iterations'] > 0 and stats['nodes'] > 1
+
+        action, stats = search.search(board, BoardPiece(2), train_time=0.5)  # The tree is reused
+        assert action == PlayerAction(3)  # Blocking move
+
+
+def test_parallel_search_edge_cases():
+    from agents.common import GameConfig
+    from agents.agent_Monte_Carlo.parallel import ParallelSearch
+
+    config = GameConfig(6, 7, 3)
+    board = initialize_game_state(config)
+    board[5, 0:2] = BoardPiece(1)
+    board[4, 0:2] = BoardPiece(2)
+    with ParallelSearch(workers=1, capacity=10000, config=config, timeout=2) as search:
+        # The root is expanded even if the deadline passes before the workers start
+        action, stats = search.search(board, BoardPiece(1), train_time=0)
+        assert 0 <= action < 7
+
+        action, _ = search.search(board, BoardPiece(1), train_time=0.3)
+        assert action == PlayerAction(2)  # Winning move with three aligned pieces
+
+        search._processes[0].kill()
+        search._processes[0].join()
+        with pytest.raises(RuntimeError):
+            search.search(board, BoardPiece(1), train_time=0.1)
+
+
+# Tactical fast path
+def test_forced_move():
+    from agents.agent_Monte_Carlo.tactics import forced_move
+
+    assert forced_move(initialize_game_state(), BoardPiece(1)) is None
+
+    board = initialize_game_state()
+    board[5, 0:3] = BoardPiece(1)
+    board[4, 0:2] = BoardPiece(2)
+    assert forced_move(board, BoardPiece(1)) == PlayerAction(3)  # Win in one
+    assert forced_move(board, BoardPiece(2)) == PlayerAction(3)  # Single threat to block
+
+    # Playing 3 makes an open three on the bottom row: win in two
+    board = initialize_game_state()
+    board[5, 1] = board[5, 2] = BoardPiece(1)
+    board[4, 1] = board[4, 2] = BoardPiece(2)
+    assert forced_move(board, BoardPiece(1)) == PlayerAction(3)
+
+    # Two threats of the opponent: nothing is forced
+    board = initialize_game_state()
+    board[5, 1:4] = BoardPiece(2)
+    board[4, 1:3] = BoardPiece(1)
+    assert forced_move(board, BoardPiece(1)) is None
+
+
+def test_montecarlo_forced_move():
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    board = initialize_game_state()
+    board[5, 0:3] = BoardPiece(2)
+    board[4, 0:2] = BoardPiece(1)
+    apply_player_action(board, PlayerAction(1), BoardPiece(1))
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(0), iterations=10 ** 6)
+
+    assert action == PlayerAction(3)  # Blocked without running the iterations
+    assert saved_state.move == action and saved_state.parent.total_games == 0
+
+
+
+def test_montecarlo_deadline():
+    import time
+    from agents.common import moves_to_board
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    for budget in (0.05, 0.3):
+        t0 = time.perf_counter()
+        action, saved_state = montecarlo(moves_to_board('33'), BoardPiece(1), None, PlayerAction(3), train_time=budget)
+        latency = time.perf_counter() - t0
+        assert budget * 0.5 < latency < budget + 0.1
+        assert saved_state.parent.total_games > 0
+
+
+# Memory accounting
+def test_tree_memory():
+    from agents.agent_Monte_Carlo.montecarlo_exec import establish_root, run_iterations
+    from agents.agent_Monte_Carlo.memory import tree_memory, node_bytes, peak_rss
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(2), BoardPiece(2))
+    root = establish_root(board, BoardPiece(1), None, PlayerAction(2))
+    single = tree_memory(root)
+    assert single['nodes'] == 1 and single['bytes'] == node_bytes(root) > board.nbytes
+
+    run_iterations(root, BoardPiece(1), 30)
+    memory = tree_memory(root)
+    assert memory['nodes'] > 7
+    assert memory['bytes'] == memory['nodes'] * memory['bytes_per_node']
+    assert peak_rss() >= 0
+
+
+def test_lazy_tree_memory():
+    from agents.agent_Monte_Carlo.montecarlo_exec import establish_root, run_iterations
+    from agents.agent_Monte_Carlo.memory import count_nodes, tree_memory
+    from agents.agent_Monte_Carlo.tree_io import dumps_tree, loads_tree
+
+    board = initialize_game_state()
+    apply_player_action(board, PlayerAction(2), BoardPiece(2))
+    root = establish_root(board, BoardPiece(1), None, PlayerAction(2))
+    run_iterations(root, BoardPiece(1), 200)
+    nodes = count_nodes(root)
+
+    # Counted from the saved columns, without building the nodes
+    loaded = loads_tree(dumps_tree(root))
+    assert count_nodes(loaded) == tree_memory(loaded)['nodes'] == nodes
+    assert loaded.unloaded_nodes == nodes - 1 and loaded._child is None
+
+    first = loaded.child[0]
+    assert count_nodes(loaded) == nodes and first._child is None
+    assert count_nodes(first) == count_nodes(root.child[0])
+
+
+# Other board sizes
+def test_montecarlo_game_config():
+    from agents.common import GameConfig, check_end_state, GameState
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo, blank_board
+
+    config = GameConfig(8, 9, 5)
+    settings = SearchSettings(config=config, batch_size=8)
+    action, saved_state = blank_board(initialize_game_state(config), BoardPiece(1), settings)
+    assert action == config.center
+
+    # Four in a row of player 2 threatens five in column 4
+    board = initialize_game_state(config)
+    board[7, 0:4] = BoardPiece(2)
+    board[6, 0:3] = BoardPiece(1)
+    action, saved_state = montecarlo(board, BoardPiece(1), None, PlayerAction(3), iterations=64, settings=settings)
+    assert action == PlayerAction(4)
+    assert check_end_state(board, BoardPiece(2), PlayerAction(3), config.connect) == GameState.STILL_PLAYING
+
+    board[7, 4] = BoardPiece(1)
+    action, saved_state = montecarlo(board, BoardPiece(2), None, PlayerAction(4), iterations=64, settings=settings)
+    assert 0 <= action < 9
+    assert saved_state.parent.total_games == 64
+
+
+def test_warm_up():
+    from agents.common import GameConfig, cell_lines
+    from agents.agent_Monte_Carlo.montecarlo_exec import warm_up
+
+    cell_lines.cache_clear()
+    warm_up()
+    warm_up(GameConfig(5, 6, 4))
+    assert cell_lines.cache_info().currsize == 2
+
+
+
+def test_symmetric_root_losing_case():
+    from agents.common import moves_to_board
+    from agents.agent_Monte_Carlo.montecarlo_exec import establish_root, run_iterations
+
+    # Open three of PLAYER1 on a symmetric board: only the columns 0 to 3 are children of the root,
+    # while after a block at column 1 the win of PLAYER1 at column 5 is the one to prevent
+    board = moves_to_board('33234')
+    root = establish_root(board, BoardPiece(2), None, PlayerAction(4))
+    np.random.seed(0)
+    run_iterations(root, BoardPiece(2), 100)
+    assert sorted(int(children.move) for children in root.child) == [0, 1, 2, 3]
+
+
+# Lockstep searches of many games
+def test_montecarlo_lockstep():
+    from agents.common import moves_to_board
+    from agents.agent_Monte_Carlo.lockstep import montecarlo_lockstep
+
+    forced = initialize_game_state()
+    forced[5, 0:3] = BoardPiece(2)
+    forced[4, 0:2] = BoardPiece(1)
+    apply_player_action(forced, PlayerAction(1), BoardPiece(1))
+    boards = [initialize_game_state(), forced, moves_to_board('3'), moves_to_board('32')]
+    players = [BoardPiece(1), BoardPiece(1), BoardPiece(2), BoardPiece(1)]
+    last_actions = [None, PlayerAction(0), PlayerAction(3), PlayerAction(2)]
+    moves = montecarlo_lockstep(boards, players, [None] * 4, last_actions, iterations=40)
+
+    assert moves[0][0] == PlayerAction(3)  # Opening
+    assert moves[1][0] == PlayerAction(3)  # Forced block
+    for action, saved_state in moves[2:]:
+        root = saved_state.parent
+        assert saved_state.move == action
+        # Every searched tree received its iterations
+        assert sum(children.total_games for children in root.child) >= 40
@@ -0,0 +1,40 @@
+def test_perft_reference_counts():
+    from agents.common import initialize_game_state, PLAYER1
+    from tools.perft import perft, perft_bitboard, REFERENCE_COUNTS
+    from agents.agent_solver.solver import Position
+
+    board = initialize_game_state()
+    for depth in range(5):
+        assert perft(board, PLAYER1, depth) == REFERENCE_COUNTS[depth]
+    assert perft_bitboard(Position.from_board(board, PLAYER1), 7) == REFERENCE_COUNTS[7]
+
+
+def test_perft_terminal_positions():
+    from agents.common import moves_to_board, PLAYER1, PLAYER2
+    from tools.perft import perft, divide
+
+    # Playing column 0 wins for PLAYER1, so that position is counted but not continued
+    board = moves_to_board('010101')
+    assert perft(board, PLAYER1, 1) == 7
+    assert perft(board, PLAYER1, 2) == 6 * 7
+
+    counts = divide(board, PLAYER1, 2, engine='bitboard')
+    assert counts[0] == 0
+    assert sum(counts.values()) == perft(board, PLAYER1, 2)
+
+    # Column 0 holds 6 pieces and is full
+    board = moves_to_board('000000')
+    assert perft(board, PLAYER1, 1) == 6
+    assert divide(board, PLAYER1, 3) == divide(board, PLAYER1, 3, engine='bitboard')
+
+
+def test_perft_run():
+    import io
+    from agents.common import initialize_game_state
+    from tools.perft import run, REFERENCE_COUNTS
+
+    output = io.StringIO()
+    assert run(initialize_game_state(), 3, 'bitboard', reference=REFERENCE_COUNTS, output=output)
+    assert output.getvalue().count(' ok') == 4
+    assert not run(initialize_game_state(), 2, reference=[1, 7, 48], output=output)
+    assert 'MISMATCH' in output.getvalue()
@@ -12,4 +12,13 @@ def test_random():
     action, saved_state = generate_move_random(board,BoardPiece(1),saved_state=0)
 
     assert isinstance(action,PlayerAction)
-    assert action == PlayerAction(3)  #Taking the empty one
\ No newline at end of file
+    assert action == PlayerAction(3)  #Taking the empty one
+
+def test_random_wide_board():
+    from agents.agents_random.random import generate_move_random
+
+    board = np.full((8, 9), BoardPiece(1))
+    board[0, 8] = 0
+    action, _ = generate_move_random(board, BoardPiece(2))
+
+    assert action == PlayerAction(8)  # Only free column of the 9
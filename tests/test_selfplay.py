@@ -0,0 +1,129 @@
+import numpy as np
+
+
+def test_play_game():
+    from tools.selfplay import play_game, FIELDS
+
+    records = play_game((0, 20))
+    n = len(records['moves'])
+
+    assert n > 0
+    for name, (dtype, shape) in FIELDS.items():
+        assert records[name].shape == (n,) + shape
+        assert records[name].dtype == dtype
+    assert np.allclose(records['visits'].sum(axis=1), 1)
+    assert set(np.unique(records['outcomes'])) <= {-1, 0, 1}
+    # Both players' results are opposite, unless the game was drawn.
+    assert len(set(zip(records['players'], records['outcomes']))) <= 2
+
+
+def test_record_position_symmetric():
+    from agents.common import initialize_game_state, PLAYER1
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode, change_player
+    from agents.agent_Monte_Carlo.montecarlo_exec import run_iterations, best_move
+    from tools.selfplay import _record_position, FIELDS
+
+    board = initialize_game_state()
+    root = TreeNode(board, None, None, change_player(PLAYER1))
+    run_iterations(root, PLAYER1, 60)
+    action, saved_state = best_move(root)
+    records = {name: [] for name in FIELDS}
+    _record_position(records, board, PLAYER1, action, saved_state)
+
+    visits = records['visits'][0]
+    assert np.allclose(visits, visits[::-1])  # The mirrored columns share the visits of the searched ones
+    assert np.all(visits > 0) and np.isclose(visits.sum(), 1)
+
+
+def test_other_board_sizes(tmp_path):
+    import pytest
+    from agents.common import GameConfig, initialize_game_state, PLAYER1
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode, change_player
+    from agents.agent_Monte_Carlo.montecarlo_exec import run_iterations, best_move
+    from tools.selfplay import _record_position, ShardWriter, FIELDS
+
+    board = initialize_game_state(GameConfig(8, 9, 4))
+    root = TreeNode(board, None, None, change_player(PLAYER1))
+    run_iterations(root, PLAYER1, 20)
+    action, saved_state = best_move(root)
+    with pytest.raises(ValueError):
+        _record_position({name: [] for name in FIELDS}, board, PLAYER1, action, saved_state)
+
+    records = {name: np.zeros((2,) + shape, dtype=dtype) for name, (dtype, shape) in FIELDS.items()}
+    records['visits'] = np.zeros((2, 9), dtype=np.float32)  # Visits of a 9 columns board
+    writer = ShardWriter(str(tmp_path))
+    with pytest.raises(ValueError):
+        writer.append(records)
+    writer.close()
+
+
+def test_shard_writer(tmp_path):
+    from tools.selfplay import ShardWriter, load_shards, play_game
+
+    records = play_game((1, 10))
+    n = len(records['moves'])
+    writer = ShardWriter(str(tmp_path), shard_size=n + 1)
+    writer.append(records)
+    writer.append(records)
+    writer.close()
+
+    # Appending to existing shards, after reopening them
+    writer = ShardWriter(str(tmp_path), shard_size=n + 1)
+    writer.append(records)
+    writer.close()
+
+    shards = load_shards(str(tmp_path))
+    assert [len(shard['moves']) for shard in shards] == [n + 1, n + 1, n - 2]
+    assert isinstance(shards[0]['boards'], np.memmap)
+    boards = np.concatenate([shard['boards'] for shard in shards])
+    assert np.all(boards == np.concatenate([records['boards']] * 3))
+
+
+def test_shard_writer_unfinished_append(tmp_path):
+    from tools.selfplay import ShardWriter, load_shards, play_game
+
+    records = play_game((1, 10))
+    n = len(records['moves'])
+    writer = ShardWriter(str(tmp_path))
+    writer.append(records)
+    writer.close()
+
+    # A process died after writing rows but before updating the headers
+    with open(tmp_path / 'shard_00000' / 'boards.npy', 'ab') as file:
+        file.write(b'\1' * 42 * 3)
+    with open(tmp_path / 'shard_00000' / 'moves.npy', 'ab') as file:
+        file.write(b'\2')
+
+    writer = ShardWriter(str(tmp_path))
+    writer.append(records)
+    writer.close()
+
+    shard, = load_shards(str(tmp_path))
+    assert len(shard['moves']) == 2 * n
+    assert (tmp_path / 'shard_00000' / 'boards.npy').stat().st_size == 128 + 2 * n * 42
+    assert np.all(shard['boards'] == np.concatenate([records['boards']] * 2))
+    assert np.all(shard['moves'] == np.concatenate([records['moves']] * 2))
+
+
+def test_self_play(tmp_path):
+    from tools.selfplay import self_play, load_shards
+
+    positions = self_play(str(tmp_path), games=3, iterations=10, workers=2, shard_size=20)
+    shards = load_shards(str(tmp_path))
+
+    assert positions == sum(len(shard['moves']) for shard in shards)
+    assert all(len(shard['moves']) <= 20 for shard in shards)
+
+
+def test_play_games_lockstep():
+    from tools.selfplay import play_games_lockstep, FIELDS
+
+    games = play_games_lockstep((0, 3, 10))
+
+    assert len(games) == 3
+    for records in games:
+        n = len(records['moves'])
+        assert n > 0
+        for name, (dtype, shape) in FIELDS.items():
+            assert records[name].shape == (n,) + shape
+        assert np.allclose(records['visits'].sum(axis=1), 1)
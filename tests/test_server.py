@@ -0,0 +1,125 @@
+import threading
+import time
+import pytest
+from agents.common import GameState, PLAYER1, PLAYER2, initialize_game_state
+
+
+def slow_task(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_search_pool():
+    from service.server import SearchPool, PoolBusy
+
+    pool = SearchPool(workers=1, queue_size=0)
+    try:
+        assert pool.submit(slow_task, 0) == 0
+
+        busy = threading.Thread(target=pool.submit, args=(slow_task, 1))
+        busy.start()
+        time.sleep(0.3)
+        assert pool.pending == 1
+        with pytest.raises(PoolBusy):  # No worker free and no room in the queue.
+            pool.submit(slow_task, 0)
+        busy.join()
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+def test_game_server():
+    from service.server import SearchPool, GameServer
+    from service.load_client import request
+
+    pool = SearchPool(workers=1, queue_size=2)
+    server = GameServer(('127.0.0.1', 0), pool, train_time=0.5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        status, game = request(url + '/games', 'POST', {'agent_first': True})
+        assert status == 201
+        assert game['agent_move'] == 3  # The agent starts on the column 3.
+        assert game['state'] == GameState.STILL_PLAYING.name.lower()
+
+        moves_url = f"{url}/games/{game['game_id']}/moves"
+        status, game = request(moves_url, 'POST', {'column': 0})
+        assert status == 200
+        assert 0 <= game['agent_move'] < 7
+        assert sum(cell != 0 for row in game['board'] for cell in row) == 3
+
+        status, _ = request(moves_url, 'POST', {'column': 9})
+        assert status == 400
+        assert request(moves_url, 'POST', {'column': True})[0] == 400
+        for body in ([1], 3):  # Valid JSON, but not an object
+            assert request(moves_url, 'POST', body) == (400, {'error': 'invalid JSON'})
+            assert request(url + '/games', 'POST', body) == (400, {'error': 'invalid JSON'})
+        for train_time in ('1', -1, 0, 1e9, True):
+            assert request(url + '/games', 'POST', {'train_time': train_time})[0] == 400
+        assert request(url + '/games/abc', 'GET')[0] == 404
+        assert request(url + '/stats')[1]['games'] == 1
+        assert request(f"{url}/games/{game['game_id']}", 'DELETE')[0] == 200
+        assert request(url + '/stats')[1]['games'] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+        pool.shutdown()
+
+
+def test_decision_cache():
+    from service.decision_cache import DecisionCache
+
+    now = [0.0]
+    cache = DecisionCache(max_entries=2, max_age=10, clock=lambda: now[0])
+    boards = [initialize_game_state() for _ in range(3)]
+    for col, board in enumerate(boards):
+        board[-1, col] = PLAYER1
+    assert cache.get(boards[0], PLAYER2, 1) is None and cache.hit_rate == 0
+
+    cache.put(boards[0], PLAYER2, 1, 3, b'tree0', {3: (5, 2)})
+    cache.put(boards[1], PLAYER2, 1, 4, b'tree1', {})
+    assert cache.get(boards[0], PLAYER2, 1) == (3, b'tree0', {3: (5, 2)})
+    assert cache.get(boards[0], PLAYER1, 1) is None  # Other player to move
+    assert cache.get(boards[0], PLAYER2, 2) is None  # Other budget
+
+    cache.put(boards[2], PLAYER2, 1, 5, b'tree2', {})  # boards[1] is the least recently used
+    assert cache.get(boards[1], PLAYER2, 1) is None
+    assert cache.evictions == 1 and len(cache) == 2
+
+    now[0] = 11
+    assert cache.get(boards[2], PLAYER2, 1) is None
+    stats = cache.stats()
+    assert stats['expired'] == 1 and stats['entries'] == 1
+    assert stats['hits'] == 1 and stats['misses'] == 5 and stats['hit_rate'] == 1 / 6
+
+
+def test_game_server_cache():
+    from service.server import SearchPool, GameServer
+    from service.decision_cache import DecisionCache
+    from service.load_client import request
+
+    pool = SearchPool(workers=1, queue_size=2)
+    server = GameServer(('127.0.0.1', 0), pool, train_time=0.5, cache=DecisionCache())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        games = [request(url + '/games', 'POST', {'agent_first': False})[1] for _ in range(2)]
+        answers = [request(f"{url}/games/{game['game_id']}/moves", 'POST', {'column': 0})[1] for game in games]
+        # The second session reached the same position and was answered by the first search.
+        assert answers[0]['agent_move'] == answers[1]['agent_move']
+        assert answers[0]['board'] == answers[1]['board']
+        stats = request(url + '/stats')[1]['decision_cache']
+        assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        pool.shutdown()
+
+
+def test_percentile():
+    from service.load_client import percentile
+
+    assert percentile([], 50) is None
+    assert percentile([1, 2, 3], 50) == 2
@@ -0,0 +1,44 @@
+def test_suite_roundtrip(tmp_path):
+    from benchmarks.solved_positions import write_suite, load_suite
+
+    suite = [('3344', 1, [2, 5]), ('0123456', -1, [3])]
+    path = str(tmp_path / 'suite.txt')
+    write_suite(suite, path)
+    assert load_suite(path) == suite
+
+
+def test_shipped_suite():
+    from agents.common import moves_to_board, player_to_move
+    from agents.agent_solver.solver import solve
+    from agents.agent_Monte_Carlo.tactics import forced_move
+    from benchmarks.solved_positions import load_suite, best_columns
+
+    suite = load_suite()
+    assert len(suite) >= 50
+    # As many won, drawn and lost positions
+    assert sorted(sum(value == v for _, value, _ in suite) for v in (1, 0, -1)) == [len(suite) // 3] * 3
+    for value in (1, 0, -1):
+        moves, value, best = next(position for position in suite if position[1] == value)
+        board = moves_to_board(moves)
+        player = player_to_move(board)
+        assert forced_move(board, player) is None
+        _, scores, _ = solve(board, player)
+        assert best_columns(scores) == (value, best)
+
+
+def test_best_columns():
+    from benchmarks.solved_positions import best_columns
+
+    assert best_columns([2, -1, None, 0, 1, -3, 2]) == (1, [0, 4, 6])
+    assert best_columns([0, -1, 0, None, -2, 0, -1]) == (0, [0, 2, 5])
+    assert best_columns([-3, -1, -2, -1, None, -5, -4]) == (-1, [1, 3])
+
+
+def test_accuracy():
+    from benchmarks.solved_positions import accuracy, load_suite
+
+    results = accuracy(load_suite()[:3], budgets=(10, 30))
+    assert [result['iterations'] for result in results] == [10, 30]
+    for result in results:
+        assert 0 <= result['accuracy'] <= 1
+        assert result['seconds_per_move'] > 0
@@ -0,0 +1,103 @@
+import numpy as np
+from agents.common import BoardPiece, PlayerAction, initialize_game_state, apply_player_action
+
+PLAYER1 = BoardPiece(1)
+PLAYER2 = BoardPiece(2)
+
+
+def play(moves):
+    board = initialize_game_state()
+    player = PLAYER1
+    for move in moves:
+        apply_player_action(board, PlayerAction(move), player)
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+    return board
+
+
+def test_position():
+    from agents.agent_solver.solver import Position
+
+    position = Position.from_board(play([0, 6, 1, 6, 2]), PLAYER2)
+
+    assert position.moves == 5
+    assert not position.is_winning_move(6)
+    assert position.play(5).is_winning_move(3)  # Player 1 completes the bottom row.
+    assert not position.play(3).is_winning_move(4)
+
+
+def test_position_mirror_key():
+    from agents.agent_solver.solver import Position
+
+    position = Position.from_board(play([0, 6, 1]), PLAYER2)
+    mirrored = Position.from_board(play([6, 0, 5]), PLAYER2)
+
+    assert position.mirror_key() == mirrored.key()
+    assert mirrored.mirror_key() == position.key()
+
+
+def brute_force(board, player):
+    """Outcome (1 win, 0 draw, -1 loss) for `player` to move, using the engine of agents.common."""
+    from agents.common import check_end_state, GameState
+
+    outcomes = []
+    for col in np.flatnonzero(board[0] == 0):
+        child = board.copy()
+        apply_player_action(child, PlayerAction(col), player)
+        state = check_end_state(child, player, PlayerAction(col))
+        if state == GameState.IS_WIN:
+            return 1
+        elif state == GameState.IS_DRAW:
+            outcomes.append(0)
+        else:
+            outcomes.append(-brute_force(child, PLAYER2 if player == PLAYER1 else PLAYER1))
+    return max(outcomes)
+
+
+def test_solve():
+    from agents.agent_solver.solver import solve
+    from agents.common import player_to_move, check_end_state, GameState
+
+    drawn = np.array([[1, 2, 2, 1, 1, 2, 2],
+                      [2, 1, 1, 2, 1, 2, 2],
+                      [2, 2, 1, 1, 1, 2, 2],
+                      [2, 1, 2, 2, 2, 1, 1],
+                      [1, 2, 1, 1, 1, 2, 2],
+                      [1, 1, 2, 1, 2, 1, 2]], dtype=BoardPiece)
+    rng = np.random.default_rng(0)
+    tested = 0
+    while tested < 10:
+        # Late positions obtained by emptying the top of some columns of a full board
+        board = drawn.copy()
+        for col in rng.choice(7, size=3, replace=False):
+            board[:rng.integers(1, 3), col] = 0
+        player = player_to_move(board)
+        if np.sum(board == 1) - np.sum(board == 2) not in (0, 1) or \
+                check_end_state(board, PLAYER1) != GameState.STILL_PLAYING or \
+                check_end_state(board, PLAYER2) != GameState.STILL_PLAYING:
+            continue
+
+        action, scores, nodes = solve(board, player)
+        assert np.sign(scores[action]) == brute_force(board, player)
+        assert scores[action] == max(score for score in scores if score is not None)
+        for col in range(7):
+            assert (scores[col] is None) == (board[0, col] != 0)
+        tested += 1
+
+
+def test_solve_budget():
+    from agents.agent_solver.solver import solve
+
+    action, scores, nodes = solve(initialize_game_state(), PLAYER1, max_nodes=100)
+
+    assert action is None and scores is None
+    assert nodes == 101
+
+
+def test_generate_move_solver():
+    from agents.agent_solver.solver import generate_move_solver
+
+    board = play([0, 6, 0, 6, 0, 6])
+    action, saved_state = generate_move_solver(board, PLAYER1, None, max_nodes=10)
+
+    assert 0 <= action < 7
+    assert saved_state is None
@@ -0,0 +1,10 @@
+def test_startup():
+    from benchmarks.startup import import_times, first_move
+
+    times = import_times(['agents.common'], repeat=1)
+    assert set(times) == {'python', 'agents.common'}
+    assert all(seconds > 0 for seconds in times.values())
+
+    times = first_move(iterations=5, warm=True, repeat=1)
+    assert times['warm_up'] > 0
+    assert times['to_first_move'] > times['imports'] + times['first_move']
@@ -0,0 +1,104 @@
+import asyncio
+import functools
+
+
+def test_telemetry_buffer(tmp_path):
+    from agents.common import PlayerAction, PLAYER1, initialize_game_state
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode
+    from agents.telemetry import Telemetry, read_telemetry
+
+    path = tmp_path / 'telemetry.jsonl'
+    telemetry = Telemetry(str(path), buffer_size=3)
+    game = telemetry.new_game()
+    node = TreeNode(initialize_game_state(), None, None, PLAYER1)
+    telemetry.record_search(node, iterations=10)
+    telemetry.record_move(game, 0, 'agent', PlayerAction(3), 0.5, node, player=1)
+    telemetry.record_move(game, 1, 'other', PlayerAction(2), 0.1)
+    assert read_telemetry(str(path)) == []  # Still buffered
+
+    telemetry.record_move(game, 2, 'agent', PlayerAction(4), 0.2, object())
+    records = read_telemetry(str(path))
+    assert len(records) == 3
+    assert records[0] == {'game': game, 'ply': 0, 'agent': 'agent', 'move': 3, 'seconds': 0.5, 'iterations': 10,
+                          'player': 1}
+    assert 'iterations' not in records[1] and 'iterations' not in records[2]
+
+    telemetry.record_move(telemetry.new_game(), 0, 'agent', PlayerAction(3), 0.5)
+    telemetry.close()
+    assert len(read_telemetry(str(path))) == 4
+
+
+def test_telemetry_unrecorded_searches(tmp_path):
+    import gc
+    from agents.common import PlayerAction, PLAYER1, initialize_game_state
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode
+    from agents.telemetry import Telemetry, read_telemetry
+
+    with Telemetry(str(tmp_path / 'telemetry.jsonl')) as telemetry:
+        # Searches whose move is never recorded are forgotten with their saved state
+        for _ in range(100):
+            telemetry.record_search(TreeNode(initialize_game_state(), None, None, PLAYER1), iterations=10)
+        gc.collect()
+        assert len(telemetry._searches) == 0
+
+        # A new saved state never gets the statistics of a forgotten one, even at the same address
+        node = TreeNode(initialize_game_state(), None, None, PLAYER1)
+        telemetry.record_move('game', 0, 'agent', PlayerAction(3), 0.5, node)
+    assert 'iterations' not in read_telemetry(str(tmp_path / 'telemetry.jsonl'))[0]
+
+
+def test_montecarlo_telemetry(tmp_path):
+    from agents.common import PLAYER1, PLAYER2, moves_to_board, apply_player_action, PlayerAction
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.telemetry import Telemetry, read_telemetry
+
+    path = str(tmp_path / 'telemetry.jsonl')
+    with Telemetry(path) as telemetry:
+        settings = SearchSettings(telemetry=telemetry)
+        board = moves_to_board('3')
+        action, saved_state = montecarlo(board.copy(), PLAYER2, None, PlayerAction(3), iterations=200,
+                                         settings=settings)
+        telemetry.record_move('game', 1, 'montecarlo', action, 0.1, saved_state)
+
+        # The opponent answers, and the tree below its move is reused
+        apply_player_action(board, action, PLAYER2)
+        reply = saved_state.child[0].move
+        apply_player_action(board, reply, PLAYER1)
+        action, saved_state = montecarlo(board.copy(), PLAYER2, saved_state, reply, iterations=100,
+                                         settings=settings)
+        telemetry.record_move('game', 3, 'montecarlo', action, 0.1, saved_state)
+
+    first, second = read_telemetry(path)
+    assert first['kind'] == 'search' and first['iterations'] == 200 and first['budget'] is None
+    assert first['reused_nodes'] == 0
+    assert first['tree_nodes'] > 7
+    assert 0 < first['visit_share'] <= 1
+    assert first['playouts_per_second'] > 0
+    assert second['reused_nodes'] > 0
+    assert second['tree_nodes'] > second['reused_nodes']
+
+
+def test_agent_vs_agent_telemetry(tmp_path):
+    from agents.async_agent import AgentSession, agent_vs_agent_async
+    from agents.common import PLAYER1, PLAYER2
+    from agents.agent_Monte_Carlo.montecarlo import SearchSettings
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+    from agents.agents_random.random import generate_move_random
+    from agents.telemetry import Telemetry, read_telemetry
+
+    path = str(tmp_path / 'telemetry.jsonl')
+    with Telemetry(path) as telemetry:
+        settings = SearchSettings(telemetry=telemetry)
+        agent = functools.partial(montecarlo, iterations=50, settings=settings)
+        # The sink is in this process, so the search runs in a thread
+        session_1 = AgentSession(agent, PLAYER1, needs_last_action=True, name='montecarlo', cpu_bound=False)
+        session_2 = AgentSession(generate_move_random, PLAYER2)
+        asyncio.run(agent_vs_agent_async(session_1, session_2, telemetry))
+
+    records = read_telemetry(path)
+    assert [record['ply'] for record in records] == list(range(len(records)))
+    assert len({record['game'] for record in records}) == 1
+    assert records[0]['agent'] == 'montecarlo' and records[0]['kind'] == 'opening'
+    assert records[1]['agent'] == 'generate_move_random' and 'kind' not in records[1]
+    assert all('kind' in record for record in records if record['agent'] == 'montecarlo')
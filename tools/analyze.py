@@ -0,0 +1,158 @@
+import argparse
+import json
+import sys
+import time
+from multiprocessing import Pool
+from agents.common import GameState, PLAYER1, PLAYER2
+from agents.common import check_end_state, string_to_board, moves_to_board, player_to_move
+
+
+def read_positions(lines):
+    """ Reads the positions of an analysis file.
+
+    A record is either a board printed by pretty_print_board (all its lines, the last one being
+    the line of column numbers) or a line with the columns played from the empty board (e.g. 3342).
+    Empty lines and lines starting with '#' are ignored.
+
+    Parameters
+    ----------
+    lines: iterable of str
+        lines of the file
+
+    Yields
+    ------
+    board: np.array
+        board of each record, in order
+    """
+    block = []
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.startswith('|'):
+            block.append(line)
+            if line[1:2].isdigit():  # Line of column numbers, the end of a printed board
+                yield string_to_board('\n'.join(block))
+                block = []
+        elif line.strip() and not line.startswith('#'):
+            yield moves_to_board(line.strip())
+
+
+def analyse_montecarlo(board, player, iterations):
+    """ Searches a position with the MonteCarlo agent.
+
+    Returns
+    -------
+    result: dict
+        move chosen by the agent, win rate and visits of every column and number of tree nodes
+    """
+    from agents.agent_Monte_Carlo.montecarlo import TreeNode, change_player
+    from agents.agent_Monte_Carlo.montecarlo_exec import run_iterations, best_move
+    from agents.agent_Monte_Carlo.memory import count_nodes
+
+    root = TreeNode(board, None, None, change_player(player))
+    run_iterations(root, player, iterations)
+    action, _ = best_move(root)
+
+    values = [None] * board.shape[1]
+    visits = [0] * board.shape[1]
+    # The mirrored columns of a symmetric board, which are not searched, share the child of their mirror
+    for move, children in root.children_by_column().items():
+        visits[move] = children.total_games
+        if children.total_games > 0:
+            values[move] = children.wins / children.total_games
+
+    return {'best_move': int(action), 'values': values, 'visits': visits, 'nodes': count_nodes(root)}
+
+
+def analyse_solver(board, player, max_nodes):
+    """ Solves a position, giving up after `max_nodes` nodes.
+
+    Returns
+    -------
+    result: dict
+        best move and score of every column (None if the budget was exceeded) and nodes searched
+    """
+    from agents.agent_solver.solver import solve
+
+    action, scores, nodes = solve(board, player, max_nodes)
+
+    return {'best_move': None if action is None else int(action), 'values': scores, 'nodes': nodes}
+
+
+def analyse(job):
+    """Analyses one record, run by the workers of the pool."""
+    index, board, agent, budget = job
+    player = player_to_move(board)
+    result = {'record': index, 'player': int(player)}
+
+    last_player = PLAYER2 if player == PLAYER1 else PLAYER1
+    if check_end_state(board, last_player) != GameState.STILL_PLAYING or check_end_state(board, player) \
+            != GameState.STILL_PLAYING:
+        result['error'] = 'game is over'
+        return result
+
+    t0 = time.perf_counter()
+    if agent == 'montecarlo':
+        result.update(analyse_montecarlo(board, player, budget))
+    else:
+        result.update(analyse_solver(board, player, budget))
+    result['seconds'] = time.perf_counter() - t0
+
+    return result
+
+
+def analyse_file(positions, output, agent='montecarlo', budget=2000, workers=None):
+    """ Analyses every position of the file `positions`, writing one JSON line per position to `output`.
+
+    Positions are analysed in parallel and each result is written as soon as it is ready,
+    so results are not in the order of the records (see their 'record' field).
+
+    Parameters
+    ----------
+    positions: str
+        file of positions (see read_positions)
+    output: file
+        open text file where the results are written
+    agent: str
+        'montecarlo' or 'solver'
+    budget: int
+        iterations of the MonteCarlo agent or maximum nodes of the solver, per position
+    workers: int or None
+        number of worker processes (default: one per core)
+
+    Returns
+    -------
+    count: int
+        number of analysed positions
+    """
+    from agents.agent_Monte_Carlo.montecarlo_exec import warm_up
+
+    with open(positions) as file:
+        jobs = [(i, board, agent, budget) for i, board in enumerate(read_positions(file))]
+
+    # Workers warm up before their first position, whose time would include it otherwise
+    with Pool(workers, initializer=warm_up) as pool:
+        for result in pool.imap_unordered(analyse, jobs):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+
+    return len(jobs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Analyses many positions in parallel.')
+    parser.add_argument('positions', help='file of printed boards or move strings')
+    parser.add_argument('-o', '--output', default='-', help='JSON lines output file (default: stdout)')
+    parser.add_argument('--agent', choices=('montecarlo', 'solver'), default='montecarlo')
+    parser.add_argument('--budget', type=int, default=2000,
+                        help='MonteCarlo iterations or solver nodes per position')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        t0 = time.perf_counter()
+        count = analyse_file(args.positions, out, args.agent, args.budget, args.workers)
+        print(f'{count} positions analysed in {time.perf_counter() - t0:.1f}s', file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
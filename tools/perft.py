@@ -0,0 +1,172 @@
+import argparse
+import sys
+import time
+import numpy as np
+from agents.common import GameState, PlayerAction, PLAYER1, PLAYER2, DEFAULT_CONFIG
+from agents.common import apply_player_action, check_end_state, moves_to_board, player_to_move
+
+# Number of positions reached after exactly `depth` moves from the empty 6x7 board, games won earlier
+# not being continued. Depth 7 misses the 7 sequences playing 7 times in one column, depth 8 the won games.
+REFERENCE_COUNTS = [1, 7, 49, 343, 2401, 16807, 117649, 823536, 5673234, 39394572]
+
+
+def perft(board, player, depth, connect=4):
+    """ Counts the positions reachable in exactly `depth` moves, with the engine of agents.common.
+
+    Positions where the game is over are counted when they are reached but not continued.
+
+    Parameters
+    ----------
+    board: np.array
+        state of the board (matrix)
+    player: BoardPiece
+        player to move
+    depth: int
+        number of moves
+    connect: int
+        number of aligned pieces needed to win
+
+    Returns
+    -------
+    count: int
+        number of positions (leaves of the game tree at that depth)
+    """
+    from agents.agent_Monte_Carlo.montecarlo import valid_columns
+
+    if depth == 0:
+        return 1
+    cols = valid_columns(board)
+    if cols is None:
+        return 0
+    cols = np.atleast_1d(cols)
+    if depth == 1:  # Every move leads to a counted position
+        return len(cols)
+
+    other = PLAYER2 if player == PLAYER1 else PLAYER1
+    count = 0
+    for col in cols:
+        child = board.copy()
+        apply_player_action(child, PlayerAction(col), player)
+        if check_end_state(child, player, PlayerAction(col), connect) == GameState.STILL_PLAYING:
+            count += perft(child, other, depth - 1, connect)
+
+    return count
+
+
+def perft_bitboard(position, depth):
+    """ Counts the positions like perft, with the bitboards of the solver (see solver.Position).
+
+    Parameters
+    ----------
+    position: Position
+        position with its player to move
+    depth: int
+        number of moves
+
+    Returns
+    -------
+    count: int
+        number of positions
+    """
+    if depth == 0:
+        return 1
+    cols = [col for col in range(position.cols) if position.can_play(col)]
+    if depth == 1:
+        return len(cols)
+
+    count = 0
+    for col in cols:
+        # A winning move ends the game, and the full board is caught by the lack of columns
+        if not position.is_winning_move(col):
+            count += perft_bitboard(position.play(col), depth - 1)
+
+    return count
+
+
+def _bitboard(board, player, depth, connect):
+    from agents.agent_solver.solver import Position
+    return perft_bitboard(Position.from_board(board, player, connect), depth)
+
+
+# Engines counting the same game tree, called with the board, the player to move, the depth and connect
+ENGINES = {'reference': perft, 'bitboard': _bitboard}
+
+
+def divide(board, player, depth, engine='reference', connect=4):
+    """ Counts of perft split by first move, to find where two engines differ.
+
+    Returns
+    -------
+    counts: dict
+        number of positions at `depth` after every legal first move
+    """
+    other = PLAYER2 if player == PLAYER1 else PLAYER1
+    counts = {}
+    for col in range(board.shape[1]):
+        if board[0, col] == 0:
+            child = board.copy()
+            apply_player_action(child, PlayerAction(col), player)
+            if depth == 1:
+                counts[col] = 1
+            elif check_end_state(child, player, PlayerAction(col), connect) == GameState.STILL_PLAYING:
+                counts[col] = ENGINES[engine](child, other, depth - 1, connect)
+            else:
+                counts[col] = 0
+    return counts
+
+
+def run(board, max_depth, engine='reference', connect=4, reference=None, output=sys.stdout):
+    """ Runs perft at every depth up to `max_depth`, printing counts, speed and checks.
+
+    Parameters
+    ----------
+    board: np.array
+        starting position
+    max_depth: int
+        last depth
+    engine: str
+        key of ENGINES
+    connect: int
+        number of aligned pieces needed to win
+    reference: list or None
+        expected counts by depth, if known
+    output: file
+        where the report is written
+
+    Returns
+    -------
+    ok: bool
+        whether every count matches its reference
+    """
+    player = player_to_move(board)
+    ok = True
+    for depth in range(max_depth + 1):
+        t0 = time.perf_counter()
+        count = ENGINES[engine](board, player, depth, connect)
+        seconds = time.perf_counter() - t0
+
+        line = f'depth {depth:2d}: {count:12d} positions {seconds:8.2f}s {count / max(seconds, 1e-9):12.0f} positions/s'
+        if reference is not None and depth < len(reference):
+            match = count == reference[depth]
+            ok = ok and match
+            line += ' ok' if match else f' MISMATCH (expected {reference[depth]})'
+        print(line, file=output)
+
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Counts the positions reachable at every depth.')
+    parser.add_argument('depth', type=int, help='last depth')
+    parser.add_argument('--moves', default='', help='columns played from the empty board (e.g. 3342)')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='reference')
+    parser.add_argument('--divide', action='store_true', help='counts of every first move at the last depth')
+    args = parser.parse_args()
+
+    start = moves_to_board(args.moves)
+    if args.divide:
+        for move, moves_count in divide(start, player_to_move(start), args.depth, args.engine).items():
+            print(f'{move}: {moves_count}')
+    else:
+        known = REFERENCE_COUNTS if args.moves == '' else None
+        sys.exit(0 if run(start, args.depth, args.engine, DEFAULT_CONFIG.connect, known) else 1)
@@ -0,0 +1,315 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+from agents.common import GameState, PLAYER1, PLAYER2
+from agents.common import initialize_game_state, apply_player_action, check_end_state
+
+# Fields recorded for every position, with their dtype and shape (after the number of positions).
+# Self-play is played on the default 6x7 board, records of other sizes are rejected.
+FIELDS = {
+    'boards': (np.int8, (6, 7)),  # Board before the move
+    'players': (np.int8, ()),  # Player to move
+    'visits': (np.float32, (7,)),  # Share of the root visits of every column
+    'moves': (np.int8, ()),  # Column played
+    'outcomes': (np.int8, ()),  # Result of the game for the player to move: 1 win, 0 draw, -1 loss
+}
+_HEADER_SIZE = 128  # Fixed size of the .npy headers, so they can be rewritten when appending
+
+
+def _record_position(records, board, player, action, saved_state):
+    """Appends a searched position to the records, with the visit shares of the root of its search."""
+    if board.shape != FIELDS['boards'][1]:
+        raise ValueError(f'Self-play records are for {FIELDS["boards"][1]} boards, not {board.shape}')
+    root = saved_state.parent
+    # The first move of the game is not searched, so it is not recorded
+    if root is not None:
+        visits = np.zeros(board.shape[1], dtype=np.float32)
+        for move, children in root.children_by_column().items():
+            visits[move] = children.total_games
+        if visits.sum() == 0:  # Forced move, played without search
+            visits[action] = 1
+        records['boards'].append(board)
+        records['players'].append(player)
+        records['visits'].append(visits / max(visits.sum(), 1))
+        records['moves'].append(action)
+
+
+def _finish_records(records, end_state, winner):
+    records['outcomes'] = [0 if end_state == GameState.IS_DRAW else (1 if p == winner else -1)
+                           for p in records['players']]
+
+    return {name: np.array(records[name], dtype=dtype).reshape((-1,) + shape)
+            for name, (dtype, shape) in FIELDS.items()}
+
+
+def play_game(job):
+    """ Plays one MonteCarlo vs MonteCarlo game, run by the workers of the pool.
+
+    Parameters
+    ----------
+    job: tuple
+        seed of the game and iterations of every search
+
+    Returns
+    -------
+    records: dict
+        arrays of FIELDS, with one row per searched position of the game
+    """
+    from agents.agent_Monte_Carlo.montecarlo_exec import montecarlo
+
+    seed, iterations = job
+    np.random.seed(seed)
+
+    board = initialize_game_state()
+    saved_state = {PLAYER1: None, PLAYER2: None}
+    records = {name: [] for name in FIELDS}
+    action = None
+    player = PLAYER1
+    end_state = GameState.STILL_PLAYING
+
+    while end_state == GameState.STILL_PLAYING:
+        before = board.copy()
+        action, saved_state[player] = montecarlo(board.copy(), player, saved_state[player], action,
+                                                 iterations=iterations)
+        _record_position(records, before, player, action, saved_state[player])
+
+        apply_player_action(board, action, player)
+        end_state = check_end_state(board, player, action)
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+
+    return _finish_records(records, end_state, PLAYER2 if player == PLAYER1 else PLAYER1)
+
+
+def play_games_lockstep(job):
+    """ Plays several MonteCarlo vs MonteCarlo games together, their searches advancing in lockstep.
+
+    The searches of the moves of all the games are run by lockstep.montecarlo_lockstep, so that their
+    simulations are batched across the games.
+
+    Parameters
+    ----------
+    job: tuple
+        seed, number of games and iterations of every search
+
+    Returns
+    -------
+    records: list
+        records of every game, as returned by play_game
+    """
+    from agents.agent_Monte_Carlo.lockstep import montecarlo_lockstep
+
+    seed, games, iterations = job
+    np.random.seed(seed)
+
+    boards = [initialize_game_state() for _ in range(games)]
+    saved_states = [{PLAYER1: None, PLAYER2: None} for _ in range(games)]
+    records = [{name: [] for name in FIELDS} for _ in range(games)]
+    actions = [None] * games
+    results = [None] * games
+    player = PLAYER1
+    playing = list(range(games))
+
+    while playing:
+        moves = montecarlo_lockstep([boards[i].copy() for i in playing], [player] * len(playing),
+                                    [saved_states[i][player] for i in playing], [actions[i] for i in playing],
+                                    iterations=iterations)
+        for i, (action, saved_state) in zip(playing, moves):
+            actions[i], saved_states[i][player] = action, saved_state
+            _record_position(records[i], boards[i].copy(), player, action, saved_state)
+            apply_player_action(boards[i], action, player)
+            end_state = check_end_state(boards[i], player, action)
+            if end_state != GameState.STILL_PLAYING:
+                results[i] = _finish_records(records[i], end_state, player)
+
+        playing = [i for i in playing if results[i] is None]
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+
+    return results
+
+
+def _write_header(file, dtype, shape, size=_HEADER_SIZE):
+    """Writes a .npy header of `size` bytes, magic string and length included."""
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False,
+                   'shape': tuple(shape)})
+    prefix = np.lib.format.magic(1, 0) + (size - 10).to_bytes(2, 'little')
+    file.seek(0)
+    file.write(prefix + header.encode('latin1').ljust(size - 11) + b'\n')
+
+
+def _header_size(file):
+    """Size of the .npy header of a file."""
+    file.seek(8)
+    return 10 + int.from_bytes(file.read(2), 'little')
+
+
+class ShardWriter:
+    """
+    Writer of self-play records into shards of .npy files.
+
+    A shard is a directory with one .npy file per field. Records are appended to the files of
+    the current shard as they arrive, and a new shard is started once `shard_size` positions
+    have been written, so records never have to be held in memory. Opening an existing
+    directory continues its last shard, after the positions counted by the headers of all its files:
+    rows written by a process that died before updating the headers are dropped.
+
+    Attributes
+    ----------
+    directory: str
+        directory of the shards
+    shard_size: int
+        maximum number of positions of a shard
+    """
+
+    def __init__(self, directory, shard_size=100000):
+        self.directory = directory
+        self.shard_size = shard_size
+        os.makedirs(directory, exist_ok=True)
+        shards = sorted(name for name in os.listdir(directory) if name.startswith('shard_'))
+        self.shard = len(shards) - 1 if shards else 0
+        self.count = 0
+        if shards:
+            self.count = min(len(np.load(self._path(name), mmap_mode='r')) if os.path.exists(self._path(name)) else 0
+                             for name in FIELDS)
+        self._files = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'shard_{self.shard:05d}', name + '.npy')
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self._path('moves')), exist_ok=True)
+        self._files = {}
+        self._header_sizes = {}
+        for name, (dtype, shape) in FIELDS.items():
+            path = self._path(name)
+            if os.path.exists(path):
+                file = open(path, 'r+b')
+                size = _header_size(file)
+                # Rows after the counted ones are left by an append that did not finish
+                file.truncate(size + self.count * np.dtype(dtype).itemsize * int(np.prod(shape)))
+            else:
+                file = open(path, 'w+b')
+                size = _HEADER_SIZE
+            _write_header(file, dtype, (self.count,) + shape, size)
+            file.seek(0, os.SEEK_END)
+            self._files[name] = file
+            self._header_sizes[name] = size
+
+    def append(self, records):
+        """ Appends records (a dict of arrays of FIELDS with the same length) to the shards. """
+        n = len(records['moves'])
+        for name, (dtype, shape) in FIELDS.items():
+            if np.shape(records[name]) != (n,) + shape:
+                raise ValueError(f'{name} of shape {np.shape(records[name])} given, expected {(n,) + shape}')
+        start = 0
+        while start < n:
+            if self.count == self.shard_size:
+                self.close()
+                self.shard += 1
+                self.count = 0
+            if self._files is None:
+                self._open()
+
+            stop = min(n, start + self.shard_size - self.count)
+            for name, (dtype, shape) in FIELDS.items():
+                file = self._files[name]
+                file.write(np.ascontiguousarray(records[name][start:stop], dtype=dtype).tobytes())
+            self.count += stop - start
+            start = stop
+
+            # Headers are updated after the data, so a shard is readable at any time
+            for name, (dtype, shape) in FIELDS.items():
+                file = self._files[name]
+                _write_header(file, dtype, (self.count,) + shape, self._header_sizes[name])
+                file.seek(0, os.SEEK_END)
+                file.flush()
+
+    def close(self):
+        if self._files is not None:
+            for file in self._files.values():
+                file.close()
+            self._files = None
+
+
+def load_shards(directory):
+    """ Loads the shards written by ShardWriter.
+
+    Parameters
+    ----------
+    directory: str
+        directory of the shards
+
+    Returns
+    -------
+    shards: list
+        one dict per shard, with a memory-mapped array per field
+    """
+    shards = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('shard_'):
+            shards.append({field: np.load(os.path.join(directory, name, field + '.npy'), mmap_mode='r')
+                           for field in FIELDS})
+    return shards
+
+
+def self_play(directory, games, iterations=200, workers=None, shard_size=100000, seed=0, lockstep=None):
+    """ Plays games in a pool of processes, streaming their positions to shards.
+
+    Parameters
+    ----------
+    directory: str
+        directory of the shards, new positions are appended to the ones already there
+    games: int
+        number of games
+    iterations: int
+        iterations of the MonteCarlo search of every move
+    workers: int or None
+        number of worker processes (default: one per core)
+    shard_size: int
+        maximum number of positions of a shard
+    seed: int
+        seed of the first game, the following ones using the next seeds
+    lockstep: int or None
+        if given, every worker plays this number of games together (see play_games_lockstep)
+
+    Returns
+    -------
+    positions: int
+        number of positions written
+    """
+    from agents.agent_Monte_Carlo.montecarlo_exec import warm_up
+
+    writer = ShardWriter(directory, shard_size)
+    positions = 0
+    try:
+        with Pool(workers, initializer=warm_up) as pool:
+            if lockstep is None:
+                results = pool.imap_unordered(play_game, [(seed + i, iterations) for i in range(games)])
+            else:
+                jobs = [(seed + i, min(lockstep, games - i), iterations) for i in range(0, games, lockstep)]
+                results = (records for group in pool.imap_unordered(play_games_lockstep, jobs) for records in group)
+            for records in results:
+                writer.append(records)
+                positions += len(records['moves'])
+    finally:
+        writer.close()
+
+    return positions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='MonteCarlo self-play, writing training data to shards.')
+    parser.add_argument('directory', help='directory of the shards')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=200, help='MonteCarlo iterations per move')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--shard-size', type=int, default=100000, help='positions per shard')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--lockstep', type=int, default=None, help='games played together by every worker')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    count = self_play(args.directory, args.games, args.iterations, args.workers, args.shard_size, args.seed,
+                      args.lockstep)
+    print(f'{count} positions from {args.games} games in {time.perf_counter() - t0:.1f}s')